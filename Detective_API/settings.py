@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 import os
+import tempfile
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -107,6 +109,26 @@ else:
     }
 
 
+# Cache
+# Shared by all gunicorn workers in the container, so cache invalidation reaches every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'detective_api_cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # version tokens of per-worker caches: a handful of keys, kept apart so culling the default cache never drops
+    # one and a read costs a single small file
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('VERSION_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'detective_api_versions')),
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -151,7 +173,7 @@ CORS_ALLOWED_ORIGINS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.ExpiringTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -161,6 +183,15 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 10,
 }
 
+REST_AUTH = {
+    'TOKEN_CREATOR': 'accounts.authentication.create_token',
+}
+
+# Tokens older than this are rejected and replaced on the next login
+TOKEN_TTL = timedelta(days=int(os.getenv('TOKEN_TTL_DAYS', '7')))
+# Seconds a token lookup is served from the cache
+TOKEN_CACHE_TIMEOUT = 300
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Detective Application API',
     'VERSION': '1.0.0',
@@ -22,6 +22,7 @@ from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 from Detective_API import settings
 from Detective_API.stub_view import StubView
+from detective.views import search
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -32,6 +33,8 @@ urlpatterns = [
     path('evidences/', include('evidences.urls')),
     path('suspects/', include('suspects.urls')),
     path('rewards/', include('rewards.urls')),
+    path('stats/', include('detective.urls')),
+    path('search/', search, name='search'),
     path('schema/', SpectacularAPIView.as_view(), name='schema'),
     path('schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('stub/', StubView.as_view(), name='stub'),
@@ -1,9 +1,46 @@
 from django.contrib import admin
 
 from accounts.models import User, Role, Permission
+from common.admin import LargeTableAdmin
 
-# Register your models here.
 
-admin.site.register(User)
-admin.site.register(Permission)
-admin.site.register(Role)
\ No newline at end of file
+@admin.register(User)
+class UserAdmin(LargeTableAdmin):
+    list_display = ("username", "first_name", "last_name", "national_id", "role_names", "reporting_to_name")
+    list_select_related = ("reporting_to",)
+    list_filter = ("roles",)
+    search_fields = ("username", "first_name", "last_name", "national_id")
+    autocomplete_fields = ("roles",)
+    raw_id_fields = ("reporting_to",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related("roles")
+
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        if db_field.name == "user_permissions":
+            # auth permissions render with their content type
+            kwargs["queryset"] = db_field.remote_field.model.objects.select_related("content_type")
+        return super().formfield_for_manytomany(db_field, request, **kwargs)
+
+    @admin.display(description="Roles")
+    def role_names(self, obj):
+        return ", ".join(role.name for role in obj.roles.all())
+
+    @admin.display(description="Reporting to", ordering="reporting_to__last_name")
+    def reporting_to_name(self, obj):
+        if obj.reporting_to is None:
+            return "-"
+        return f"{obj.reporting_to.first_name} {obj.reporting_to.last_name}"
+
+
+@admin.register(Permission)
+class PermissionAdmin(admin.ModelAdmin):
+    list_display = ("codename", "name")
+    search_fields = ("codename", "name")
+
+
+@admin.register(Role)
+class RoleAdmin(admin.ModelAdmin):
+    list_display = ("name",)
+    search_fields = ("name",)
+    autocomplete_fields = ("permissions",)
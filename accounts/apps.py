@@ -1,12 +1,33 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, m2m_changed, post_save, post_delete
 
-from accounts.signals import create_default_perms, create_default_roles
+from accounts.signals import create_default_perms, create_default_roles, invalidate_role_cache, \
+    invalidate_role_cache_on_m2m, forget_roles_on_user_save, evict_cached_token, revoke_tokens_on_user_save, \
+    evict_cached_tokens_on_role_change, sync_perm_masks_on_m2m, sync_perm_masks_on_role_delete, \
+    detach_subordinates
 
 
 class AccountsConfig(AppConfig):
     name = 'accounts'
 
     def ready(self):
+        from rest_framework.authtoken.models import Token
+        from accounts.models import User, Role
+
         post_migrate.connect(create_default_perms, sender=self)
         post_migrate.connect(create_default_roles, sender=self)
+
+        m2m_changed.connect(invalidate_role_cache_on_m2m, sender=User.roles.through)
+        m2m_changed.connect(invalidate_role_cache_on_m2m, sender=Role.permissions.through)
+        post_save.connect(invalidate_role_cache, sender=Role)
+        post_delete.connect(invalidate_role_cache, sender=Role)
+        post_save.connect(forget_roles_on_user_save, sender=User)
+        post_delete.connect(invalidate_role_cache, sender=User)
+
+        post_delete.connect(evict_cached_token, sender=Token)
+        post_save.connect(revoke_tokens_on_user_save, sender=User)
+        m2m_changed.connect(evict_cached_tokens_on_role_change, sender=User.roles.through)
+        m2m_changed.connect(sync_perm_masks_on_m2m, sender=User.roles.through)
+        m2m_changed.connect(sync_perm_masks_on_m2m, sender=Role.permissions.through)
+        post_delete.connect(sync_perm_masks_on_role_delete, sender=Role)
+        post_delete.connect(detach_subordinates, sender=User)
@@ -0,0 +1,77 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def _cache_key(key):
+    return "accounts:token:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+def token_expires_at(token):
+    return token.created + settings.TOKEN_TTL
+
+
+def is_token_expired(token):
+    return token_expires_at(token) <= timezone.now()
+
+
+def create_token(token_model, user, serializer):
+    """
+    TOKEN_CREATOR for dj_rest_auth: reuse the user's token while it is valid, replace it once it expired.
+    """
+    token, created = token_model.objects.get_or_create(user=user)
+    if not created and is_token_expired(token):
+        token.delete()
+        token = token_model.objects.create(user=user)
+    return token
+
+
+def evict_cached_tokens(keys):
+    cache.delete_many([_cache_key(key) for key in keys])
+
+
+def evict_cached_user_tokens(user_ids=None):
+    tokens = Token.objects.all()
+    if user_ids is not None:
+        tokens = tokens.filter(user_id__in=user_ids)
+    evict_cached_tokens(tokens.values_list("key", flat=True))
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication with a TTL on tokens and a short-lived cache of token lookups.
+
+    Cached entries are evicted once the deletion of the token (logout, expiry purge) or a change to its user
+    commits, so revocation takes effect on the next request after the commit. Evicting earlier would let a
+    request that authenticates before the commit cache the old row again.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = _cache_key(key)
+        token = cache.get(cache_key)
+
+        if token is None:
+            model = self.get_model()
+            try:
+                token = model.objects.select_related("user").get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+            remaining = (token_expires_at(token) - timezone.now()).total_seconds()
+            if remaining > 0:
+                cache.set(cache_key, token, timeout=min(settings.TOKEN_CACHE_TIMEOUT, remaining))
+
+        if is_token_expired(token):
+            cache.delete(cache_key)
+            raise exceptions.AuthenticationFailed(_("Token has expired."))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        return (token.user, token)
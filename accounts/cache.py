@@ -0,0 +1,115 @@
+"""
+Process-level cache of user roles and role permissions.
+
+Each worker keeps its own copy in memory, tagged with a version token stored in the shared "versions" cache,
+which holds only such tokens and so never culls them. The token is read once per permission snapshot.
+Any change to roles, role permissions or role assignments replaces the token once it commits, so every worker
+drops its copy on its next lookup. The worker making the change drops its copy right away, and the one it
+fills inside the transaction when the transaction ends: that may have been a rollback.
+"""
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.db import transaction
+
+VERSION_KEY = "accounts:perm-cache-version"
+# role sets kept per worker, least recently used dropped first
+MAX_CACHED_USERS = 10000
+
+
+class _State:
+    def __init__(self, version, uncommitted=False):
+        self.version = version
+        # filled inside a transaction that changed role data, and only good until it ends
+        self.uncommitted = uncommitted
+        self.role_perms = None
+        self.user_roles = OrderedDict()
+
+
+_state = _State(None)
+
+
+def _current_version():
+    versions = caches["versions"]
+    version = versions.get(VERSION_KEY)
+    if version is None:
+        versions.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = versions.get(VERSION_KEY)
+    return version
+
+
+def _synced_state():
+    global _state
+    version = _current_version()
+    # after a commit the version changes too; after a rollback only this catches it
+    if _state.version != version or (_state.uncommitted and not transaction.get_connection().in_atomic_block):
+        _state = _State(version)
+    return _state
+
+
+def role_perm_map(state=None):
+    """
+    Map of role name to the frozenset of its permission codenames.
+    """
+    state = state or _synced_state()
+    if state.role_perms is None:
+        from .models import Role
+
+        mapping = {}
+        for role_name, codename in Role.objects.values_list("name", "permissions__codename"):
+            perms = mapping.setdefault(role_name, set())
+            if codename:
+                perms.add(codename)
+        state.role_perms = {role_name: frozenset(perms) for role_name, perms in mapping.items()}
+    return state.role_perms
+
+
+def user_role_names(user_id, state=None):
+    state = state or _synced_state()
+    roles = state.user_roles.get(user_id)
+    if roles is not None:
+        state.user_roles.move_to_end(user_id)
+        return roles
+
+    from .models import User
+
+    roles = frozenset(User.roles.through.objects.filter(user_id=user_id).values_list("role__name", flat=True))
+    state.user_roles[user_id] = roles
+    if len(state.user_roles) > MAX_CACHED_USERS:
+        state.user_roles.popitem(last=False)
+    return roles
+
+
+def forget_user(user_id):
+    """
+    Drop this worker's role set of user_id, for a user that cannot be cached anywhere else yet.
+    """
+    _state.user_roles.pop(user_id, None)
+
+
+def get_snapshot(user):
+    from .models import PermissionSnapshot, PERM_BITS
+
+    state = _synced_state()
+    roles = user_role_names(user.pk, state)
+    role_perms = role_perm_map(state)
+    extra_perms = set()
+    for role_name in roles:
+        extra_perms.update(codename for codename in role_perms.get(role_name, ()) if codename not in PERM_BITS)
+    return PermissionSnapshot(roles, user.perm_mask, extra_perms)
+
+
+def _bump_version():
+    caches["versions"].set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def invalidate():
+    """
+    Drop cached role data in every worker once the surrounding transaction commits, and in this worker right
+    away.
+    """
+    global _state
+    if transaction.get_connection().in_atomic_block:
+        _state = _State(_state.version, uncommitted=True)
+    transaction.on_commit(_bump_version)
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+
+class Command(BaseCommand):
+    help = "Delete expired authentication tokens in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        cutoff = timezone.now() - settings.TOKEN_TTL
+        total = 0
+
+        while True:
+            keys = list(Token.objects.filter(created__lte=cutoff).values_list("key", flat=True)[:batch_size])
+            if not keys:
+                break
+            Token.objects.filter(key__in=keys).delete()
+            total += len(keys)
+
+        self.stdout.write(f"Deleted {total} expired tokens")
@@ -0,0 +1,55 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:44
+
+import accounts.models
+from django.db import migrations, models
+
+
+# accounts.models.PERM_BITS as of this migration
+PERM_BITS = {
+    codename: 1 << index
+    for index, codename in enumerate([
+        "case_create", "case_edit", "case_approve", "case_verify", "case_delete", "case_read", "evidence_create",
+        "evidence_read", "investigation_submit", "base", "admin",
+    ])
+}
+
+
+def backfill_perm_masks(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    Role = apps.get_model('accounts', 'Role')
+
+    role_masks = {}
+    for role_id, codename in Role.objects.values_list('id', 'permissions__codename'):
+        role_masks[role_id] = role_masks.get(role_id, 0) | PERM_BITS.get(codename, 0)
+
+    user_masks = {}
+    for user_id, role_id in User.roles.through.objects.values_list('user_id', 'role_id'):
+        user_masks[user_id] = user_masks.get(user_id, 0) | role_masks.get(role_id, 0)
+
+    by_mask = {}
+    for user_id, mask in user_masks.items():
+        by_mask.setdefault(mask, []).append(user_id)
+    for mask, user_ids in by_mask.items():
+        User.objects.filter(pk__in=user_ids).update(perm_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_userpref'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', accounts.models.UserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='perm_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_perm_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:49
+
+from django.db import migrations, models
+
+
+def backfill_chain_paths(apps, schema_editor):
+    # accounts.signals.rebuild_chain_paths as of this migration; users caught in a reporting cycle keep ''
+    User = apps.get_model('accounts', 'User')
+    parents = dict(User.objects.values_list('pk', 'reporting_to_id'))
+
+    paths = {}
+    for user_id in parents:
+        chain = []
+        node = user_id
+        while node is not None and node not in paths and node not in chain:
+            chain.append(node)
+            node = parents.get(node)
+        if node is None:
+            prefix = '/'
+        elif node in chain:
+            prefix = None
+        else:
+            prefix = paths[node] or None
+        for node in reversed(chain):
+            prefix = f'{prefix}{node}/' if prefix is not None else None
+            paths[node] = prefix or ''
+
+    User.objects.bulk_update(
+        [User(pk=user_id, chain_path=path) for user_id, path in paths.items() if path],
+        ['chain_path'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_perm_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='chain_path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_chain_paths, migrations.RunPython.noop),
+    ]
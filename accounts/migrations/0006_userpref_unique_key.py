@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:50
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def drop_duplicate_prefs(apps, schema_editor):
+    # update_or_create without a constraint could leave several rows per key; the newest one wins
+    UserPref = apps.get_model('accounts', 'UserPref')
+    keep_ids = UserPref.objects.values('user', 'key').annotate(keep_id=Max('id')).values('keep_id')
+    UserPref.objects.exclude(id__in=keep_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_user_chain_path'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_prefs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userpref',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='userpref_user_key_unique'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_userpref_unique_key'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='workload',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['workload', 'id'], name='user_workload_idx'),
+        ),
+    ]
@@ -1,5 +1,23 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Length, Substr
+from django.utils.functional import cached_property
+
+from .cache import get_snapshot
+from .signals import DEFAULT_PERMS
+
+# Bit of each default permission in User.perm_mask. Follows DEFAULT_PERMS order, so only append new codenames there.
+PERM_BITS = {codename: 1 << index for index, codename in enumerate(DEFAULT_PERMS)}
+
+
+def perm_mask(codenames):
+    mask = 0
+    for codename in codenames:
+        mask |= PERM_BITS.get(codename, 0)
+    return mask
+
 
 class Permission(models.Model):
     codename = models.CharField(max_length=100, unique=True)  # snake_case
@@ -19,11 +37,179 @@ class Role(models.Model):
     def __str__(self):
         return self.name
 
+class PermissionSnapshot:
+    """
+    Role names and permissions of a user, loaded once and reused by every check in a request.
+
+    Default permissions are tested against the user's perm_mask; codenames outside DEFAULT_PERMS are kept in
+    extra_perms.
+    """
+    __slots__ = ("roles", "mask", "extra_perms")
+
+    def __init__(self, roles, mask, extra_perms=()):
+        self.roles = frozenset(roles)
+        self.mask = mask
+        self.extra_perms = frozenset(extra_perms)
+
+    @property
+    def is_admin(self):
+        return "admin" in self.roles
+
+    @property
+    def perms(self):
+        return frozenset(codename for codename, bit in PERM_BITS.items() if self.mask & bit) | self.extra_perms
+
+    def has_role(self, *names):
+        return not self.roles.isdisjoint(names)
+
+    def grants(self, codename):
+        """
+        True if one of the user's roles grants the codename, admin or not.
+        """
+        bit = PERM_BITS.get(codename)
+        if bit is not None:
+            return bool(self.mask & bit)
+        return codename in self.extra_perms
+
+    def has_perm(self, *codenames):
+        """
+        True if any of the codenames is granted by one of the roles, or the user is an admin.
+        """
+        return self.is_admin or any(self.grants(codename) for codename in codenames)
+
+
+class UserQuerySet(models.QuerySet):
+    def with_any_perm(self, *codenames):
+        """
+        Users granted any of the given default permissions, filtered on perm_mask without joining roles.
+        """
+        return self.alias(perm_bits=F("perm_mask").bitand(perm_mask(codenames))).filter(perm_bits__gt=0)
+
+    def under(self, user):
+        """
+        Everyone in the user's chain of command below them, at any depth.
+        """
+        return self.subtree(user).exclude(pk=user.pk)
+
+    def subtree(self, user):
+        """
+        The user and everyone below them. Written as a range on chain_path rather than a LIKE so it is an index
+        range scan on every backend.
+        """
+        if not user.chain_path:
+            return self.filter(pk=user.pk)
+        # "0" is the character after "/", so the range covers every path that starts with the user's
+        return self.filter(chain_path__gte=user.chain_path, chain_path__lt=user.chain_path[:-1] + "0")
+
+    def least_loaded(self, role_name, pending=None):
+        """
+        The active user with role_name and the smallest workload, locked for the transaction. Rows other
+        transactions hold are skipped, so concurrent assignments spread over different users; when they hold
+        every candidate, the pick waits for its lock instead. None only when no such user exists.
+
+        pending maps user ids to work handed out earlier in the same transaction and not yet counted in
+        workload; it is taken into account without extra queries.
+        """
+        pending = pending or {}
+        users = self.filter(roles__name=role_name, is_active=True).order_by("workload", "id")
+        candidates = list(users.select_for_update(skip_locked=True, of=("self",))[:len(pending) + 1])
+        if not candidates:
+            candidates = list(users.select_for_update(of=("self",))[:len(pending) + 1])
+        # a user outside the candidates has at least the workload of the first candidate without pending
+        # work, so the pick among the candidates is the overall pick
+        return min(candidates, key=lambda user: (user.workload + pending.get(user.pk, 0), user.workload, user.pk),
+                   default=None)
+
+    def above(self, user):
+        """
+        The user's superiors, nearest first.
+        """
+        ancestor_ids = [int(part) for part in user.chain_path.strip("/").split("/")[:-1] if part]
+        return self.filter(pk__in=ancestor_ids).order_by(Length("chain_path").desc())
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
     national_id = models.CharField(max_length=10, unique=True)
     phone = models.CharField(max_length=15)
     roles = models.ManyToManyField(Role, blank=True)
     reporting_to = models.ForeignKey('self', on_delete=models.deletion.SET_NULL, null=True, blank=True)
+    # union of the PERM_BITS granted by the user's roles, kept in sync by accounts.signals
+    perm_mask = models.BigIntegerField(default=0, editable=False)
+    # ids from the top of the reporting_to chain down to this user, e.g. "/1/5/12/"
+    chain_path = models.CharField(max_length=255, default="", editable=False, db_index=True)
+    # cases assigned to the user and waiting on them, kept in sync by the case workflow
+    workload = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = UserManager()
+
+    # columns maintained with queryset updates; a plain save() of a loaded instance must not overwrite them
+    maintained_fields = ("perm_mask", "chain_path", "workload")
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=["workload", "id"], name="user_workload_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_reporting_to_id = instance.__dict__.get("reporting_to_id")
+        return instance
+
+    @cached_property
+    def perm_snapshot(self):
+        return get_snapshot(self)
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        if not adding and update_fields is None:
+            update_fields = kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.maintained_fields
+            ]
+        moved = adding or (
+                "reporting_to" in update_fields
+                and self.reporting_to_id != getattr(self, "_loaded_reporting_to_id", None)
+        )
+
+        with transaction.atomic():
+            parent_path = self._parent_path() if moved else None
+            super().save(*args, **kwargs)
+            if moved:
+                self._move_subtree(parent_path)
+        self._loaded_reporting_to_id = self.reporting_to_id
+
+    def _parent_path(self):
+        if self.reporting_to_id is None:
+            return "/"
+        parent_path = User.objects.filter(pk=self.reporting_to_id).values_list("chain_path", flat=True).get()
+        if self.pk is not None and f"/{self.pk}/" in parent_path:
+            raise ValidationError("A user cannot report to themselves or to one of their subordinates.")
+        return parent_path or f"/{self.reporting_to_id}/"
+
+    def _move_subtree(self, parent_path):
+        new_path = f"{parent_path}{self.pk}/"
+        old_path = User.objects.filter(pk=self.pk).values_list("chain_path", flat=True).get()
+        if old_path == new_path:
+            return
+        if old_path:
+            User.objects.filter(chain_path__startswith=old_path).update(
+                chain_path=Concat(Value(new_path), Substr("chain_path", len(old_path) + 1))
+            )
+        else:
+            User.objects.filter(pk=self.pk).update(chain_path=new_path)
+        self.chain_path = new_path
+
+    def superior_with_perm(self, *codenames):
+        """
+        Nearest user up the chain of command granted any of the codenames.
+        """
+        return User.objects.above(self).with_any_perm(*codenames).first()
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({', '.join([role.name for role in self.roles.all()])})" + (f" reporting to {self.reporting_to.first_name} {self.reporting_to.last_name}" if self.reporting_to else "")
@@ -32,4 +218,9 @@ class User(AbstractUser):
 class UserPref(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="preferences")
     key = models.CharField(max_length=255)
-    value = models.TextField()
\ No newline at end of file
+    value = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="userpref_user_key_unique"),
+        ]
@@ -1,5 +1,6 @@
+from django.db import transaction
 from django.db.models.signals import post_migrate
-from django.dispatch import receiver
+from django.dispatch import Signal, receiver
 from django.apps import apps
 
 DEFAULT_PERMS = {
@@ -46,9 +47,205 @@ def create_default_perms(**kwargs):
 def create_default_roles(**kwargs):
     from .models import Role, Permission
 
-    for role_name, perm_codes in DEFAULT_ROLES.items():
-        role, _ = Role.objects.get_or_create(name=role_name)
+    Role.objects.bulk_create([Role(name=role_name) for role_name in DEFAULT_ROLES], ignore_conflicts=True)
+    role_ids = dict(Role.objects.filter(name__in=DEFAULT_ROLES).values_list("name", "id"))
+    perm_ids = dict(Permission.objects.filter(codename__in=DEFAULT_PERMS).values_list("codename", "id"))
 
-        if perm_codes:
-            perms = Permission.objects.filter(codename__in=perm_codes)
-            role.permissions.set(perms)
\ No newline at end of file
+    # roles with default permissions are reset to exactly those; roles without any are left alone
+    managed_role_ids = [role_ids[role_name] for role_name, perm_codes in DEFAULT_ROLES.items() if perm_codes]
+    wanted = {
+        (role_ids[role_name], perm_ids[code])
+        for role_name, perm_codes in DEFAULT_ROLES.items()
+        for code in perm_codes
+        if code in perm_ids
+    }
+
+    grants = Role.permissions.through
+    current = set()
+    stale_ids = []
+    for row_id, role_id, perm_id in (
+            grants.objects.filter(role_id__in=managed_role_ids).values_list("id", "role_id", "permission_id")
+    ):
+        current.add((role_id, perm_id))
+        if (role_id, perm_id) not in wanted:
+            stale_ids.append(row_id)
+
+    grants.objects.filter(pk__in=stale_ids).delete()
+    grants.objects.bulk_create([grants(role_id=role_id, permission_id=perm_id) for role_id, perm_id in wanted - current])
+
+    if stale_ids or wanted - current:
+        invalidate_role_cache()
+        sync_perm_masks()
+
+
+def invalidate_role_cache(**kwargs):
+    from .cache import invalidate
+    invalidate()
+
+
+def invalidate_role_cache_on_m2m(action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_role_cache()
+
+
+def forget_roles_on_user_save(instance, created, **kwargs):
+    # primary keys can be reused after a delete, so a new user must not inherit a cached role set; the delete
+    # already dropped it in every worker, this one may have looked the id up since
+    if created:
+        from .cache import forget_user
+        forget_user(instance.pk)
+
+
+def evict_cached_token(instance, **kwargs):
+    from .authentication import evict_cached_tokens
+    # after the commit: a request authenticating before it would cache the token again. The key is the primary
+    # key, which the delete clears on the instance
+    keys = [instance.key]
+    transaction.on_commit(lambda: evict_cached_tokens(keys))
+
+
+def revoke_tokens_on_user_save(instance, created, **kwargs):
+    from rest_framework.authtoken.models import Token
+    from .authentication import evict_cached_user_tokens
+
+    if created:
+        return
+    if instance._password is not None:
+        # password changed: every issued token is revoked
+        Token.objects.filter(user=instance).delete()
+    else:
+        transaction.on_commit(lambda: evict_cached_user_tokens([instance.pk]))
+
+
+def evict_cached_tokens_on_role_change(action, instance, reverse, pk_set, **kwargs):
+    from .authentication import evict_cached_user_tokens
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    user_ids = list(pk_set or ()) if reverse else [instance.pk]
+    if user_ids:
+        transaction.on_commit(lambda: evict_cached_user_tokens(user_ids))
+
+
+def sync_perm_masks(user_ids=None):
+    """
+    Recompute User.perm_mask from the current roles of the given users (all users by default).
+    Returns the ids whose mask changed.
+    """
+    from .cache import role_perm_map
+    from .models import User, perm_mask
+
+    role_masks = {role_name: perm_mask(perms) for role_name, perms in role_perm_map().items()}
+    memberships = User.roles.through.objects.all()
+    users = User.objects.all()
+    if user_ids is not None:
+        memberships = memberships.filter(user_id__in=user_ids)
+        users = users.filter(pk__in=user_ids)
+
+    masks = {}
+    for user_id, role_name in memberships.values_list("user_id", "role__name"):
+        masks[user_id] = masks.get(user_id, 0) | role_masks.get(role_name, 0)
+
+    changed = {}
+    for user_id, current in users.values_list("pk", "perm_mask"):
+        mask = masks.get(user_id, 0)
+        if mask != current:
+            changed.setdefault(mask, []).append(user_id)
+
+    for mask, ids in changed.items():
+        User.objects.filter(pk__in=ids).update(perm_mask=mask)
+    return [user_id for ids in changed.values() for user_id in ids]
+
+
+def sync_perm_masks_on_m2m(sender, action, instance, reverse, pk_set, **kwargs):
+    from .authentication import evict_cached_user_tokens
+    from .models import User
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if sender is User.roles.through and not reverse:
+        user_ids = [instance.pk]
+    elif sender is User.roles.through and pk_set:
+        user_ids = pk_set
+    else:
+        # a role's permissions changed or a role was cleared of its users
+        user_ids = None
+
+    changed = sync_perm_masks(user_ids)
+    if changed:
+        # a request authenticating before the commit would cache the user with the old mask again
+        transaction.on_commit(lambda: evict_cached_user_tokens(changed))
+
+
+def sync_perm_masks_on_role_delete(**kwargs):
+    # deleting a role drops its memberships without an m2m_changed signal
+    sync_perm_masks()
+
+
+# sent by user_roles_changed() with user_ids, for receivers outside this app
+roles_bulk_changed = Signal()
+
+
+def user_roles_changed(user_ids=None):
+    """
+    Side effects of User.roles changes written without m2m signals, such as bulk writes to the through table.
+    None stands for all users.
+    """
+    from .authentication import evict_cached_user_tokens
+
+    invalidate_role_cache()
+    sync_perm_masks(user_ids)
+    transaction.on_commit(lambda: evict_cached_user_tokens(user_ids))
+    roles_bulk_changed.send(sender=user_roles_changed, user_ids=user_ids)
+
+
+def detach_subordinates(instance, **kwargs):
+    """
+    reporting_to is SET_NULL: the deleted user's direct reports become the top of their own chains.
+    """
+    from django.db.models import Value
+    from django.db.models.functions import Concat, Substr
+    from .models import User
+
+    if instance.chain_path:
+        User.objects.filter(chain_path__startswith=instance.chain_path).exclude(pk=instance.pk).update(
+            chain_path=Concat(Value("/"), Substr("chain_path", len(instance.chain_path) + 1))
+        )
+
+
+def rebuild_chain_paths(user_model=None, batch_size=1000):
+    """
+    Recompute every User.chain_path from reporting_to, for data written without User.save().
+    Users caught in a reporting cycle get an empty path.
+    """
+    if user_model is None:
+        from .models import User as user_model
+
+    parents, current_paths = {}, {}
+    for user_id, parent_id, chain_path in user_model.objects.values_list("pk", "reporting_to_id", "chain_path"):
+        parents[user_id] = parent_id
+        current_paths[user_id] = chain_path
+
+    paths = {}
+    for user_id in parents:
+        chain = []
+        node = user_id
+        while node is not None and node not in paths and node not in chain:
+            chain.append(node)
+            node = parents.get(node)
+        if node is None:
+            prefix = "/"
+        elif node in chain:
+            prefix = None
+        else:
+            prefix = paths[node] or None
+        for node in reversed(chain):
+            prefix = f"{prefix}{node}/" if prefix is not None else None
+            paths[node] = prefix or ""
+
+    changed = [
+        user_model(pk=user_id, chain_path=path)
+        for user_id, path in paths.items()
+        if path != current_paths[user_id]
+    ]
+    user_model.objects.bulk_update(changed, ["chain_path"], batch_size=batch_size)
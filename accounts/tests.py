@@ -1,8 +1,24 @@
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth import get_user_model
-from accounts.models import Role, Permission
+from accounts import cache
+from accounts.authentication import _cache_key
+from accounts.cache import invalidate
+from accounts.models import Role, Permission, UserPref, perm_mask
+from accounts.signals import rebuild_chain_paths, user_roles_changed
 
 User = get_user_model()
 
@@ -81,3 +97,310 @@ class AccountViewsTestCase(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["count"], 1)
+
+    def test_perm_snapshot_loaded_once(self):
+        user = User.objects.get(pk=self.admin_user.pk)
+        with self.assertNumQueries(2):  # role map and user roles, cold cache
+            invalidate()
+            snapshot = user.perm_snapshot
+            self.assertTrue(snapshot.has_role("admin"))
+            self.assertTrue(snapshot.has_perm("case_create"))
+        with self.assertNumQueries(0):
+            self.assertIs(user.perm_snapshot, snapshot)
+
+    def test_perm_snapshot_without_admin(self):
+        user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(user.perm_snapshot.has_perm("base"))
+        self.assertFalse(user.perm_snapshot.has_perm("case_create"))
+        self.assertFalse(user.perm_snapshot.is_admin)
+
+    def test_perm_snapshot_cached_across_requests(self):
+        User.objects.get(pk=self.user.pk).perm_snapshot
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(user.perm_snapshot.has_role("base"))
+
+    def test_perm_cache_invalidated_on_role_change(self):
+        self.assertFalse(User.objects.get(pk=self.user.pk).perm_snapshot.has_perm("case_create"))
+        self.user.roles.add(Role.objects.get(name="complainant"))
+        self.assertTrue(User.objects.get(pk=self.user.pk).perm_snapshot.has_perm("case_create"))
+
+        Role.objects.get(name="complainant").permissions.remove(Permission.objects.get(codename="case_create"))
+        self.assertFalse(User.objects.get(pk=self.user.pk).perm_snapshot.has_perm("case_create"))
+
+    def test_bulk_update_user_roles(self):
+        self.become("admin")
+        cadet = Role.objects.get(name="cadet")
+        url = reverse('user-roles-bulk')
+        response = self.client.patch(url, {str(self.user.pk): [cadet.pk, self.base_role.pk]}, format="json",
+                                     headers=self.client_headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {str(self.user.pk): sorted([cadet.pk, self.base_role.pk])})
+        self.assertEqual(set(self.user.roles.values_list("name", flat=True)), {"cadet", "base"})
+        self.assertTrue(User.objects.get(pk=self.user.pk).perm_snapshot.grants("case_approve"))
+
+        response = self.client.patch(url, {str(self.user.pk): [self.base_role.pk]}, format="json",
+                                     headers=self.client_headers)
+        self.assertEqual(set(self.user.roles.values_list("name", flat=True)), {"base"})
+        self.assertFalse(User.objects.get(pk=self.user.pk).perm_snapshot.grants("case_approve"))
+
+    def test_bulk_update_user_roles_unknown_ids(self):
+        self.become("admin")
+        url = reverse('user-roles-bulk')
+        response = self.client.patch(url, {"999999": [self.base_role.pk]}, format="json", headers=self.client_headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.patch(url, {str(self.user.pk): [999999]}, format="json", headers=self.client_headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(url, {str(self.user.pk): str(self.base_role.pk)}, format="json",
+                                     headers=self.client_headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_directory(self):
+        cadet = Role.objects.get(name="cadet")
+        for index in range(5):
+            user = User.objects.create_user(
+                username=f"cadet{index}", password="password", first_name="Cadet", last_name=f"No{index}",
+                national_id=f"555000000{index}", reporting_to=self.admin_user
+            )
+            user.roles.add(cadet, self.base_role)
+        self.become("admin")
+        url = reverse('user-directory')
+
+        response = self.client.get(url, {"role": "cadet", "page_size": 2}, headers=self.client_headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([u["username"] for u in response.data["results"]], ["cadet0", "cadet1"])
+
+        with self.assertNumQueries(2):  # users page and their roles, whatever the page size
+            response = self.client.get(url, {"reporting_to": self.admin_user.pk, "page_size": 5},
+                                       headers=self.client_headers)
+        self.assertEqual(len(response.data["results"]), 5)
+
+        response = self.client.get(url, {"name": "adm"}, headers=self.client_headers)
+        self.assertEqual([u["username"] for u in response.data["results"]], ["admin"])
+
+        response = self.client.get(url, {"reporting_to": "abc"}, headers=self.client_headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_preferences_upsert(self):
+        self.become("test")
+        url = reverse('preferences')
+        self.client.patch(url, [{"key": "theme", "value": "dark"}, {"key": "lang", "value": "fa"}], format="json",
+                          headers=self.client_headers)
+        response = self.client.patch(url, [{"key": "theme", "value": "light"}], format="json",
+                                     headers=self.client_headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(dict(UserPref.objects.filter(user=self.user).values_list("key", "value")),
+                         {"theme": "light", "lang": "fa"})
+
+    def test_preferences_etag(self):
+        self.become("test")
+        url = reverse('preferences')
+        self.client.patch(url, [{"key": "theme", "value": "dark"}], format="json", headers=self.client_headers)
+
+        response = self.client.get(url, headers=self.client_headers)
+        etag = response["ETag"]
+        response = self.client.get(url, headers={**self.client_headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(url, [{"key": "theme", "value": "light"}], format="json", headers=self.client_headers)
+        response = self.client.get(url, headers={**self.client_headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"key": "theme", "value": "light"}])
+
+
+class PermCacheTestCase(TransactionTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="password", national_id="user")
+
+    def test_rolled_back_change_is_not_cached(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.user.roles.add(Role.objects.get(name="admin"))
+            self.assertTrue(User.objects.get(pk=self.user.pk).perm_snapshot.has_role("admin"))
+            raise RuntimeError
+        self.assertFalse(User.objects.get(pk=self.user.pk).perm_snapshot.has_role("admin"))
+
+    def test_role_sets_are_bounded(self):
+        users = [User.objects.create_user(username=f"user{index}", password="password", national_id=f"user{index}")
+                 for index in range(3)]
+        with mock.patch.object(cache, "MAX_CACHED_USERS", 2):
+            for user in users:
+                cache.user_role_names(user.pk)
+            self.assertEqual(list(cache._state.user_roles), [users[1].pk, users[2].pk])
+
+    def test_snapshot_reads_the_version_once(self):
+        versions = caches["versions"]
+        with mock.patch.object(versions, "get", wraps=versions.get) as get:
+            User.objects.get(pk=self.user.pk).perm_snapshot
+        self.assertEqual(get.call_count, 1)
+
+
+class TokenAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test", password="password", national_id="1234567890", phone="1234567890"
+        )
+        self.user.roles.add(Role.objects.get(name="base"))
+        self.profile_url = reverse('profile')
+
+    def login(self):
+        tok = self.client.post(path='/auth/login/', data={"username": "test", "password": "password"})
+        return {"Authorization": "Token " + tok.data["key"]}
+
+    def test_token_lookup_cached(self):
+        headers = self.login()
+        self.client.get(self.profile_url, headers=headers)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.profile_url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([q for q in ctx.captured_queries if "authtoken_token" in q["sql"]])
+
+    def test_logout_revokes_cached_token(self):
+        headers = self.login()
+        self.client.get(self.profile_url, headers=headers)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/auth/logout/', headers=headers)
+
+        response = self.client.get(self.profile_url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_revokes_token(self):
+        headers = self.login()
+        self.client.get(self.profile_url, headers=headers)
+        self.user.set_password("new-password")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        response = self.client.get(self.profile_url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_outlives_reads_before_the_commit(self):
+        headers = self.login()
+        self.client.get(self.profile_url, headers=headers)
+        token = Token.objects.select_related("user").get(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+            # what a request authenticating on another connection caches before the commit: the old row
+            caches["default"].set(_cache_key(token.key), token)
+        response = self.client.get(self.profile_url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_role_permission_change_evicts_after_the_commit(self):
+        headers = self.login()
+        self.client.get(self.profile_url, headers=headers)
+        token = Token.objects.select_related("user").get(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Role.objects.get(name="base").permissions.add(Permission.objects.get(codename="case_approve"))
+            caches["default"].set(_cache_key(token.key), token)
+        self.assertIsNone(caches["default"].get(_cache_key(token.key)))
+
+    def test_bulk_role_change_evicts_after_the_commit(self):
+        headers = self.login()
+        self.client.get(self.profile_url, headers=headers)
+        token = Token.objects.select_related("user").get(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.roles.through.objects.filter(user=self.user).delete()
+            user_roles_changed([self.user.pk])
+            caches["default"].set(_cache_key(token.key), token)
+        self.assertIsNone(caches["default"].get(_cache_key(token.key)))
+
+    def test_expired_token_rejected_and_replaced(self):
+        headers = self.login()
+        Token.objects.filter(user=self.user).update(created=timezone.now() - settings.TOKEN_TTL)
+
+        response = self.client.get(self.profile_url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        new_headers = self.login()
+        self.assertNotEqual(headers, new_headers)
+        self.assertEqual(self.client.get(self.profile_url, headers=new_headers).status_code, status.HTTP_200_OK)
+
+    def test_purge_expired_tokens(self):
+        self.login()
+        Token.objects.filter(user=self.user).update(created=timezone.now() - settings.TOKEN_TTL)
+        call_command("purge_expired_tokens", batch_size=1, stdout=StringIO())
+        self.assertFalse(Token.objects.exists())
+
+
+class PermMaskTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="password", national_id="1234567890")
+
+    def test_mask_follows_roles(self):
+        self.user.roles.add(Role.objects.get(name="cadet"))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.perm_mask, perm_mask(["case_read", "case_approve", "case_edit"]))
+
+        self.user.roles.clear()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.perm_mask, 0)
+
+    def test_mask_follows_role_permissions(self):
+        cadet = Role.objects.get(name="cadet")
+        self.user.roles.add(cadet)
+        cadet.permissions.add(Permission.objects.get(codename="evidence_read"))
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(user.perm_snapshot.grants("evidence_read"))
+
+    def test_with_perm_filter(self):
+        self.user.roles.add(Role.objects.get(name="cadet"))
+        other = User.objects.create_user(username="other", password="password", national_id="0987654321")
+        other.roles.add(Role.objects.get(name="forensic"))
+
+        with self.assertNumQueries(1):
+            approvers = list(User.objects.with_any_perm("case_approve"))
+        self.assertEqual(approvers, [self.user])
+
+
+class ChainOfCommandTestCase(APITestCase):
+    def setUp(self):
+        self.chief = User.objects.create_user(username="chief", password="password", national_id="1")
+        self.captain = User.objects.create_user(username="captain", password="password", national_id="2",
+                                                reporting_to=self.chief)
+        self.officer = User.objects.create_user(username="officer", password="password", national_id="3",
+                                                reporting_to=self.captain)
+        self.cadet = User.objects.create_user(username="cadet", password="password", national_id="4",
+                                              reporting_to=self.officer)
+
+    def test_paths(self):
+        self.cadet.refresh_from_db()
+        self.assertEqual(self.cadet.chain_path, f"/{self.chief.pk}/{self.captain.pk}/{self.officer.pk}/{self.cadet.pk}/")
+        with self.assertNumQueries(1):
+            self.assertEqual(set(User.objects.under(self.captain)), {self.officer, self.cadet})
+        with self.assertNumQueries(1):
+            self.assertEqual(list(User.objects.above(self.cadet)), [self.officer, self.captain, self.chief])
+
+        # a user whose path is not computed yet has nobody under them, rather than everybody
+        self.captain.chain_path = ""
+        self.assertEqual(set(User.objects.under(self.captain)), set())
+
+    def test_move_subtree(self):
+        other = User.objects.create_user(username="other", password="password", national_id="5")
+        self.officer.reporting_to = other
+        self.officer.save()
+
+        self.cadet.refresh_from_db()
+        self.assertEqual(self.cadet.chain_path, f"/{other.pk}/{self.officer.pk}/{self.cadet.pk}/")
+        self.assertEqual(set(User.objects.under(self.captain)), set())
+
+    def test_cycle_rejected(self):
+        self.chief.reporting_to = self.cadet
+        with self.assertRaises(ValidationError):
+            self.chief.save()
+
+    def test_delete_detaches_subordinates(self):
+        self.captain.delete()
+        self.cadet.refresh_from_db()
+        self.assertEqual(self.cadet.chain_path, f"/{self.officer.pk}/{self.cadet.pk}/")
+
+    def test_rebuild_chain_paths(self):
+        User.objects.update(chain_path="")
+        rebuild_chain_paths()
+        self.cadet.refresh_from_db()
+        self.assertEqual(self.cadet.chain_path, f"/{self.chief.pk}/{self.captain.pk}/{self.officer.pk}/{self.cadet.pk}/")
@@ -5,6 +5,8 @@ urlpatterns = [
     path("register/", views.register, name="register"),
     path("profile/", views.profile, name="profile"),
     path("users/", views.user_list, name="user-list"),
+    path("users/directory/", views.UserDirectoryAPI.as_view(), name="user-directory"),
+    path("users/roles/", views.bulk_update_user_roles, name="user-roles-bulk"),
     path("users/<int:user_id>/roles/", views.update_user_roles, name="user-roles"),
     path("roles/", views.role_list, name="roles-list"),
     path("preferences/", views.user_preferences, name="preferences"),
@@ -1,14 +1,23 @@
+import hashlib
+import json
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
 from drf_spectacular.types import OpenApiTypes
-from rest_framework import status
+from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiResponse, OpenApiParameter
 from django.contrib.auth import get_user_model
 
 from .models import Role, UserPref
+from .signals import user_roles_changed
 from .serializers import RegisterSerializer, UserSerializer, RoleSerializer, UserPrefSerializer
+from common.pagination import KeysetPagination
 from common.permissions import has_perm_helper
+from detective.stats import summary
 
 User = get_user_model()
 
@@ -52,7 +61,57 @@ def user_list(request):
     Get a list of all users.
     Only accessible to users with 'admin' permission.
     """
-    return Response(UserSerializer(User.objects.all(), many=True).data)
+    return Response(UserSerializer(User.objects.prefetch_related("roles"), many=True).data)
+
+
+class UserDirectoryPagination(KeysetPagination):
+    ordering = "id"
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Browse the user directory (admin only)",
+        tags=["auth"],
+        parameters=[
+            OpenApiParameter("role", str, description="Only users holding this role name"),
+            OpenApiParameter("reporting_to", int, description="Only users reporting to this user ID"),
+            OpenApiParameter("name", str, description="Prefix of the first name, last name or username"),
+        ],
+    )
+)
+class UserDirectoryAPI(generics.ListAPIView):
+    """
+    Keyset-paginated user list. Roles are prefetched, so a page costs the same number of queries
+    regardless of its size.
+    """
+    serializer_class = UserSerializer
+    pagination_class = UserDirectoryPagination
+    permission_classes = [IsAuthenticated, has_perm_helper("admin")]
+
+    def get_queryset(self):
+        queryset = User.objects.prefetch_related("roles")
+        params = self.request.query_params
+
+        role = params.get("role")
+        if role:
+            queryset = queryset.filter(Exists(
+                User.roles.through.objects.filter(user_id=OuterRef("pk"), role__name=role)
+            ))
+
+        reporting_to = params.get("reporting_to")
+        if reporting_to:
+            try:
+                queryset = queryset.filter(reporting_to_id=int(reporting_to))
+            except ValueError:
+                raise ValidationError({"reporting_to": "Expected a user ID."})
+
+        name = params.get("name")
+        if name:
+            queryset = queryset.filter(
+                Q(first_name__istartswith=name) | Q(last_name__istartswith=name) | Q(username__istartswith=name)
+            )
+
+        return queryset
 
 
 @extend_schema(
@@ -72,8 +131,7 @@ def user_list(request):
 @api_view(["GET"])
 @permission_classes([has_perm_helper("base")])
 def num_employees(request):
-    count = User.objects.exclude(roles__name="base").count()
-    return Response({"count": count})
+    return Response({"count": summary()["users"]["employees"]})
 
 
 @extend_schema(
@@ -86,24 +144,32 @@ def num_employees(request):
 @permission_classes([IsAuthenticated])
 def user_preferences(request):
     """
-    GET: Return all preferences for the current user.
+    GET: Return all preferences for the current user, with an ETag; a matching If-None-Match gets a 304.
     PATCH: Update existing preferences or create new ones.
     """
     if request.method == "GET":
-        prefs = UserPref.objects.filter(user=request.user)
-        ser = UserPrefSerializer(prefs, many=True)
-        return Response(ser.data)
+        prefs = UserPref.objects.filter(user=request.user).order_by("key").values("key", "value")
+        data = UserPrefSerializer(prefs, many=True).data
+        etag = '"%s"' % hashlib.sha256(json.dumps(data).encode()).hexdigest()[:32]
+        if etag in request.headers.get("If-None-Match", ""):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return Response(data, headers={"ETag": etag})
 
     data = request.data
     if not isinstance(data, list):
         return Response({"detail": "Expected a list of preferences"}, status=400)
 
-    for item in data:
-        UserPref.objects.update_or_create(
-            user=request.user,
-            key=item.get("key"),
-            defaults={"value": item.get("value")}
-        )
+    ser = UserPrefSerializer(data=data, many=True)
+    ser.is_valid(raise_exception=True)
+
+    # one upsert for the whole list; a key repeated in the body keeps its last value
+    values = {item["key"]: item["value"] for item in ser.validated_data}
+    UserPref.objects.bulk_create(
+        [UserPref(user=request.user, key=key, value=value) for key, value in values.items()],
+        update_conflicts=True,
+        unique_fields=["user", "key"],
+        update_fields=["value"],
+    )
 
     return Response(status=status.HTTP_200_OK)
 
@@ -139,11 +205,88 @@ def update_user_roles(request, user_id):
     roles = Role.objects.filter(id__in=request.data)
 
     user.roles.set(roles)
-    user.save()
 
     return Response(UserSerializer(user).data, status=200)
 
 
+@extend_schema(
+    summary="Replace the roles of many users at once (admin only)",
+    tags=["auth"],
+    request={
+        "application/json": {
+            "type": "object",
+            "additionalProperties": {"type": "array", "items": {"type": "integer"}},
+            "description": "Map of user ID to the list of role IDs to assign to that user"
+        }
+    },
+    responses={
+        200: OpenApiResponse(
+            response={
+                "type": "object",
+                "additionalProperties": {"type": "array", "items": {"type": "integer"}},
+            },
+            description="Role IDs of every updated user",
+        ),
+        400: OpenApiResponse(description="Malformed body or unknown role IDs"),
+        404: OpenApiResponse(description="Unknown user IDs"),
+    },
+)
+@api_view(["PATCH"])
+@permission_classes([IsAuthenticated, has_perm_helper("admin")])
+def bulk_update_user_roles(request):
+    """
+    Replace the roles of every user in the body in one transaction.
+    Only the through-table rows that differ from the requested state are deleted or inserted.
+    """
+    if not isinstance(request.data, dict) or not request.data:
+        return Response({"detail": "Expected an object mapping user IDs to role ID lists"}, status=400)
+    # a string would be iterated character by character
+    if not all(isinstance(role_ids, list) for role_ids in request.data.values()):
+        return Response({"detail": "Expected an object mapping user IDs to role ID lists"}, status=400)
+    try:
+        assignments = {
+            int(user_id): {int(role_id) for role_id in role_ids}
+            for user_id, role_ids in request.data.items()
+        }
+    except (TypeError, ValueError):
+        return Response({"detail": "User and role IDs must be integers"}, status=400)
+
+    missing_users = assignments.keys() - set(User.objects.filter(pk__in=assignments).values_list("pk", flat=True))
+    if missing_users:
+        return Response({"detail": "Users not found", "user_ids": sorted(missing_users)}, status=404)
+
+    requested_roles = set().union(*assignments.values())
+    missing_roles = requested_roles - set(Role.objects.filter(pk__in=requested_roles).values_list("pk", flat=True))
+    if missing_roles:
+        return Response({"detail": "Roles not found", "role_ids": sorted(missing_roles)}, status=400)
+
+    membership = User.roles.through
+    with transaction.atomic():
+        current = set()
+        stale_ids = []
+        for row_id, user_id, role_id in (
+                membership.objects.filter(user_id__in=assignments).values_list("id", "user_id", "role_id")
+        ):
+            current.add((user_id, role_id))
+            if role_id not in assignments[user_id]:
+                stale_ids.append(row_id)
+
+        new_rows = [
+            membership(user_id=user_id, role_id=role_id)
+            for user_id, role_ids in assignments.items()
+            for role_id in role_ids
+            if (user_id, role_id) not in current
+        ]
+
+        membership.objects.filter(pk__in=stale_ids).delete()
+        # a concurrent request may have inserted the same rows since they were read
+        membership.objects.bulk_create(new_rows, ignore_conflicts=True)
+        if stale_ids or new_rows:
+            user_roles_changed(list(assignments))
+
+    return Response({str(user_id): sorted(role_ids) for user_id, role_ids in assignments.items()}, status=200)
+
+
 @extend_schema(
     summary="List all roles",
     responses={200: RoleSerializer(many=True)},
@@ -1,7 +1,32 @@
 from django.contrib import admin
 
 from cases.models import Case, WorkflowHistory
+from common.admin import LargeTableAdmin
 
-# Register your models here.
-admin.site.register(Case)
-admin.site.register(WorkflowHistory)
\ No newline at end of file
+
+@admin.register(Case)
+class CaseAdmin(LargeTableAdmin):
+    list_display = ("id", "title", "status", "level", "created_at", "creator")
+    list_select_related = ("created_by",)
+    list_filter = ("status", "level")
+    search_fields = ("title",)
+    raw_id_fields = ("created_by", "complainants")
+
+    @admin.display(description="Created by", ordering="created_by__username")
+    def creator(self, obj):
+        return obj.created_by.username
+
+
+@admin.register(WorkflowHistory)
+class WorkflowHistoryAdmin(LargeTableAdmin):
+    list_display = ("id", "case_title", "recipient_name", "message", "timestamp")
+    list_select_related = ("case", "recipient")
+    raw_id_fields = ("case", "recipient")
+
+    @admin.display(description="Case", ordering="case__title")
+    def case_title(self, obj):
+        return obj.case.title
+
+    @admin.display(description="Recipient", ordering="recipient__username")
+    def recipient_name(self, obj):
+        return obj.recipient.username if obj.recipient else "-"
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0006_default_ordering'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='case_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['level', 'status'], name='case_level_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workflowhistory',
+            index=models.Index(fields=['case', '-id'], name='workflow_case_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workflowhistory',
+            index=models.Index(fields=['recipient', 'case'], name='workflow_recipient_case_idx'),
+        ),
+        # drop the single-column foreign key indexes only once the composite indexes leading with them exist
+        migrations.AlterField(
+            model_name='workflowhistory',
+            name='case',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='workflow_history', to='cases.case'),
+        ),
+        migrations.AlterField(
+            model_name='workflowhistory',
+            name='recipient',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
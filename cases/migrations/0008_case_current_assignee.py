@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_workflow_pointers(apps, schema_editor):
+    Case = apps.get_model('cases', 'Case')
+    WorkflowHistory = apps.get_model('cases', 'WorkflowHistory')
+
+    latest = WorkflowHistory.objects.filter(case=OuterRef('pk')).order_by('-id')
+    Case.objects.update(
+        last_workflow=Subquery(latest.values('pk')[:1]),
+        current_assignee=Subquery(latest.values('recipient')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0007_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='case',
+            name='current_assignee',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_cases', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='case',
+            name='last_workflow',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='cases.workflowhistory'),
+        ),
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['current_assignee', '-created_at', '-id'], name='case_assignee_created_idx'),
+        ),
+        migrations.RunPython(backfill_workflow_pointers, migrations.RunPython.noop),
+    ]
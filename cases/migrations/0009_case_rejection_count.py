@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:59
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_rejection_counts(apps, schema_editor):
+    Case = apps.get_model('cases', 'Case')
+    WorkflowHistory = apps.get_model('cases', 'WorkflowHistory')
+
+    rejections = (
+        WorkflowHistory.objects
+        .filter(case=OuterRef('pk'), recipient=OuterRef('created_by'))
+        .order_by()
+        .values('case')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Case.objects.filter(
+        pk__in=WorkflowHistory.objects.filter(recipient=F('case__created_by')).values('case')
+    ).update(rejection_count=Coalesce(Subquery(rejections), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0008_case_current_assignee'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='case',
+            name='rejection_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_rejection_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:20
+
+from django.db import migrations
+from django.db.models import Count
+
+# cases.models.ASSIGNED_STATUSES as of this migration
+ASSIGNED_STATUSES = ['created', 'pending_approval', 'pending_verification']
+
+
+def backfill_workloads(apps, schema_editor):
+    # cases.models.rebuild_workloads as of this migration; workload was just added as 0, so only counts are set
+    User = apps.get_model('accounts', 'User')
+    Case = apps.get_model('cases', 'Case')
+
+    counts = dict(
+        Case.objects
+        .filter(current_assignee__isnull=False, status__in=ASSIGNED_STATUSES)
+        .order_by()
+        .values('current_assignee')
+        .annotate(total=Count('pk'))
+        .values_list('current_assignee', 'total')
+    )
+    by_total = {}
+    for user_id, total in counts.items():
+        by_total.setdefault(total, []).append(user_id)
+    for total, user_ids in by_total.items():
+        User.objects.filter(pk__in=user_ids).update(workload=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_user_workload'),
+        ('cases', '0009_case_rejection_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_workloads, migrations.RunPython.noop),
+    ]
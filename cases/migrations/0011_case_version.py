@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0010_backfill_user_workload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='case',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
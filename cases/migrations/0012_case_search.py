@@ -0,0 +1,59 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:40
+
+from django.db import migrations
+
+# the index common.search reads, per database vendor; other vendors get none
+INSTALL = {
+    'postgresql': [
+        "ALTER TABLE cases_case ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED",
+        "CREATE INDEX cases_case_search_idx ON cases_case USING gin (search_vector)",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE cases_case_fts USING fts5(title, description, content='cases_case', "
+        "content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS cases_case_fts_insert AFTER INSERT ON cases_case BEGIN "
+        "INSERT INTO cases_case_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS cases_case_fts_delete AFTER DELETE ON cases_case BEGIN "
+        "INSERT INTO cases_case_fts(cases_case_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS cases_case_fts_update AFTER UPDATE OF title, description ON cases_case BEGIN "
+        "INSERT INTO cases_case_fts(cases_case_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO cases_case_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        "INSERT INTO cases_case_fts(cases_case_fts) VALUES ('rebuild')",
+    ],
+}
+UNINSTALL = {
+    'postgresql': [
+        "ALTER TABLE cases_case DROP COLUMN search_vector",
+    ],
+    'sqlite': [
+        "DROP TRIGGER IF EXISTS cases_case_fts_insert",
+        "DROP TRIGGER IF EXISTS cases_case_fts_delete",
+        "DROP TRIGGER IF EXISTS cases_case_fts_update",
+        "DROP TABLE cases_case_fts",
+    ],
+}
+
+
+def install_search(apps, schema_editor):
+    for statement in INSTALL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def uninstall_search(apps, schema_editor):
+    for statement in UNINSTALL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0011_case_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-17 21:16
+
+import common.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0012_case_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseSearchIndex',
+            fields=[
+                ('case', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='cases.case')),
+                ('document', common.search.SearchDocumentField(db_column='cases_case_fts')),
+            ],
+            options={
+                'db_table': 'cases_case_fts',
+                'managed': False,
+            },
+        ),
+    ]
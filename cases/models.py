@@ -1,9 +1,12 @@
-import random
+from collections import Counter
 
 from django.db import models, transaction
-from django.db.models import Q
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
 
 from accounts.models import User
+from common.search import SearchDocumentField
+from .signals import case_moved
 
 
 class CrimeLevel(models.IntegerChoices):
@@ -22,14 +25,93 @@ class CaseStatus(models.TextChoices):
     CREATED = "created", "Created"
 
 
+# statuses in which a case waits on its current assignee, counted in User.workload
+ASSIGNED_STATUSES = (CaseStatus.CREATED, CaseStatus.PENDING_APPROVAL, CaseStatus.PENDING_VERIFICATION)
+
+
+def adjust_workloads(changes):
+    """
+    Apply a {user id: delta} mapping to User.workload in one UPDATE.
+    """
+    changes = {user_id: delta for user_id, delta in changes.items() if delta}
+    if not changes:
+        return
+    delta = models.Case(
+        *[models.When(pk=user_id, then=Value(delta)) for user_id, delta in changes.items()],
+        default=Value(0),
+    )
+    User.objects.filter(pk__in=changes).update(workload=Greatest(F("workload") + delta, Value(0)))
+
+
+def rebuild_workloads(user_model=None, case_model=None):
+    """
+    Recompute every User.workload from the cases assigned to them.
+    """
+    if user_model is None:
+        user_model, case_model = User, Case
+
+    counts = dict(
+        case_model.objects
+        .filter(current_assignee__isnull=False, status__in=ASSIGNED_STATUSES)
+        .order_by()
+        .values("current_assignee")
+        .annotate(total=Count("pk"))
+        .values_list("current_assignee", "total")
+    )
+    user_model.objects.exclude(pk__in=counts).exclude(workload=0).update(workload=0)
+    by_total = {}
+    for user_id, total in counts.items():
+        by_total.setdefault(total, []).append(user_id)
+    for total, user_ids in by_total.items():
+        user_model.objects.filter(pk__in=user_ids).update(workload=total)
+
+
+def case_visibility(user, case="pk"):
+    """
+    Filter for the cases user may see, or None when they may see every case.
+
+    case is the lookup of the case from the filtered model: "pk" on Case itself, the foreign key name on
+    models that belong to a case. Users see cases they created, cases created anywhere below them in the chain
+    of command, cases they complained in and cases currently assigned to them; a case that has moved on to
+    someone else is no longer visible to its earlier assignees. The ids come from a UNION of three indexed
+    lookups, so the cost follows the number of visible cases rather than the size of the table, and the outer
+    query needs no DISTINCT.
+    """
+    if user.is_superuser or user.perm_snapshot.grants("case_read"):
+        return None
+
+    created = Case.objects.filter(created_by__in=User.objects.subtree(user).values("pk"))
+    visible_ids = created.order_by().values("pk").union(
+        Case.complainants.through.objects.filter(user_id=user.pk).values("case_id"),
+        Case.objects.filter(current_assignee_id=user.pk).order_by().values("pk"),
+    )
+    return Q(**{case + "__in": visible_ids})
+
+
+def case_verifier(user):
+    """
+    The superior who verifies cases submitted by user.
+    """
+    # skip superiors who cannot verify cases, e.g. a sergeant above a detective
+    return user.superior_with_perm("case_verify") or user.reporting_to
+
+
+class StaleCase(Exception):
+    """
+    The case was changed by someone else since it was read.
+    """
+
+
 class CaseQuerySet(models.QuerySet):
     def visible_to(self, user):
-        if user.is_superuser or user.roles.filter(permissions__codename="case_read").exists():
-            return self.all()
+        visibility = case_visibility(user)
+        return self.all() if visibility is None else self.filter(visibility)
 
-        return self.filter(
-            Q(created_by=user)
-        ).distinct()
+    def in_unit(self, user):
+        """
+        Cases created by the user or anyone below them in the chain of command.
+        """
+        return self.filter(created_by__in=User.objects.subtree(user).values("pk"))
 
 
 class Case(models.Model):
@@ -43,63 +125,186 @@ class Case(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="created_cases")
     status = models.CharField(max_length=50, choices=CaseStatus.choices, default=CaseStatus.CREATED)
     complainants = models.ManyToManyField(User, related_name="complaints")
+    # kept in step with the newest WorkflowHistory entry by the workflow transitions below
+    current_assignee = models.ForeignKey(User, null=True, blank=True, editable=False, on_delete=models.SET_NULL,
+                                         related_name="assigned_cases", db_index=False)
+    last_workflow = models.ForeignKey("WorkflowHistory", null=True, blank=True, editable=False,
+                                      on_delete=models.SET_NULL, related_name="+")
+    # times the case was routed back to its creator
+    rejection_count = models.PositiveIntegerField(default=0, editable=False)
+    # bumped by every workflow transition, which only applies to the version it read
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    # columns owned by the workflow transitions; a plain save() of a loaded instance must not overwrite them
+    maintained_fields = ("status", "current_assignee", "last_workflow", "rejection_count", "version")
+    # indexed for common.search, most important first
+    search_fields = ("title", "description")
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="case_created_idx"),
+            models.Index(fields=["status", "-created_at", "-id"], name="case_status_created_idx"),
+            models.Index(fields=["level", "status"], name="case_level_status_idx"),
+            models.Index(fields=["current_assignee", "-created_at", "-id"], name="case_assignee_created_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
-    def get_case_approver(self):
-        history = self.workflow_history.filter(recipient__roles__name="cadet").first()
-        if history:
-            return history.recipient
-        else:
-            cadet_users = User.objects.filter(roles__name="cadet")
-            if not cadet_users.exists():
-                raise RuntimeError("No cadet user exists to handle case")
-            return random.choice(cadet_users)
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get("status")
+        instance._loaded_level = instance.__dict__.get("level")
+        return instance
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # the status would go unwritten; it moves through save_transition(), which checks the version
+            loaded_status = getattr(self, "_loaded_status", None)
+            if loaded_status is not None and self.status != loaded_status:
+                raise ValueError("The status of a saved case changes through its workflow transitions.")
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.maintained_fields
+            ]
+        super().save(*args, **kwargs)
+        # post_save receivers compare against the values as loaded; from here on the saved ones are current
+        self._loaded_status, self._loaded_level = self.status, self.level
+
+    def save_transition(self, expected_status, update_fields):
+        """
+        Write update_fields only if the row still has expected_status and the version this instance read,
+        bumping the version. Raises StaleCase otherwise, without waiting on or overwriting the other change.
+        """
+        values = {}
+        for name in update_fields:
+            field = self._meta.get_field(name)
+            values[field.attname] = getattr(self, field.attname)
+        updated = Case.objects.filter(pk=self.pk, status=expected_status, version=self.version).update(
+            version=F("version") + 1, **values
+        )
+        if not updated:
+            raise StaleCase(self.pk)
+        self.version += 1
+        self._loaded_status = self.status
+        case_moved.send(sender=Case, moves=Counter({(expected_status, self.status, self.level): 1}))
+
+    def get_case_approver(self, pending=None):
+        """
+        The cadet who reviewed the case before, otherwise the active cadet with the least pending work.
+        pending is passed on to User.objects.least_loaded and counts the pick.
+        """
+        if self.last_workflow_id is not None:
+            history = (
+                self.workflow_history.filter(recipient__roles__name="cadet")
+                .select_related("recipient")
+                .order_by("id")
+                .first()
+            )
+            if history:
+                return history.recipient
+        cadet = User.objects.least_loaded("cadet", pending)
+        if cadet is None:
+            raise RuntimeError("No cadet user exists to handle case")
+        if pending is not None:
+            pending[cadet.pk] = pending.get(cadet.pk, 0) + 1
+        return cadet
+
+    def route_to(self, recipient, status, message=None):
+        """
+        Move the case to status and hand it to recipient, recording the step in its workflow history.
+        """
+        with transaction.atomic():
+            expected_status = self.status
+            history = WorkflowHistory.objects.create(case=self, recipient=recipient, message=message)
+            workload = Counter()
+            self.save_transition(expected_status, self.take_step(status, history, workload))
+            adjust_workloads(workload)
+
+    def take_step(self, status, history=None, workload=None):
+        """
+        Set the fields that change when the case moves to status, handed over through history if given.
+        Returns their names, for save(update_fields=...) or bulk_update(). The workload changes of the old and
+        new assignee are added to the workload Counter, for adjust_workloads().
+        """
+        waiting_on = self.current_assignee_id if self.status in ASSIGNED_STATUSES else None
+        self.status = status
+        update_fields = ["status"]
+        if history is not None:
+            self.current_assignee = history.recipient
+            self.last_workflow = history
+            update_fields += ["current_assignee", "last_workflow"]
+            if history.recipient_id is not None and history.recipient_id == self.created_by_id:
+                self.rejection_count += 1
+                update_fields.append("rejection_count")
+
+        now_waiting_on = self.current_assignee_id if self.status in ASSIGNED_STATUSES else None
+        if workload is not None and waiting_on != now_waiting_on:
+            if waiting_on is not None:
+                workload[waiting_on] -= 1
+            if now_waiting_on is not None:
+                workload[now_waiting_on] += 1
+        return update_fields
 
     def send_to_cadet(self):
         with transaction.atomic():
-            cadet = self.get_case_approver()
-            self.status = CaseStatus.PENDING_APPROVAL
-            self.save()
-            WorkflowHistory.objects.create(case=self, recipient=cadet)
+            self.route_to(self.get_case_approver(), CaseStatus.PENDING_APPROVAL)
 
     def send_to_officer(self, request_user):
-        with transaction.atomic():
-            boss = request_user.reporting_to
-            self.status = CaseStatus.PENDING_VERIFICATION
-            self.save()
-            WorkflowHistory.objects.create(case=self, recipient=boss)
+        self.route_to(case_verifier(request_user), CaseStatus.PENDING_VERIFICATION)
 
     def reject_case_to_cadet(self, error_message):
         with transaction.atomic():
-            cadet = self.get_case_approver()
-            self.status = CaseStatus.PENDING_APPROVAL
-            self.save()
-            WorkflowHistory.objects.create(case=self, recipient=cadet, message=error_message)
+            self.route_to(self.get_case_approver(), CaseStatus.PENDING_APPROVAL, error_message)
 
     def reject_case_to_creator(self, error_message):
+        self.route_to(self.created_by, CaseStatus.CREATED, error_message)
+
+    def move_to(self, status):
+        """
+        Move the case to status without handing it to anyone.
+        """
         with transaction.atomic():
-            self.status = CaseStatus.CREATED
-            self.save()
-            WorkflowHistory.objects.create(case=self, recipient=self.created_by, message=error_message)
+            expected_status = self.status
+            workload = Counter()
+            self.save_transition(expected_status, self.take_step(status, workload=workload))
+            adjust_workloads(workload)
 
     def open_case(self):
-        self.status = CaseStatus.OPEN
-        self.save()
+        self.move_to(CaseStatus.OPEN)
 
     def cancel_case(self):
-        with transaction.atomic():
-            self.status = CaseStatus.CANCELLED
-            self.save()
-            WorkflowHistory.objects.create(case=self, recipient=self.created_by)
+        self.route_to(self.created_by, CaseStatus.CANCELLED)
+
+
+class CaseSearchIndex(models.Model):
+    # the SQLite full-text index of cases, created by migration 0012 and joined by common.search
+    case = models.OneToOneField(
+        Case, on_delete=models.DO_NOTHING, primary_key=True, db_column="rowid", related_name="search_index"
+    )
+    document = SearchDocumentField(db_column="cases_case_fts")
+
+    class Meta:
+        managed = False
+        db_table = "cases_case_fts"
 
 
 class WorkflowHistory(models.Model):
-    case = models.ForeignKey(Case, on_delete=models.CASCADE, related_name="workflow_history")
-    recipient = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
+    # both foreign keys are covered by the composite indexes below
+    case = models.ForeignKey(Case, on_delete=models.CASCADE, related_name="workflow_history", db_index=False)
+    recipient = models.ForeignKey(User, null=True, on_delete=models.SET_NULL, db_index=False)
     message = models.CharField(max_length=255, blank=True, null=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # latest entry per case
+            models.Index(fields=["case", "-id"], name="workflow_case_latest_idx"),
+            # cases routed to a user, answered from the index alone
+            models.Index(fields=["recipient", "case"], name="workflow_recipient_case_idx"),
+        ]
+
     def __str__(self):
         return f"{self.case.title} - {self.recipient} - {self.message}"
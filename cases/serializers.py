@@ -1,7 +1,7 @@
 from rest_framework import serializers
 
 from evidences.serializers import EvidenceSerializer
-from suspects.models import Suspect
+from suspects.models import MostWanted, MostWantedPerson
 from .models import Case
 from accounts.serializers import UserSerializer
 
@@ -13,21 +13,42 @@ class CaseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Case
         fields = ["id", "title", "level", "status", "created_at", "created_by", "description", "evidences", "complainants"]
+        # moved only by the workflow endpoints
+        read_only_fields = ["status"]
 
 
 class MostWantedSerializer(serializers.ModelSerializer):
-    reward_price = serializers.SerializerMethodField()
+    id = serializers.IntegerField(source="suspect_id")
+    first_name = serializers.CharField(source="suspect.first_name")
+    last_name = serializers.CharField(source="suspect.last_name")
+    image = serializers.ImageField(source="suspect.image")
 
     class Meta:
-        model = Suspect
+        model = MostWanted
         fields = ["id", "first_name", "last_name", "image", "reward_price"]
 
-    def get_reward_price(self, obj):
-        if not obj.max_duration:
-            return 0
-        days = obj.max_duration.days
-        return days * obj.max_level * 20_000_000
+class MostWantedPersonSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="person_id")
+    national_id = serializers.CharField(source="person.national_id")
+    first_name = serializers.CharField(source="person.first_name")
+    last_name = serializers.CharField(source="person.last_name")
+
+    class Meta:
+        model = MostWantedPerson
+        fields = ["id", "national_id", "first_name", "last_name", "reward_price"]
 
 class UserWorkflowCaseSerializer(serializers.Serializer):
     case_id = serializers.IntegerField()
-    message = serializers.CharField(allow_null=True, required=False)
\ No newline at end of file
+    message = serializers.CharField(allow_null=True, required=False)
+
+
+class BulkWorkflowSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=500)
+    verdict = serializers.ChoiceField(choices=["pass", "fail"], required=False)
+    message = serializers.CharField(max_length=255, required=False, allow_null=True)
+
+
+class BulkWorkflowResultSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    code = serializers.IntegerField()
+    detail = serializers.JSONField(allow_null=True)
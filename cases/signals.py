@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# sent by workflow transitions, which write with queryset updates instead of save(); moves is a Counter of
+# (old status, new status, level) triples
+case_moved = Signal()
@@ -1,7 +1,18 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.db.models import QuerySet
 from django.test import TestCase
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from accounts.models import User, Role
-from .models import Case, WorkflowHistory
+from suspects import ranking
+from suspects.models import MostWanted, MostWantedPerson, Suspect
+from . import workflow
+from .models import Case, CaseStatus, WorkflowHistory
+from .serializers import CaseSerializer
 
 
 class CaseWorkflowTest(TestCase):
@@ -38,7 +49,7 @@ class CaseWorkflowTest(TestCase):
     def test_send_case_to_cadet(self):
         """Test sending a case to a cadet for approval"""
         self.become("complainant")
-        url = f'/cases/{self.case.id}/workflow'
+        url = f'/cases/{self.case.id}/workflow/'
         response = self.client.post(url, data={}, headers=self.client_headers)
 
         self.case.refresh_from_db()
@@ -51,7 +62,7 @@ class CaseWorkflowTest(TestCase):
         """Test sending the case from cadet to officer for approval"""
         self.case.send_to_cadet()
 
-        url = f'/cases/{self.case.id}/workflow'
+        url = f'/cases/{self.case.id}/workflow/'
         self.become("cadet")
         response = self.client.post(url, data={"verdict": "pass"}, headers=self.client_headers)
 
@@ -66,7 +77,7 @@ class CaseWorkflowTest(TestCase):
         self.case.send_to_cadet()
 
         error_message = "Missing important info"
-        url = f'/cases/{self.case.id}/workflow'
+        url = f'/cases/{self.case.id}/workflow/'
         self.become("cadet")
         response = self.client.post(url, data={"verdict": "fail", "message": error_message},
                                      headers=self.client_headers)
@@ -78,11 +89,28 @@ class CaseWorkflowTest(TestCase):
         self.assertIsNotNone(workflow_history)
         self.assertEqual(workflow_history.message, error_message)
 
+    def test_workflow_inbox_follows_current_assignee(self):
+        self.case.send_to_cadet()
+        self.assertEqual(self.case.current_assignee, self.cadet)
+
+        self.become("cadet")
+        response = self.client.get('/cases/my_workflow', headers=self.client_headers)
+        self.assertEqual(response.data, [{"case_id": self.case.id, "message": None}])
+
+        self.client.post(f'/cases/{self.case.id}/workflow/', data={"verdict": "fail", "message": "Missing info"},
+                         headers=self.client_headers)
+        response = self.client.get('/cases/my_workflow', headers=self.client_headers)
+        self.assertEqual(response.data, [])
+
+        self.become("complainant")
+        response = self.client.get('/cases/my_workflow', headers=self.client_headers)
+        self.assertEqual(response.data, [{"case_id": self.case.id, "message": "Missing info"}])
+
     def test_open_case(self):
         self.case.send_to_cadet()
         self.case.send_to_officer(self.cadet)
 
-        url = f'/cases/{self.case.id}/workflow'
+        url = f'/cases/{self.case.id}/workflow/'
         self.become("officer")
         response = self.client.post(url, data={"verdict": "pass"}, headers=self.client_headers)
 
@@ -94,7 +122,7 @@ class CaseWorkflowTest(TestCase):
         self.case.send_to_cadet()
         self.case.send_to_officer(self.cadet)
 
-        url = f'/cases/{self.case.id}/workflow'
+        url = f'/cases/{self.case.id}/workflow/'
         error_message = "Needs more details"
         self.become("officer")
         response = self.client.post(url, data={"verdict": "fail", "message": error_message},
@@ -115,7 +143,7 @@ class CaseWorkflowTest(TestCase):
         self.case.reject_case_to_creator("Rejected due to incorrect details")
         self.case.send_to_cadet()
 
-        url = f'/cases/{self.case.id}/workflow'
+        url = f'/cases/{self.case.id}/workflow/'
         self.become("cadet")
         response = self.client.post(url, data={"verdict": "fail", "message": "Needs more details"},
                                      headers=self.client_headers)
@@ -147,7 +175,7 @@ class CaseWorkflowByPoliceTest(TestCase):
     def become(self, username):
         self.client.logout()
         self.client.login(username=username, password='password')
-        tok = self.client.post(path='/auth/login', data={"username": username, "password": "password"})
+        tok = self.client.post(path='/auth/login/', data={"username": username, "password": "password"})
         self.client_headers = {"Authorization": "Token " + tok.data["key"]}
 
     def test_create_case_by_officer(self):
@@ -156,7 +184,7 @@ class CaseWorkflowByPoliceTest(TestCase):
         )
 
         self.become("officer")
-        url = f'/cases/{case.id}/workflow'
+        url = f'/cases/{case.id}/workflow/'
         response = self.client.post(url, data={}, headers=self.client_headers)
 
         case.refresh_from_db()
@@ -173,7 +201,7 @@ class CaseWorkflowByPoliceTest(TestCase):
         case.refresh_from_db()
         self.become("chief")
 
-        url = f'/cases/{case.id}/workflow'
+        url = f'/cases/{case.id}/workflow/'
         response = self.client.post(url, data={"verdict": "pass"}, headers=self.client_headers)
 
         case.refresh_from_db()
@@ -189,7 +217,7 @@ class CaseWorkflowByPoliceTest(TestCase):
         self.become("chief")
 
         error_message = "Not enough data"
-        url = f'/cases/{case.id}/workflow'
+        url = f'/cases/{case.id}/workflow/'
         response = self.client.post(url, data={"verdict": "fail", "message": error_message},
                                      headers=self.client_headers)
 
@@ -206,7 +234,7 @@ class CaseWorkflowByPoliceTest(TestCase):
         )
 
         self.become("chief")
-        url = f'/cases/{case.id}/workflow'
+        url = f'/cases/{case.id}/workflow/'
         response = self.client.post(url, data={}, headers=self.client_headers)
 
         case.refresh_from_db()
@@ -214,3 +242,429 @@ class CaseWorkflowByPoliceTest(TestCase):
 
         workflow_history = WorkflowHistory.objects.count()
         self.assertEqual(workflow_history, 0)
+
+
+class CaseAdminTest(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='root', password='password', national_id="root")
+        self.complainant = User.objects.create_user(username='complainant', password='password',
+                                                    national_id="complainant")
+        self.complainant.roles.add(Role.objects.get(name="complainant"))
+        self.client.force_login(self.admin)
+
+    def add_cases(self, count):
+        for index in range(count):
+            case = Case.objects.create(title=f"Case {index}", description="-", created_by=self.complainant)
+            WorkflowHistory.objects.create(case=case, recipient=self.complainant)
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(ctx)
+
+    def test_changelist_query_count_is_constant(self):
+        for url in ('/admin/cases/case/', '/admin/cases/workflowhistory/'):
+            self.add_cases(2)
+            few = self.changelist_queries(url)
+            self.add_cases(10)
+            self.assertEqual(self.changelist_queries(url), few)
+
+
+class CaseListQueriesTest(TestCase):
+
+    def setUp(self):
+        self.officer = User.objects.create_user(username='officer', password='password', national_id="officer")
+        self.officer.roles.add(Role.objects.get(name="police_officer"), Role.objects.get(name="base"))
+        self.client = APIClient()
+        tok = self.client.post(path='/auth/login/', data={"username": "officer", "password": "password"})
+        self.client_headers = {"Authorization": "Token " + tok.data["key"]}
+
+    def add_cases(self, count):
+        for index in range(count):
+            complainant = User.objects.create_user(username=f'complainant{Case.objects.count()}',
+                                                   password='password', national_id=f"c{Case.objects.count()}")
+            complainant.roles.add(Role.objects.get(name="complainant"))
+            case = Case.objects.create(title=f"Case {index}", description="-", created_by=complainant)
+            case.complainants.add(complainant, self.officer)
+
+    def list_queries(self):
+        self.client.get('/cases/', headers=self.client_headers)  # warm the role cache
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/cases/', headers=self.client_headers)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+
+    def test_list_query_count_is_constant(self):
+        self.add_cases(1)
+        one = self.list_queries()
+        self.add_cases(5)
+        self.assertEqual(self.list_queries(), one)
+
+    def test_list_is_cursor_paginated(self):
+        self.add_cases(12)
+        seen = []
+        url = '/cases/?page_size=5'
+        with CaptureQueriesContext(connection) as ctx:
+            while url:
+                response = self.client.get(url, headers=self.client_headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn("count", response.data)
+                seen += [case["id"] for case in response.data["results"]]
+                url = response.data["next"]
+        self.assertFalse(any("COUNT(" in query["sql"] for query in ctx.captured_queries))
+        self.assertEqual(seen, list(Case.objects.order_by("-created_at", "-id").values_list("id", flat=True)))
+
+    def test_pages_walk_tied_created_at(self):
+        self.add_cases(7)
+        Case.objects.update(created_at=timezone.now())
+        expected = list(Case.objects.order_by("-id").values_list("id", flat=True))
+
+        seen, url = [], '/cases/?page_size=2'
+        while url:
+            response = self.client.get(url, headers=self.client_headers)
+            seen += [case["id"] for case in response.data["results"]]
+            last_page, url = response.data, response.data["next"]
+        self.assertEqual(seen, expected)
+
+        response = self.client.get(last_page["previous"], headers=self.client_headers)
+        self.assertEqual([case["id"] for case in response.data["results"]], expected[4:6])
+
+
+class CaseVisibilityTest(TestCase):
+
+    def make_user(self, username, role_name, reporting_to=None):
+        user = User.objects.create_user(username=username, password='password', national_id=username,
+                                        reporting_to=reporting_to)
+        user.roles.add(Role.objects.get(name=role_name))
+        return User.objects.get(pk=user.pk)
+
+    def setUp(self):
+        self.sergeant = self.make_user('sergeant', 'sergeant')
+        self.detective = self.make_user('detective', 'detective', reporting_to=self.sergeant)
+        self.complainant = self.make_user('complainant', 'complainant')
+        self.witness = self.make_user('witness', 'witness')
+        self.captain = self.make_user('captain', 'captain')
+
+        self.own = Case.objects.create(title="Own", description="-", created_by=self.complainant)
+        self.own.complainants.add(self.complainant)
+        self.subordinate = Case.objects.create(title="Subordinate", description="-", created_by=self.detective)
+        self.joined = Case.objects.create(title="Joined", description="-", created_by=self.captain)
+        self.joined.complainants.add(self.complainant, self.witness)
+        self.routed = Case.objects.create(title="Routed", description="-", created_by=self.captain)
+        self.routed.route_to(self.witness, CaseStatus.PENDING_APPROVAL)
+        # visible to the witness as complainant and as assignee
+        self.joined.route_to(self.witness, CaseStatus.PENDING_APPROVAL)
+
+    def visible(self, user):
+        return list(Case.objects.visible_to(user).values_list("title", flat=True))
+
+    def test_creator_and_complainant(self):
+        self.assertEqual(self.visible(self.complainant), ["Joined", "Own"])
+
+    def test_chain_of_command(self):
+        self.assertEqual(self.visible(self.sergeant), ["Subordinate"])
+        self.assertEqual(self.visible(self.detective), ["Subordinate"])
+
+    def test_assignee_without_duplicates(self):
+        self.assertEqual(self.visible(self.witness), ["Routed", "Joined"])
+
+    def test_earlier_assignee(self):
+        self.routed.route_to(self.captain, CaseStatus.PENDING_VERIFICATION)
+        self.assertEqual(self.visible(self.witness), ["Joined"])
+
+    def test_case_read_sees_everything(self):
+        self.assertEqual(len(self.visible(self.captain)), 4)
+
+
+class WorkflowEngineTest(TestCase):
+
+    def setUp(self):
+        self.complainant = User.objects.create_user(username='complainant', password='password',
+                                                    national_id="complainant")
+        self.cadet = User.objects.create_user(username='cadet', password='password', national_id="cadet")
+        self.officer = User.objects.create_user(username='officer', password='password', national_id="officer")
+        self.complainant.roles.add(Role.objects.get(name="complainant"))
+        self.cadet.roles.add(Role.objects.get(name="cadet"))
+        self.officer.roles.add(Role.objects.get(name="police_officer"))
+        self.cadet.reporting_to = self.officer
+        self.cadet.save()
+
+        case = Case.objects.create(title="Case", description="-", created_by=self.complainant)
+        case.send_to_cadet()
+        self.case = Case.objects.select_related("created_by").get(pk=case.pk)
+        self.cadet = User.objects.get(pk=self.cadet.pk)
+
+    def test_table_covers_every_status(self):
+        self.assertEqual(set(workflow.STATES), set(CaseStatus.values))
+
+    def test_rejections_are_counted_on_the_case(self):
+        self.assertEqual(workflow.advance(self.case, self.cadet, "fail", "Missing info")[0], 200)
+        self.assertEqual(self.case.rejection_count, 1)
+        self.case.refresh_from_db()
+        self.assertEqual(self.case.rejection_count, 1)
+        self.assertEqual(self.case.current_assignee, self.complainant)
+
+    def test_transition_runs_fixed_number_of_queries(self):
+        # role data of both users is cached after the first lookup
+        self.assertTrue(self.case.created_by.perm_snapshot.has_role("complainant"))
+        self.assertTrue(self.cadet.perm_snapshot.grants("case_approve"))
+
+        # verifier lookup, history insert, one narrow case update, one workload update and one stats counter
+        # update, in two savepoints
+        with self.assertNumQueries(9):
+            status_code, _ = workflow.advance(self.case, self.cadet, "pass")
+        self.assertEqual(status_code, 200)
+        self.assertEqual(self.case.status, CaseStatus.PENDING_VERIFICATION)
+        self.assertEqual(self.case.current_assignee, self.officer)
+
+    def test_transition_on_stale_case_conflicts(self):
+        stale = Case.objects.select_related("created_by").get(pk=self.case.pk)
+        self.assertEqual(workflow.advance(self.case, self.cadet, "pass")[0], 200)
+
+        self.assertEqual(workflow.advance(stale, self.cadet, "fail", "Too late")[0], 409)
+        self.assertEqual(WorkflowHistory.objects.filter(case=self.case).count(), 2)
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.version), (CaseStatus.PENDING_VERIFICATION, 2))
+
+    def test_plain_save_keeps_workflow_columns(self):
+        stale = Case.objects.get(pk=self.case.pk)
+        workflow.advance(self.case, self.cadet, "pass")
+        stale.title = "Renamed"
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual((stale.title, stale.current_assignee), ("Renamed", self.officer))
+
+        # nor the status, which only the transitions move
+        stale.status = CaseStatus.CREATED
+        with self.assertRaises(ValueError):
+            stale.save()
+
+        stale = Case.objects.get(pk=self.case.pk)
+        serializer = CaseSerializer(stale, data={"status": CaseStatus.OPEN}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+        self.assertEqual(Case.objects.get(pk=self.case.pk).status, CaseStatus.PENDING_VERIFICATION)
+
+    def test_refusals(self):
+        self.assertEqual(workflow.advance(self.case, self.officer, "pass")[0], 403)
+        self.assertEqual(workflow.advance(self.case, self.cadet, "maybe")[0], 400)
+        self.case.status = CaseStatus.OPEN
+        self.assertEqual(workflow.advance(self.case, self.cadet, "pass")[0], 406)
+
+
+class BulkWorkflowTest(TestCase):
+
+    def setUp(self):
+        self.complainant = User.objects.create_user(username='complainant', password='password',
+                                                    national_id="complainant")
+        self.cadet = User.objects.create_user(username='cadet', password='password', national_id="cadet")
+        self.officer = User.objects.create_user(username='officer', password='password', national_id="officer")
+        self.complainant.roles.add(Role.objects.get(name="complainant"))
+        self.cadet.roles.add(Role.objects.get(name="cadet"))
+        self.officer.roles.add(Role.objects.get(name="police_officer"))
+        self.cadet.reporting_to = self.officer
+        self.cadet.save()
+
+        self.client = APIClient()
+        tok = self.client.post(path='/auth/login/', data={"username": "cadet", "password": "password"})
+        self.client_headers = {"Authorization": "Token " + tok.data["key"]}
+
+    def pending_cases(self, count):
+        cases = []
+        for index in range(count):
+            case = Case.objects.create(title=f"Case {index}", description="-", created_by=self.complainant)
+            case.send_to_cadet()
+            cases.append(case)
+        return cases
+
+    def post(self, ids, **data):
+        return self.client.post('/cases/workflow/', data={"ids": ids, **data}, format='json',
+                                headers=self.client_headers)
+
+    def test_results_per_case(self):
+        pending = self.pending_cases(2)
+        opened = Case.objects.create(title="Open", description="-", created_by=self.complainant, status="open")
+
+        response = self.post([pending[0].id, opened.id, 0, pending[1].id], verdict="pass")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row["id"], row["code"]) for row in response.data],
+                         [(pending[0].id, 200), (opened.id, 406), (0, 404), (pending[1].id, 200)])
+        for case in pending:
+            case.refresh_from_db()
+            self.assertEqual(case.status, 'pending_verification')
+            self.assertEqual(case.current_assignee, self.officer)
+            self.assertEqual(case.last_workflow.recipient, self.officer)
+
+    def test_rejections_keep_message(self):
+        pending = self.pending_cases(2)
+        self.post([case.id for case in pending], verdict="fail", message="Missing info")
+        histories = WorkflowHistory.objects.filter(recipient=self.complainant)
+        self.assertEqual(sorted(histories.values_list("case_id", "message")),
+                         sorted((case.id, "Missing info") for case in pending))
+        self.assertEqual(set(Case.objects.values_list("rejection_count", flat=True)), {1})
+
+    def test_query_count_does_not_grow_with_cases(self):
+        few = [case.id for case in self.pending_cases(2)]
+        many = [case.id for case in self.pending_cases(6)]
+        self.post([case.id for case in self.pending_cases(1)], verdict="pass")  # warm the role cache
+
+        with CaptureQueriesContext(connection) as few_ctx:
+            self.post(few, verdict="pass")
+        with CaptureQueriesContext(connection) as many_ctx:
+            self.post(many, verdict="pass")
+        self.assertEqual(len(few_ctx), len(many_ctx))
+
+
+class CadetAssignmentTest(TestCase):
+
+    def setUp(self):
+        self.complainant = User.objects.create_user(username='complainant', password='password',
+                                                    national_id="complainant")
+        self.complainant.roles.add(Role.objects.get(name="complainant"))
+        self.officer = User.objects.create_user(username='officer', password='password', national_id="officer")
+        self.officer.roles.add(Role.objects.get(name="police_officer"))
+        self.cadets = []
+        for index in range(3):
+            cadet = User.objects.create_user(username=f'cadet{index}', password='password',
+                                             national_id=f"cadet{index}", reporting_to=self.officer)
+            cadet.roles.add(Role.objects.get(name="cadet"))
+            self.cadets.append(cadet)
+
+    def new_case(self):
+        return Case.objects.create(title="Case", description="-", created_by=self.complainant)
+
+    def workloads(self):
+        return list(User.objects.filter(pk__in=[c.pk for c in self.cadets]).order_by("id")
+                    .values_list("workload", flat=True))
+
+    def test_cases_go_to_the_least_loaded_cadet(self):
+        for _ in range(5):
+            self.new_case().send_to_cadet()
+        self.assertEqual(self.workloads(), [2, 2, 1])
+
+    def test_assignment_waits_when_every_cadet_is_locked(self):
+        select_for_update = QuerySet.select_for_update
+
+        def all_locked(queryset, skip_locked=False, **kwargs):
+            queryset = select_for_update(queryset, skip_locked=skip_locked, **kwargs)
+            return queryset.none() if skip_locked else queryset
+
+        case = self.new_case()
+        with mock.patch.object(QuerySet, "select_for_update", all_locked):
+            case.send_to_cadet()
+        self.assertEqual(case.current_assignee, self.cadets[0])
+
+        User.objects.filter(roles__name="cadet").update(is_active=False)
+        with self.assertRaises(RuntimeError):
+            self.new_case().send_to_cadet()
+
+    def test_workload_follows_the_case(self):
+        case = self.new_case()
+        case.send_to_cadet()
+        self.assertEqual(self.workloads(), [1, 0, 0])
+        case.send_to_officer(self.cadets[0])
+        self.assertEqual(self.workloads(), [0, 0, 0])
+        self.assertEqual(User.objects.get(pk=self.officer.pk).workload, 1)
+        case.open_case()
+        self.assertEqual(User.objects.get(pk=self.officer.pk).workload, 0)
+
+    def test_rejected_case_returns_to_its_cadet(self):
+        case = self.new_case()
+        case.send_to_cadet()
+        User.objects.filter(pk=self.cadets[0].pk).update(workload=10)
+        case.send_to_officer(self.cadets[0])
+        case.reject_case_to_cadet("Check again")
+        self.assertEqual(case.current_assignee, self.cadets[0])
+
+    def test_bulk_assignment_spreads_over_cadets(self):
+        cases = [self.new_case() for _ in range(6)]
+        client = APIClient()
+        tok = client.post(path='/auth/login/', data={"username": "complainant", "password": "password"})
+        client.post('/cases/workflow/', data={"ids": [case.id for case in cases]}, format='json',
+                    headers={"Authorization": "Token " + tok.data["key"]})
+        self.assertEqual(self.workloads(), [2, 2, 2])
+
+
+class MostWantedTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', password='password', national_id="user")
+        self.old_case = self.new_case(days_ago=40, level=2)
+        self.new_case(days_ago=10, level=2)
+        self.suspect = Suspect.objects.get(case=self.old_case)
+
+    def new_case(self, days_ago, level):
+        case = Case.objects.create(title="Case", description="-", created_by=self.user, level=level)
+        Case.objects.filter(pk=case.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        Suspect.objects.create(case=case, national_id="0012345678", first_name="Roy", last_name="Earle")
+        return Case.objects.get(pk=case.pk)
+
+    def test_ranking_follows_cases(self):
+        entry = MostWanted.objects.get()
+        self.assertEqual((entry.suspect, entry.duration_days), (self.suspect, 40))
+        self.assertEqual(entry.reward_price, 40 * 2 * 20_000_000)
+
+        self.old_case.closed_at = self.old_case.created_at + timedelta(days=35, hours=1)
+        self.old_case.save()
+        self.assertEqual(MostWanted.objects.get().duration_days, 35)
+
+        self.old_case.closed_at = self.old_case.created_at + timedelta(days=5)
+        self.old_case.save()
+        self.assertFalse(MostWanted.objects.exists())
+
+    def test_pages_carry_etag(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/cases/most_wanted', {"page_size": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["id"] for row in response.data["results"]], [self.suspect.pk])
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = client.get('/cases/most_wanted', {"page_size": 1}, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        ranking.refresh()
+        response = client.get('/cases/most_wanted', {"page_size": 1}, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_pages_walk_ties(self):
+        # rewards repeat a lot; more ties than CursorPagination's offset_cutoff
+        suspects = Suspect.objects.bulk_create([
+            Suspect(case=self.old_case, national_id=f"{index:010d}", first_name="Roy", last_name="Earle")
+            for index in range(1300)
+        ])
+        MostWanted.objects.bulk_create([
+            MostWanted(suspect=suspect, duration_days=40, max_level=0, reward_price=0) for suspect in suspects
+        ])
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        seen, url = [], '/cases/most_wanted?page_size=100'
+        while url:
+            response = client.get(url)
+            seen += [row["id"] for row in response.data["results"]]
+            last_page, url = response.data, response.data["next"]
+        expected = list(
+            MostWanted.objects.order_by("-reward_price", "-suspect_id").values_list("suspect_id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+        response = client.get(last_page["previous"])
+        start = len(expected) - len(last_page["results"])
+        self.assertEqual([row["id"] for row in response.data["results"]], expected[start - 100:start])
+
+    def test_ranking_by_person(self):
+        Suspect.objects.create(case=self.new_case(days_ago=50, level=1), national_id="0012345678",
+                               first_name="Roy", last_name="Earle")
+        self.assertEqual(MostWanted.objects.count(), 3)
+        entry = MostWantedPerson.objects.get()
+        self.assertEqual((entry.person.national_id, entry.duration_days, entry.max_level), ("0012345678", 50, 2))
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/cases/most_wanted', {"group": "person"})
+        self.assertEqual([row["reward_price"] for row in response.data["results"]], [50 * 2 * 20_000_000])
@@ -1,41 +1,71 @@
-from datetime import timedelta
-
-from django.db.models import ExpressionWrapper, DurationField, F, Max, Q, OuterRef, Exists
-from django.db.models.functions import Coalesce, Now
+from django.db.models import Q, OuterRef, Exists
 from rest_framework import viewsets, status
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import IsAuthenticated
-from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiResponse, OpenApiExample
+from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiResponse, OpenApiExample, OpenApiParameter
 from rest_framework.response import Response
 
 from accounts.models import Role, User
-from suspects.models import Suspect
+from suspects import ranking
+from suspects.models import MostWanted, MostWantedPerson
+from .workflow import advance, advance_many
 from .models import Case, CaseStatus, WorkflowHistory
-from .serializers import CaseSerializer, MostWantedSerializer, UserWorkflowCaseSerializer
+from .serializers import (
+    BulkWorkflowResultSerializer, BulkWorkflowSerializer, CaseSerializer, MostWantedPersonSerializer,
+    MostWantedSerializer, UserWorkflowCaseSerializer,
+)
+from common.pagination import KeysetPagination
 from common.permissions import HasPerm, has_perm_helper
+from common.prefetch import SerializerRelatedLoadingMixin
+from detective.stats import summary
 
 import logging
 
 
+class CasePagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
+class MostWantedPagination(KeysetPagination):
+    ordering = ("-reward_price", "-suspect")
+
+
+class MostWantedPersonPagination(KeysetPagination):
+    ordering = ("-reward_price", "-person")
+
+
 @extend_schema_view(
-    list=extend_schema(summary="List cases", tags=["cases"]),
+    list=extend_schema(
+        summary="List cases",
+        tags=["cases"],
+        parameters=[
+            OpenApiParameter("scope", str, enum=["unit"],
+                             description="unit: only cases created by you or anyone under you in the chain of command"),
+        ],
+    ),
     retrieve=extend_schema(summary="Get details of case", tags=["cases"]),
     create=extend_schema(summary="Submit new case", tags=["cases"]),
     partial_update=extend_schema(summary="Edit case", tags=["cases"]),
     update=extend_schema(exclude=True),
     destroy=extend_schema(exclude=True)
 )
-class CaseViewSet(viewsets.ModelViewSet):
+class CaseViewSet(SerializerRelatedLoadingMixin, viewsets.ModelViewSet):
     queryset = Case.objects.all()
     serializer_class = CaseSerializer
+    pagination_class = CasePagination
 
     def get_queryset(self):
-        return Case.objects.visible_to(self.request.user)
+        queryset = Case.objects.visible_to(self.request.user)
+        if self.request.query_params.get("scope") == "unit":
+            queryset = queryset.in_unit(self.request.user)
+        if self.action == "workflow":
+            queryset = queryset.select_related("created_by")
+        return queryset
 
     def get_permissions(self):
         if self.action == "create":
             return [HasPerm("case_create")]
-        if self.action in ("partial_update", "workflow"):
+        if self.action in ("partial_update", "workflow", "bulk_workflow"):
             return [HasPerm("case_edit")]
         return [HasPerm("base")]
 
@@ -46,7 +76,8 @@ class CaseViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
     def perform_create(self, serializer):
-        if self.request.user.roles.filter(name__in=("base", "complainant", "cadet")).exists():
+        complainants = []
+        if self.request.user.perm_snapshot.has_role("base", "complainant", "cadet"):
             complainants = [self.request.user]
         serializer.save(created_by=self.request.user, status=CaseStatus.CREATED, complainants=complainants)
 
@@ -169,51 +200,31 @@ class CaseViewSet(viewsets.ModelViewSet):
                 })
 
             return Response(result, status=status.HTTP_200_OK)
-        verdict = request.data.get("verdict", None)
-
-        if case.status == CaseStatus.CREATED:
-            if case.created_by.roles.filter(name__in=("base", "complainant", "cadet")).exists():
-                case.send_to_cadet()
-            elif case.created_by.roles.filter(name__in=("chief_police",)).exists():
-                case.open_case()
-            else:
-                case.send_to_officer(case.created_by)
-            return Response(status=status.HTTP_200_OK)
-
-        elif case.status == CaseStatus.PENDING_APPROVAL:
-            if not request.user.roles.filter(permissions__codename="case_approve").exists():
-                return Response(status=status.HTTP_403_FORBIDDEN)
-            if verdict == "pass":
-                case.send_to_officer(request.user)
-                return Response(status=status.HTTP_200_OK)
-            elif verdict == "fail":
-                if case.workflow_history.filter(recipient=case.created_by).count() >= 2:
-                    case.cancel_case()
-                    return Response({"message": "Case got rejected 3 times, case cancelled"},
-                                    status=status.HTTP_406_NOT_ACCEPTABLE)
-                case.reject_case_to_creator(request.data.get("message"))
-                return Response(status=status.HTTP_200_OK)
-            return Response({"error": "Invalid verdict."}, status=status.HTTP_400_BAD_REQUEST)
-
-        elif case.status == CaseStatus.PENDING_VERIFICATION:
-            if not request.user.roles.filter(permissions__codename="case_verify").exists():
-                return Response(status=status.HTTP_403_FORBIDDEN)
-            if verdict == "pass":
-                case.open_case()
-                return Response(status=status.HTTP_200_OK)
-            elif verdict == "fail":
-                if case.created_by.roles.filter(name__in=("base", "complainant", "cadet")).exists():
-                    case.reject_case_to_cadet(request.data.get("message"))
-                else:
-                    case.reject_case_to_creator(request.data.get("message"))
-                return Response(status=status.HTTP_200_OK)
-            return Response({"error": "Invalid verdict."}, status=status.HTTP_400_BAD_REQUEST)
-
-        elif case.status in (CaseStatus.CANCELLED, CaseStatus.CLOSED):
-            return Response({"error": "Case is cancelled and cannot be updated"}, status=status.HTTP_400_BAD_REQUEST)
-
-        else:
-            return Response({"message": "Case is already open."}, status=status.HTTP_406_NOT_ACCEPTABLE)
+        status_code, body = advance(
+            case, request.user, request.data.get("verdict"), request.data.get("message")
+        )
+        return Response(body, status=status_code)
+
+    @extend_schema(
+        summary="Push many cases to their next workflow step",
+        description="Applies one verdict to every listed case and reports the outcome per case. Cases that "
+                    "another request is updating are skipped with code 409.",
+        tags=["cases"],
+        request=BulkWorkflowSerializer,
+        responses={200: BulkWorkflowResultSerializer(many=True)},
+    )
+    @action(detail=False, methods=["POST"], url_path="workflow")
+    def bulk_workflow(self, request):
+        ser = BulkWorkflowSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        case_ids = list(dict.fromkeys(ser.validated_data["ids"]))
+
+        results = advance_many(
+            self.get_queryset(), case_ids, request.user,
+            ser.validated_data.get("verdict"), ser.validated_data.get("message"),
+        )
+        data = [{"id": case_id, "code": results[case_id][0], "detail": results[case_id][1]} for case_id in case_ids]
+        return Response(BulkWorkflowResultSerializer(data, many=True).data, status=status.HTTP_200_OK)
 
 
 @extend_schema(
@@ -226,26 +237,19 @@ class CaseViewSet(viewsets.ModelViewSet):
 def get_user_workflow_cases(request):
     user = request.user
 
-    latest_history_ids = (
-        WorkflowHistory.objects
-        .values("case")
-        .annotate(last_id=Max("id"))
-        .values_list("last_id", flat=True)
-    )
-
-    latest_histories = (
-        WorkflowHistory.objects
-        .filter(id__in=latest_history_ids, recipient=user)
-        .exclude(case__status=CaseStatus.CLOSED)
-        .select_related("case")
+    cases = (
+        Case.objects
+        .filter(current_assignee=user)
+        .exclude(status=CaseStatus.CLOSED)
+        .select_related("last_workflow")
     )
 
     results = [
         {
-            "case_id": history.case.id,
-            "message": history.message,
+            "case_id": case.id,
+            "message": case.last_workflow.message if case.last_workflow else None,
         }
-        for history in latest_histories
+        for case in cases
     ]
 
     ser = UserWorkflowCaseSerializer(results, many=True)
@@ -269,8 +273,7 @@ def get_user_workflow_cases(request):
 @api_view(["GET"])
 @permission_classes([has_perm_helper("base")])
 def num_solved(request):
-    count = Case.objects.filter(status="solved").count()
-    return Response({"count": count})
+    return Response({"count": summary()["cases"]["solved"]})
 
 
 @extend_schema(
@@ -290,32 +293,36 @@ def num_solved(request):
 @api_view(["GET"])
 @permission_classes([has_perm_helper("base")])
 def num_active(request):
-    count = Case.objects.exclude(status="solved").count()
-    return Response({"count": count})
+    return Response({"count": summary()["cases"]["active"]})
 
 
 @extend_schema(
     summary="List most wanted suspects",
     description=(
-            "Returns all suspects who have been under interrogation "
-            "for more than 30 days in at least one open cases."
+            "Returns suspects whose case has run for more than 30 days, highest reward first, one page at a "
+            "time. Read from a precomputed ranking; pages carry an ETag, and a matching If-None-Match gets a 304."
     ),
+    parameters=[
+        OpenApiParameter("group", str, enum=["person"],
+                         description="person: one entry per person (id, national_id, first_name, last_name, "
+                                     "reward_price) over all their cases, instead of one per suspect record"),
+    ],
     responses={200: MostWantedSerializer(many=True)},
     tags=["cases"]
 )
 @api_view(["GET"])
 def most_wanted(request):
-    suspects = (
-        Suspect.objects
-        .annotate(case_duration=ExpressionWrapper(
-            Coalesce(F("case__closed_at"), Now()) - F("case__created_at"),
-            output_field=DurationField()
-        ))
-        .annotate(
-            max_duration=Max("case_duration"),
-            max_level=Max("case__level"),
-        )
-        .filter(max_duration__gt=timedelta(days=30))
-    )
-
-    return Response(MostWantedSerializer(suspects, many=True, context={"request": request}).data)
+    etag = ranking.etag(request.get_full_path())
+    if etag in request.headers.get("If-None-Match", ""):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    if request.query_params.get("group") == "person":
+        paginator, serializer_class = MostWantedPersonPagination(), MostWantedPersonSerializer
+        queryset = MostWantedPerson.objects.select_related("person")
+    else:
+        paginator, serializer_class = MostWantedPagination(), MostWantedSerializer
+        queryset = MostWanted.objects.select_related("suspect")
+    page = paginator.paginate_queryset(queryset, request)
+    response = paginator.get_paginated_response(serializer_class(page, many=True, context={"request": request}).data)
+    response["ETag"] = etag
+    return response
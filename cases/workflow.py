@@ -0,0 +1,239 @@
+"""
+The case lifecycle as a transition table.
+
+Each state names the permission that guards it and the transitions out of it. A transition is chosen by the
+verdict and by the role class of the case creator; it names the next status, who the case is routed to and the
+response to send. The table is compiled once into a dict, so choosing a transition costs no queries.
+Planning a step only reads, applying it writes the history row and the changed case columns.
+"""
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable
+
+from django.db import transaction
+from rest_framework import status as http
+
+from .models import Case, CaseStatus, StaleCase, WorkflowHistory, adjust_workloads, case_verifier
+from .signals import case_moved
+
+CIVILIAN = "civilian"
+CHIEF = "chief"
+POLICE = "police"
+CREATOR_CLASSES = (CIVILIAN, CHIEF, POLICE)
+
+# rejections back to the creator after which the next failed approval cancels the case
+REJECTION_LIMIT = 2
+
+OK = (http.HTTP_200_OK, None)
+INVALID_VERDICT = (http.HTTP_400_BAD_REQUEST, {"error": "Invalid verdict."})
+FORBIDDEN = (http.HTTP_403_FORBIDDEN, None)
+NOT_FOUND = (http.HTTP_404_NOT_FOUND, {"error": "Case not found."})
+LOCKED = (http.HTTP_409_CONFLICT, {"error": "Case is being updated by another request."})
+STALE = (http.HTTP_409_CONFLICT, {"error": "Case was changed by another request; reload it and try again."})
+
+
+def creator_class(user):
+    roles = user.perm_snapshot
+    if roles.has_role("base", "complainant", "cadet"):
+        return CIVILIAN
+    if roles.has_role("chief_police"):
+        return CHIEF
+    return POLICE
+
+
+# memo is the dict of a bulk run, or None
+ROUTES = {
+    "approver": lambda case, actor, memo: case.get_case_approver(
+        None if memo is None else memo.setdefault("cadet_load", {})
+    ),
+    "creator": lambda case, actor, memo: case.created_by,
+    "creator_verifier": lambda case, actor, memo: case_verifier(case.created_by),
+    "actor_verifier": lambda case, actor, memo: case_verifier(actor),
+}
+
+# routes whose target depends only on this key, so a bulk run resolves each key once
+SHARED_ROUTES = {
+    "creator_verifier": lambda case: case.created_by_id,
+    "actor_verifier": lambda case: None,
+}
+
+
+@dataclass(frozen=True)
+class Transition:
+    status: str
+    route: str | None = None  # key of ROUTES; None moves the case without handing it to anyone
+    verdict: str | None = None  # None: taken whatever the verdict
+    creators: tuple = CREATOR_CLASSES
+    when: Callable | None = None
+    keeps_message: bool = False
+    response: tuple = OK
+
+
+@dataclass(frozen=True)
+class State:
+    guard: str | None = None
+    transitions: tuple = ()
+    refusal: tuple | None = None  # response for states the workflow cannot move out of
+
+
+STATES = {
+    CaseStatus.CREATED: State(transitions=(
+        Transition(CaseStatus.PENDING_APPROVAL, "approver", creators=(CIVILIAN,)),
+        Transition(CaseStatus.OPEN, creators=(CHIEF,)),
+        Transition(CaseStatus.PENDING_VERIFICATION, "creator_verifier", creators=(POLICE,)),
+    )),
+    CaseStatus.PENDING_APPROVAL: State(guard="case_approve", transitions=(
+        Transition(CaseStatus.PENDING_VERIFICATION, "actor_verifier", verdict="pass"),
+        Transition(CaseStatus.CANCELLED, "creator", verdict="fail",
+                   when=lambda case: case.rejection_count >= REJECTION_LIMIT,
+                   response=(http.HTTP_406_NOT_ACCEPTABLE,
+                             {"message": "Case got rejected 3 times, case cancelled"})),
+        Transition(CaseStatus.CREATED, "creator", verdict="fail", keeps_message=True),
+    )),
+    CaseStatus.PENDING_VERIFICATION: State(guard="case_verify", transitions=(
+        Transition(CaseStatus.OPEN, verdict="pass"),
+        Transition(CaseStatus.PENDING_APPROVAL, "approver", verdict="fail", creators=(CIVILIAN,),
+                   keeps_message=True),
+        Transition(CaseStatus.CREATED, "creator", verdict="fail", creators=(CHIEF, POLICE), keeps_message=True),
+    )),
+    CaseStatus.OPEN: State(refusal=(http.HTTP_406_NOT_ACCEPTABLE, {"message": "Case is already open."})),
+    CaseStatus.CANCELLED: State(
+        refusal=(http.HTTP_400_BAD_REQUEST, {"error": "Case is cancelled and cannot be updated"})
+    ),
+    CaseStatus.CLOSED: State(
+        refusal=(http.HTTP_400_BAD_REQUEST, {"error": "Case is cancelled and cannot be updated"})
+    ),
+}
+
+
+def _compile(states):
+    table = {}
+    for source, state in states.items():
+        for transition in state.transitions:
+            for creator in transition.creators:
+                table.setdefault((source, transition.verdict, creator), []).append(transition)
+    return {key: tuple(transitions) for key, transitions in table.items()}
+
+
+TABLE = _compile(STATES)
+
+
+class WorkflowRefused(Exception):
+    def __init__(self, response):
+        super().__init__(response)
+        self.response = response
+
+
+@dataclass(frozen=True)
+class Step:
+    transition: Transition
+    recipient: object = None
+    message: str | None = None
+
+
+def _route(name, case, actor, memo):
+    share = SHARED_ROUTES.get(name)
+    if memo is None or share is None:
+        return ROUTES[name](case, actor, memo)
+    key = (name, share(case))
+    if key not in memo:
+        memo[key] = ROUTES[name](case, actor, memo)
+    return memo[key]
+
+
+def plan(case, actor, verdict=None, message=None, memo=None):
+    """
+    The step case takes when actor submits verdict, or WorkflowRefused with the response to send instead.
+
+    memo, when given, is a dict shared by the calls of one bulk run to resolve shared routes once.
+    """
+    state = STATES[case.status]
+    if state.refusal:
+        raise WorkflowRefused(state.refusal)
+    if state.guard and not actor.perm_snapshot.grants(state.guard):
+        raise WorkflowRefused(FORBIDDEN)
+
+    creator = creator_class(case.created_by)
+    candidates = TABLE.get((case.status, verdict, creator)) or TABLE.get((case.status, None, creator), ())
+    for transition in candidates:
+        if transition.when is None or transition.when(case):
+            recipient = _route(transition.route, case, actor, memo) if transition.route else None
+            return Step(transition, recipient, message if transition.keeps_message else None)
+    raise WorkflowRefused(INVALID_VERDICT)
+
+
+def apply(case, step):
+    if step.transition.route is None:
+        case.move_to(step.transition.status)
+    else:
+        case.route_to(step.recipient, step.transition.status, step.message)
+    return step.transition.response
+
+
+def apply_many(planned):
+    """
+    Apply (case, step) pairs with one history insert and one case update.
+    """
+    routed = [(case, step) for case, step in planned if step.transition.route]
+    histories = WorkflowHistory.objects.bulk_create([
+        WorkflowHistory(case=case, recipient=step.recipient, message=step.message) for case, step in routed
+    ])
+    history_of = {case.pk: history for (case, _), history in zip(routed, histories)}
+
+    # the cases are locked, so plain writes are safe; the version still moves on for readers outside the lock
+    update_fields, workload, moves = {"version"}, Counter(), Counter()
+    for case, step in planned:
+        moves[(case.status, step.transition.status, case.level)] += 1
+        update_fields.update(case.take_step(step.transition.status, history_of.get(case.pk), workload))
+        case.version += 1
+    if planned:
+        Case.objects.bulk_update([case for case, _ in planned], sorted(update_fields))
+        case_moved.send(sender=Case, moves=moves)
+    adjust_workloads(workload)
+
+
+def advance(case, actor, verdict=None, message=None):
+    """
+    Plan and apply one step; returns the (status code, body) to respond with.
+    """
+    try:
+        # routing may lock the picked assignee, so planning runs in the transaction that applies the step
+        with transaction.atomic():
+            return apply(case, plan(case, actor, verdict, message))
+    except WorkflowRefused as refused:
+        return refused.response
+    except StaleCase:
+        return STALE
+
+
+def advance_many(queryset, case_ids, actor, verdict=None, message=None):
+    """
+    Apply verdict to each of case_ids that queryset contains; returns {case id: (status code, body)}.
+
+    The cases are locked for the transaction, skipping rows another request holds: those are reported as
+    conflicts instead of being waited for.
+    """
+    results = {}
+    with transaction.atomic():
+        cases = list(
+            queryset.filter(pk__in=case_ids)
+            .select_related("created_by")
+            .select_for_update(skip_locked=True, of=("self",))
+        )
+        memo, planned = {}, []
+        for case in cases:
+            try:
+                step = plan(case, actor, verdict, message, memo)
+            except WorkflowRefused as refused:
+                results[case.pk] = refused.response
+                continue
+            planned.append((case, step))
+            results[case.pk] = step.transition.response
+        apply_many(planned)
+
+    missing = set(case_ids) - results.keys()
+    if missing:
+        locked = set(queryset.filter(pk__in=missing).values_list("pk", flat=True))
+        for case_id in missing:
+            results[case_id] = LOCKED if case_id in locked else NOT_FOUND
+    return results
@@ -0,0 +1,66 @@
+from django import forms
+from django.contrib import admin
+from django.contrib.admin import helpers
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+from django.utils.translation import gettext as _
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that trusts the database's row estimate for unfiltered lists of big tables instead of running
+    a full COUNT(*). Filtered lists and small tables are still counted exactly.
+    """
+    estimate_threshold = 100_000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is not None and not query.where:
+            estimate = self.estimated_rows(self.object_list.db, self.object_list.model._meta.db_table)
+            if estimate and estimate > self.estimate_threshold:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def estimated_rows(using, table):
+        connection = connections[using]
+        if connection.vendor == "postgresql":
+            sql = "SELECT reltuples::bigint FROM pg_class WHERE relname = %s"
+        elif connection.vendor == "sqlite":
+            # only present once ANALYZE has run; a stat row starts with the number of rows its index covers, which
+            # for a partial index is only part of the table, so take the largest
+            sql = "SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 WHERE tbl = %s"
+        else:
+            return None
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [table])
+                row = cursor.fetchone()
+        except DatabaseError:
+            return None
+        return row[0] if row else None
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Base admin for tables that grow without bound: estimated page counts, no second COUNT for filters, and rows
+    labelled without str(obj).
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+    def action_checkbox(self, obj):
+        # the stock checkbox labels each row with str(obj), which may cost queries per row (str(user) lists the
+        # user's roles); only list_display decides what a row loads
+        attrs = {
+            "class": "action-select",
+            "aria-label": format_html(
+                _("Select this object for an action - {}"), f"{self.opts.verbose_name} {obj.pk}"
+            ),
+        }
+        checkbox = forms.CheckboxInput(attrs, lambda value: False)
+        return checkbox.render(helpers.ACTION_CHECKBOX_NAME, str(obj.pk))
@@ -0,0 +1,103 @@
+import json
+from base64 import b64decode, b64encode
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over a unique, indexed ordering: no COUNT(*), and every page costs the same as the first.
+
+    The cursor holds the values of every ordering field of the row it stops at, and the next page starts strictly
+    after that position, so rows tied on the leading fields are neither skipped nor repeated. The ordering fields
+    must not be null, and together they must be unique.
+    """
+    ordering = "-id"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = [
+            (queryset.model._meta.get_field(name.lstrip("-")), name.startswith("-")) for name in self.ordering
+        ]
+        position, self.reverse = self.decode_cursor(request) or (None, False)
+
+        # by the columns themselves: ordering by a foreign key name would follow the related model's ordering
+        queryset = queryset.order_by(*[
+            ("-" if descending != self.reverse else "") + field.attname for field, descending in self.fields
+        ])
+        if position is not None:
+            try:
+                queryset = queryset.filter(self._after(position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:self.page_size + 1])
+        more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, more
+        else:
+            self.has_next, self.has_previous = more, position is not None
+
+        if self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _after(self, position):
+        """
+        Rows past position in the direction of the page: past it on the first field, or tied on the first fields
+        and past it on the next one.
+        """
+        after, tied = Q(), Q()
+        for (field, descending), value in zip(self.fields, position):
+            lookup = "lt" if descending != self.reverse else "gt"
+            after |= tied & Q(**{f"{field.attname}__{lookup}": value})
+            tied &= Q(**{field.attname: value})
+        # the same bound on the first field alone, which the index can seek to
+        (field, descending), value = self.fields[0], position[0]
+        return Q(**{f"{field.attname}__{'lte' if descending != self.reverse else 'gte'}": value}) & after
+
+    def _position(self, row):
+        return [field.value_to_string(row) for field, _ in self.fields]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor((self._position(self.page[-1]), False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor((self._position(self.page[0]), True))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            position, reverse = json.loads(b64decode(encoded.encode("ascii"), validate=True))
+            if not isinstance(position, list) or len(position) != len(self.fields):
+                raise ValueError
+            return position, bool(reverse)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        encoded = b64encode(json.dumps(cursor).encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_html_context(self):
+        return {"previous_url": self.get_previous_link(), "next_url": self.get_next_link()}
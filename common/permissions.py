@@ -12,8 +12,7 @@ class HasPerm(BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated:
             return False
-        return (request.user.roles.filter(permissions__codename=self.codename).exists() or request.user.roles.filter(
-            name="admin").exists())
+        return request.user.perm_snapshot.has_perm(self.codename)
 
 
 class DynamicRole(BasePermission):
@@ -26,7 +25,4 @@ class DynamicRole(BasePermission):
 
     def has_permission(self, request, view):
         user = request.user
-        return user.is_authenticated and (
-                user.roles.filter(permissions__codename__in=self.codenames).exists()
-                or user.roles.filter(name="admin").exists()
-        )
+        return user.is_authenticated and user.perm_snapshot.has_perm(*self.codenames)
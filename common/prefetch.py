@@ -0,0 +1,79 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def _plan(serializer, prefix, prefetching):
+    select, prefetch = [], []
+    model = serializer.Meta.model
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*" or "." in field.source:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+
+        path = prefix + field.source
+        if isinstance(field, serializers.ListSerializer):
+            nested, many = field.child, True
+        elif isinstance(field, serializers.ManyRelatedField):
+            nested, many = None, True
+        elif isinstance(field, serializers.ModelSerializer):
+            nested, many = field, False
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            # rendered from the local <name>_id column
+            continue
+        else:
+            nested, many = None, False
+
+        if many or prefetching:
+            prefetch.append(path)
+        else:
+            select.append(path)
+
+        if isinstance(nested, serializers.ModelSerializer):
+            nested_select, nested_prefetch = _plan(nested, path + "__", prefetching or many)
+            select += nested_select
+            prefetch += nested_prefetch
+
+    return select, prefetch
+
+
+@lru_cache(maxsize=None)
+def related_plan(serializer_class):
+    """
+    The select_related and prefetch_related lookups that let serializer_class render without further queries.
+
+    Nested single-valued serializers are joined with select_related, while many=True serializers, many related
+    fields and everything nested below them are prefetched. Primary key fields read the local column and are
+    skipped.
+    """
+    select, prefetch = _plan(serializer_class(), "", False)
+    return tuple(select), tuple(prefetch)
+
+
+def load_related(queryset, serializer_class):
+    select, prefetch = related_plan(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class SerializerRelatedLoadingMixin:
+    """
+    Viewset mixin that loads what the serializer renders, so list pages run a fixed number of queries.
+    """
+    related_loading_actions = ("list", "retrieve")
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if getattr(self, "action", None) in self.related_loading_actions:
+            queryset = load_related(queryset, self.get_serializer_class())
+        return queryset
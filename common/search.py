@@ -0,0 +1,116 @@
+"""
+Ranked full-text search over a model's search_fields, backed by an index the database keeps in step on every
+write.
+
+PostgreSQL: a stored generated tsvector column, search_vector, weighting the first field above the others, with
+a GIN index.
+SQLite: an external-content FTS5 table, <table>_fts, with triggers mirroring inserts, updates and deletes. Each
+searched model has an unmanaged model over that table, related to it as search_index, through which search()
+joins the index to the rows.
+Other backends get no index, and search() falls back to unranked containment matches. The migration adding
+search_fields to a model creates its index.
+
+The SQLite schema editor rebuilds a table for some ALTERs, which drops its triggers. restore_triggers() runs
+after every migrate and recreates the ones that are missing.
+"""
+import re
+
+from django.apps import apps
+from django.db import connections, models
+from django.db.models import F, FloatField, Func, Lookup, Q, Value
+from django.db.models.expressions import RawSQL
+
+CONFIG = "english"
+# first field over the others, as PostgreSQL's default A and B weights
+WEIGHTS = (1.0, 0.4)
+
+
+def _fts(table):
+    return f"{table}_fts"
+
+
+class SearchDocumentField(models.TextField):
+    """
+    The hidden column an FTS5 table has under its own name, which stands for the whole row in MATCH and bm25().
+    """
+
+
+@SearchDocumentField.register_lookup
+class Match(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+def _sqlite_triggers(table, columns):
+    fts = _fts(table)
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END",
+    ]
+
+
+def restore_triggers(using="default", **kwargs):
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        existing = set(connection.introspection.table_names(cursor))
+        for model in apps.get_models():
+            table = model._meta.db_table
+            if getattr(model, "search_fields", None) and _fts(table) in existing:
+                columns = [model._meta.get_field(name).column for name in model.search_fields]
+                for statement in _sqlite_triggers(table, columns):
+                    cursor.execute(statement)
+
+
+def _words(text):
+    return re.findall(r"\w+", text)
+
+
+def search(queryset, text):
+    """
+    The rows of queryset matching every word of text, annotated with rank (higher matches better) and ordered
+    by it.
+    """
+    model = queryset.model
+    table = model._meta.db_table
+    columns = [model._meta.get_field(name).column for name in model.search_fields]
+    vendor = connections[queryset.db].vendor
+
+    if vendor == "postgresql":
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+
+        query = SearchQuery(text, config=CONFIG, search_type="websearch")
+        vector = RawSQL(f"{table}.search_vector", [], output_field=SearchVectorField())
+        queryset = queryset.alias(search_vector=vector).filter(search_vector=query)
+        return queryset.annotate(rank=SearchRank(vector, query)).order_by("-rank", "-pk")
+
+    words = _words(text)
+    if not words:
+        return queryset.none()
+
+    if vendor == "sqlite":
+        match = " ".join(f'"{word}"' for word in words)
+        weights = [Value(WEIGHTS[0] if index == 0 else WEIGHTS[1]) for index in range(len(columns))]
+        bm25 = Func(F("search_index__document"), *weights, function="bm25", output_field=FloatField())
+        # joined rather than a subquery per row, so the MATCH runs once and drives the lookups of the rows;
+        # bm25 is lower for better matches
+        queryset = queryset.filter(search_index__document__match=match)
+        return queryset.annotate(rank=-bm25).order_by("-rank", "-pk")
+
+    for word in words:
+        matches_word = Q()
+        for name in model.search_fields:
+            matches_word |= Q(**{f"{name}__icontains": word})
+        queryset = queryset.filter(matches_word)
+    return queryset.annotate(rank=Value(0.0, output_field=FloatField())).order_by("-pk")
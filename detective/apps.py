@@ -1,5 +1,29 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete
 
 
 class DetectiveConfig(AppConfig):
     name = 'detective'
+
+    def ready(self):
+        from accounts.models import Role, User
+        from accounts.signals import roles_bulk_changed
+        from cases.models import Case
+        from cases.signals import case_moved
+        from common import search
+        from detective import rollups, stats
+
+        post_save.connect(stats.count_case_on_save, sender=Case)
+        post_delete.connect(stats.count_case_on_delete, sender=Case)
+        case_moved.connect(stats.count_case_moves, sender=Case)
+        post_save.connect(rollups.record_case_save, sender=Case)
+        case_moved.connect(rollups.record_case_moves, sender=Case)
+
+        post_save.connect(stats.count_user_on_save, sender=User)
+        pre_delete.connect(stats.count_user_on_delete, sender=User)
+        m2m_changed.connect(stats.count_role_memberships, sender=User.roles.through)
+        post_save.connect(stats.rebuild_role_counters, sender=Role)
+        post_delete.connect(stats.rebuild_role_counters, sender=Role)
+        roles_bulk_changed.connect(stats.rebuild_role_counters)
+
+        post_migrate.connect(search.restore_triggers, sender=self)
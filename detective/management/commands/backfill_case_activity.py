@@ -0,0 +1,23 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from detective.rollups import backfill
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily case activity rollups of a range of days. Without a range, fills in the days "
+        "before the oldest rolled-up one, leaving the days already rolled up alone; safe to run again"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=date.fromisoformat, help="First day, YYYY-MM-DD")
+        parser.add_argument("--until", type=date.fromisoformat, help="Last day, YYYY-MM-DD")
+        parser.add_argument("--batch-days", type=int, default=31, help="Days recomputed per transaction")
+
+    def handle(self, *args, **options):
+        if options["batch_days"] < 1:
+            raise CommandError("--batch-days must be positive")
+        days = backfill(options["since"], options["until"], options["batch_days"], log=self.stdout.write)
+        self.stdout.write(f"Rolled up {days} days")
@@ -0,0 +1,150 @@
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.db.models import QuerySet
+
+from accounts.models import User
+from cases.models import ASSIGNED_STATUSES, Case, CaseStatus, WorkflowHistory, adjust_workloads, case_visibility
+from cases.workflow import advance
+from evidences.models import Evidence
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Register a benchmark. It receives the command and yields (label, target) pairs, where target is a queryset
+    to evaluate and explain or a callable to time. A callable may return a line to print with its timings.
+    """
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def first_user_with_role(role_name):
+    user = User.objects.filter(roles__name=role_name).order_by("id").first()
+    if user is None:
+        raise CommandError(f"No user with role {role_name}; run seed_data first")
+    return user
+
+
+@benchmark("case-visibility")
+def case_visibility_benchmark(command):
+    for role_name in ("complainant", "cadet", "captain", "chief_police"):
+        user = first_user_with_role(role_name)
+        yield f"cases visible to {role_name}", Case.objects.visible_to(user)[:command.page_size]
+        yield f"unit cases of {role_name}", Case.objects.visible_to(user).in_unit(user)[:command.page_size]
+
+
+@benchmark("evidence-visibility")
+def evidence_visibility_benchmark(command):
+    for role_name in ("complainant", "captain"):
+        user = first_user_with_role(role_name)
+        queryset = Evidence.objects.all()
+        if (condition := case_visibility(user, case="case")) is not None:
+            queryset = queryset.filter(condition)
+        yield f"evidence visible to {role_name}", queryset[:command.page_size]
+
+
+@benchmark("workflow-contention")
+def workflow_contention(command):
+    """
+    Many clients approve the same pending cases at once. Every case must move exactly once; the other
+    attempts get a 409 or find the case already moved. The cases are created for the run and deleted after it.
+    """
+    complainant = first_user_with_role("complainant")
+    cadet = first_user_with_role("cadet")
+    clients, case_count = command.clients, command.page_size
+
+    def push():
+        cases = [Case.objects.create(title="Contention", description="-", created_by=complainant)
+                 for _ in range(case_count)]
+        for case in cases:
+            case.route_to(cadet, CaseStatus.PENDING_APPROVAL)
+        case_ids = [case.pk for case in cases]
+        codes, lock = Counter(), threading.Lock()
+
+        def client():
+            actor = User.objects.get(pk=cadet.pk)
+            try:
+                for case_id in random.sample(case_ids, len(case_ids)):
+                    case = Case.objects.select_related("created_by").get(pk=case_id)
+                    try:
+                        outcome = str(advance(case, actor, "pass")[0])
+                    except OperationalError:
+                        # SQLite refuses a second writer instead of queueing it
+                        outcome = "busy"
+                    with lock:
+                        codes[outcome] += 1
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        moves = WorkflowHistory.objects.filter(case_id__in=case_ids).count() - case_count
+        waiting = Counter(
+            Case.objects.filter(pk__in=case_ids, status__in=ASSIGNED_STATUSES)
+            .values_list("current_assignee_id", flat=True)
+        )
+        adjust_workloads({user_id: -count for user_id, count in waiting.items() if user_id is not None})
+        Case.objects.filter(pk__in=case_ids).delete()
+        return (f"{sum(codes.values()) / elapsed:.0f} attempts/s, codes {dict(sorted(codes.items()))}, "
+                f"{moves} moves for {case_count} cases")
+
+    yield f"{clients} clients approving the same {case_count} cases", push
+
+
+class Command(BaseCommand):
+    help = "Time named query benchmarks against the current database, e.g. one filled by seed_data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help=f"Benchmarks to run (default all): {', '.join(BENCHMARKS)}")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--page-size", type=int, default=10)
+        parser.add_argument("--explain", action="store_true", help="Print the query plan of each queryset")
+        parser.add_argument("--clients", type=int, default=8, help="Concurrent clients of contention benchmarks")
+
+    def handle(self, *args, **options):
+        self.page_size = options["page_size"]
+        self.clients = options["clients"]
+        names = options["names"] or list(BENCHMARKS)
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+        self.stdout.write(f"{Case.objects.count()} cases on {connection.vendor}")
+        for name in names:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label, target in BENCHMARKS[name](self):
+                self.run(label, target, options["repeat"], options["explain"])
+
+    def run(self, label, target, repeat, explain):
+        queryset = target if isinstance(target, QuerySet) else None
+        if queryset is not None:
+            target = lambda: list(queryset._chain())
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            summary = target()
+            timings.append((time.perf_counter() - start) * 1000)
+        self.stdout.write(
+            f"  {label}: median {statistics.median(timings):.2f} ms, max {max(timings):.2f} ms over {repeat} runs"
+        )
+        if isinstance(summary, str):
+            self.stdout.write(f"    {summary}")
+        if explain and queryset is not None:
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f"    {line}")
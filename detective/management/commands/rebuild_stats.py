@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from detective.stats import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the stats counters from the case and user tables, e.g. after a bulk import"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_counters()
+        self.stdout.write("Rebuilt stats counters")
@@ -0,0 +1,338 @@
+import random
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Role, User
+from accounts.signals import create_default_perms, create_default_roles, user_roles_changed, rebuild_chain_paths
+from cases.models import Case, CaseStatus, CrimeLevel, WorkflowHistory, rebuild_workloads
+from detective.rollups import backfill
+from detective.stats import rebuild_counters
+from evidences.models import Evidence, EvidenceType
+from rewards.models import Reward
+from suspects.models import Investigation, Suspect, SuspectStatus
+from suspects.people import rebuild as rebuild_people
+from suspects.ranking import refresh as refresh_most_wanted, refresh_people
+
+FIRST_NAMES = ["Ali", "Sara", "Reza", "Maryam", "Hossein", "Zahra", "Mohammad", "Fatemeh", "Amir", "Neda",
+               "Cole", "Roy", "Stefan", "Elsa", "Herschel", "Jack", "Rusty", "Hank", "Mickey", "Ira"]
+LAST_NAMES = ["Ahmadi", "Karimi", "Hosseini", "Rezaei", "Moradi", "Jafari", "Phelps", "Earle", "Bekowsky",
+              "Lichtmann", "Biggs", "Kelso", "Galloway", "Merrick", "Ruskin", "Nash", "Fontaine", "Shelby"]
+CRIMES = ["Burglary", "Homicide", "Arson", "Fraud", "Assault", "Vehicle theft", "Robbery", "Kidnapping",
+          "Forgery", "Smuggling"]
+PLACES = ["Hollywood Blvd", "Main Street", "the harbor", "Bunker Hill", "the rail yard", "Wilshire",
+          "Echo Park", "the old pier", "Union Station", "Chinatown"]
+VEHICLES = ["Sedan", "Coupe", "Pickup", "Van", "Motorcycle", "Truck"]
+COLORS = ["black", "white", "red", "blue", "grey", "green"]
+
+# (role, share of staff, role of the user they report to)
+STAFF_LAYOUT = [
+    ("captain", 0.02, "chief_police"),
+    ("sergeant", 0.04, "captain"),
+    ("police_officer", 0.18, "captain"),
+    ("patrol_officer", 0.16, "captain"),
+    ("detective", 0.20, "sergeant"),
+    ("cadet", 0.25, "police_officer"),
+    ("forensic", 0.10, "captain"),
+    ("judge", 0.05, None),
+]
+
+# the seeded history ends here unless --until says otherwise, so that equal seeds give equal rows
+DEFAULT_UNTIL = date(2026, 1, 1)
+# a fixed salt gives every seeded user the same password hash on every run
+PASSWORD_SALT = "seeddatapasswordsalt42"
+
+# (status, weight)
+STATUS_MIX = [
+    (CaseStatus.CREATED, 10),
+    (CaseStatus.PENDING_APPROVAL, 15),
+    (CaseStatus.PENDING_VERIFICATION, 15),
+    (CaseStatus.OPEN, 40),
+    (CaseStatus.CLOSED, 15),
+    (CaseStatus.CANCELLED, 5),
+]
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """
+    Let bulk_create keep the timestamps we generate instead of overwriting them with auto_now_add.
+    """
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = "Seed a synthetic dataset of staff, complainants, cases and related records for profiling"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000, help="Number of users to create")
+        parser.add_argument("--cases", type=int, default=1000, help="Number of cases to create, e.g. 1000000")
+        parser.add_argument("--seed", type=int, default=0,
+                            help="Random seed; equal seeds, --until and --days give equal seeded rows")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--days", type=int, default=3 * 365, help="Spread case creation over this many days")
+        parser.add_argument("--until", type=date.fromisoformat, default=DEFAULT_UNTIL,
+                            help="Day the seeded history ends, YYYY-MM-DD; defaults to 2026-01-01")
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith="seed_").exists():
+            raise CommandError("Seed data already exists; flush the database first")
+        if options["users"] < 100:
+            raise CommandError("At least 100 users are needed to fill every role")
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        # every seeded timestamp derives from this moment and the seed, never from the clock
+        self.now = timezone.make_aware(datetime.combine(options["until"], time.min))
+        self.span = timedelta(days=options["days"])
+
+        create_default_perms()
+        create_default_roles()
+        self.roles = dict(Role.objects.values_list("name", "id"))
+
+        self.seed_users(options["users"])
+        self.seed_cases(options["cases"])
+        self.seed_rewards(max(options["users"] // 10, 1))
+        # bulk_create skips the signals that keep the stats, activity rollups, person index and most-wanted ranking;
+        # the ranking measures open cases up to the current time, so it alone depends on when the command runs
+        rebuild_counters()
+        backfill(timezone.localdate(self.now - self.span), timezone.localdate(self.now), batch_days=366)
+        rebuild_people()
+        refresh_most_wanted()
+        refresh_people()
+
+    def log(self, message):
+        self.stdout.write(message)
+
+    def make_user(self, index, reporting_to=None):
+        return User(
+            username=f"seed_{index}",
+            password=self.password,
+            first_name=self.rng.choice(FIRST_NAMES),
+            last_name=self.rng.choice(LAST_NAMES),
+            email=f"seed_{index}@example.com",
+            national_id=f"U{index:09d}",
+            phone=f"09{self.rng.randrange(10 ** 9):09d}",
+            reporting_to=reporting_to,
+            date_joined=self.now - self.span,
+        )
+
+    def seed_users(self, count):
+        self.password = make_password("password", salt=PASSWORD_SALT)
+        staff_count = count // 5
+        self.staff = {}
+        memberships = []
+        index = 0
+
+        with transaction.atomic():
+            chief = self.make_user(index)
+            index += 1
+            User.objects.bulk_create([chief])
+            self.staff["chief_police"] = [chief]
+
+            # create level by level so every reporting_to target already has a primary key
+            for role_name, share, boss_role in STAFF_LAYOUT:
+                bosses = self.staff.get(boss_role)
+                users = []
+                for _ in range(max(int(staff_count * share), 1)):
+                    users.append(self.make_user(index, self.rng.choice(bosses) if bosses else None))
+                    index += 1
+                User.objects.bulk_create(users, batch_size=self.batch_size)
+                self.staff[role_name] = users
+
+            for role_name, users in self.staff.items():
+                memberships += [
+                    User.roles.through(user_id=user.pk, role_id=self.roles[role_name]) for user in users
+                ]
+            User.roles.through.objects.bulk_create(memberships, batch_size=self.batch_size)
+
+        self.civilians = []
+        while index < count:
+            with transaction.atomic():
+                users = [self.make_user(i) for i in range(index, min(index + self.batch_size, count))]
+                User.objects.bulk_create(users)
+                User.roles.through.objects.bulk_create(
+                    [User.roles.through(user_id=user.pk, role_id=self.roles["base"]) for user in users]
+                    + [User.roles.through(user_id=user.pk, role_id=self.roles["complainant"]) for user in users]
+                )
+            self.civilians += [user.pk for user in users]
+            index += len(users)
+        self.civilian_ids = set(self.civilians)
+
+        user_roles_changed(None)
+        rebuild_chain_paths()
+        self.log(f"Created {count} users")
+
+    def pick(self, role_name):
+        return self.rng.choice(self.staff[role_name]).pk
+
+    def random_moment(self, after=None):
+        start = after or self.now - self.span
+        return start + (self.now - start) * self.rng.random()
+
+    def seed_cases(self, count):
+        people = max(count // 3, 1)
+        created = 0
+
+        with explicit_timestamps(
+                Case._meta.get_field("created_at"),
+                WorkflowHistory._meta.get_field("timestamp"),
+                Evidence._meta.get_field("recorded_at"),
+                Investigation._meta.get_field("created_at"),
+        ):
+            while created < count:
+                size = min(self.batch_size, count - created)
+                with transaction.atomic():
+                    self.seed_case_batch(size, people)
+                created += size
+                self.log(f"Created {created}/{count} cases")
+        rebuild_workloads()
+
+    def seed_case_batch(self, size, people):
+        statuses, weights = zip(*STATUS_MIX)
+        cases = []
+        for status in self.rng.choices(statuses, weights, k=size):
+            civilian = self.rng.random() < 0.7
+            created_at = self.random_moment()
+            case = Case(
+                title=f"{self.rng.choice(CRIMES)} near {self.rng.choice(PLACES)}",
+                description=f"Reported {self.rng.choice(CRIMES).lower()} involving a {self.rng.choice(COLORS)} "
+                            f"{self.rng.choice(VEHICLES).lower()} at {self.rng.choice(PLACES)}.",
+                level=self.rng.choice(CrimeLevel.values),
+                created_at=created_at,
+                created_by_id=self.rng.choice(self.civilians) if civilian else self.pick("police_officer"),
+                status=status,
+            )
+            if status == CaseStatus.CLOSED:
+                case.closed_at = self.random_moment(created_at)
+            cases.append(case)
+        Case.objects.bulk_create(cases)
+
+        histories, complainants, evidences, suspects = [], [], [], []
+        histories_of = {}
+        for case in cases:
+            if case.created_by_id in self.civilian_ids:
+                complainants.append(Case.complainants.through(case_id=case.pk, user_id=case.created_by_id))
+            case_histories = self.history_for(case)
+            if case_histories:
+                histories_of[case] = case_histories
+            histories += case_histories
+            evidences += self.evidences_for(case)
+            suspects += self.suspects_for(case, people)
+
+        WorkflowHistory.objects.bulk_create(histories)
+        for case, rows in histories_of.items():
+            case.current_assignee_id = rows[-1].recipient_id
+            case.last_workflow = rows[-1]
+            case.rejection_count = sum(row.recipient_id == case.created_by_id for row in rows)
+        Case.objects.bulk_update(histories_of, ["current_assignee", "last_workflow", "rejection_count"], batch_size=1000)
+        Case.complainants.through.objects.bulk_create(complainants)
+        Evidence.objects.bulk_create(evidences)
+        Suspect.objects.bulk_create(suspects)
+        Investigation.objects.bulk_create([
+            Investigation(
+                suspect=suspect,
+                investigator_id=self.pick("detective"),
+                score=self.rng.randint(1, 10),
+                created_at=self.random_moment(),
+            )
+            for suspect in suspects if self.rng.random() < 0.5
+        ])
+
+    def history_for(self, case):
+        """
+        Workflow rows a case in its status would have collected going through CaseViewSet.workflow.
+        """
+        moment = case.created_at
+        recipients = []
+        cadet = self.pick("cadet")
+        officer = self.pick("police_officer")
+
+        if case.status == CaseStatus.CANCELLED:
+            recipients = [(cadet, None), (case.created_by_id, "Missing details")] * 2
+            recipients += [(cadet, None), (case.created_by_id, None)]
+        elif case.status == CaseStatus.PENDING_APPROVAL:
+            recipients = [(cadet, None)]
+        elif case.status in (CaseStatus.PENDING_VERIFICATION, CaseStatus.OPEN, CaseStatus.CLOSED):
+            recipients = [(cadet, None), (officer, None)]
+
+        rows = []
+        for recipient, message in recipients:
+            moment = self.random_moment(moment)
+            rows.append(WorkflowHistory(case=case, recipient_id=recipient, message=message, timestamp=moment))
+        return rows
+
+    def evidences_for(self, case):
+        rows = []
+        for _ in range(self.rng.choice((0, 1, 1, 2, 3))):
+            evidence_type = self.rng.choice(EvidenceType.values)
+            if evidence_type == EvidenceType.VEHICLE:
+                metadata = {
+                    "plate": f"{self.rng.randint(10, 99)}{self.rng.choice('ABCDEFGHJK')}"
+                             f"{self.rng.randint(100, 999)}-{self.rng.randint(10, 99)}",
+                    "model": self.rng.choice(VEHICLES),
+                    "color": self.rng.choice(COLORS),
+                }
+            elif evidence_type == EvidenceType.ID:
+                metadata = {
+                    "document_number": f"D{self.rng.randrange(10 ** 8):08d}",
+                    "owner": f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+                }
+            elif evidence_type == EvidenceType.MEDICAL:
+                metadata = {"examiner": self.rng.choice(LAST_NAMES), "blood_type": self.rng.choice("ABO")}
+            elif evidence_type == EvidenceType.TESTIMONY:
+                metadata = {"witness": f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"}
+            else:
+                metadata = {}
+            rows.append(Evidence(
+                case=case,
+                type=evidence_type,
+                title=f"{EvidenceType(evidence_type).label} for {case.title}",
+                description=f"Collected at {self.rng.choice(PLACES)}.",
+                metadata=metadata,
+                recorded_by_id=self.pick("forensic"),
+                recorded_at=self.random_moment(case.created_at),
+            ))
+        return rows
+
+    def suspects_for(self, case, people):
+        rows = []
+        for _ in range(self.rng.choice((0, 0, 1, 1, 2))):
+            # people recur across cases, so the same national_id shows up more than once
+            person = self.rng.randrange(people)
+            person_rng = random.Random(person)
+            rows.append(Suspect(
+                case=case,
+                national_id=f"P{person:09d}",
+                first_name=person_rng.choice(FIRST_NAMES),
+                last_name=person_rng.choice(LAST_NAMES),
+                status=self.rng.choice(SuspectStatus.values),
+            ))
+        return rows
+
+    def seed_rewards(self, count):
+        with explicit_timestamps(Reward._meta.get_field("created_at")):
+            Reward.objects.bulk_create(
+                [
+                    Reward(
+                        user_id=self.rng.choice(self.civilians),
+                        unique_code=f"{self.rng.getrandbits(128):032x}",
+                        amount=self.rng.randrange(1, 1000) * 1_000_000,
+                        claimed=self.rng.random() < 0.5,
+                        created_at=self.random_moment(),
+                    )
+                    for _ in range(count)
+                ],
+                batch_size=self.batch_size,
+            )
+        self.log(f"Created {count} rewards")
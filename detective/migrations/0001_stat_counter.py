@@ -0,0 +1,51 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:10
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# cases.models.CaseStatus and CrimeLevel values as of this migration
+CASE_STATUSES = ['open', 'cancelled', 'closed', 'pending_approval', 'pending_verification', 'created']
+CRIME_LEVELS = [3, 2, 1, 0]
+
+
+def backfill_counters(apps, schema_editor):
+    # detective.stats.rebuild_counters as of this migration, into the new, empty table
+    StatCounter = apps.get_model('detective', 'StatCounter')
+    Case = apps.get_model('cases', 'Case')
+    User = apps.get_model('accounts', 'User')
+    Role = apps.get_model('accounts', 'Role')
+
+    values = {'cases.total': Case.objects.count(), 'users.total': User.objects.count()}
+    values.update((f'cases.status.{status}', 0) for status in CASE_STATUSES)
+    values.update((f'cases.level.{level}', 0) for level in CRIME_LEVELS)
+    for status, total in Case.objects.order_by().values_list('status').annotate(total=Count('pk')):
+        values[f'cases.status.{status}'] = total
+    for level, total in Case.objects.order_by().values_list('level').annotate(total=Count('pk')):
+        values[f'cases.level.{level}'] = total
+    values.update((f'users.role.{role_name}', 0) for role_name in Role.objects.values_list('name', flat=True))
+    memberships = User.roles.through.objects.order_by().values_list('role__name').annotate(total=Count('pk'))
+    values.update((f'users.role.{role_name}', total) for role_name, total in memberships)
+
+    StatCounter.objects.bulk_create([StatCounter(name=name, value=value) for name, value in values.items()])
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0007_user_workload'),
+        ('cases', '0011_case_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:15
+
+from datetime import datetime, time, timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+# cases.models.CrimeLevel values as of this migration
+CRIME_LEVELS = [3, 2, 1, 0]
+
+
+def _day_counts(queryset, moment):
+    rows = (
+        queryset.annotate(day=TruncDate(moment)).order_by()
+        .values_list('day', 'level').annotate(total=Count('pk'))
+    )
+    return {(day, level): total for day, level, total in rows}
+
+
+def backfill_activity(apps, schema_editor):
+    # detective.rollups.backfill as of this migration: every day from the first case through today, into the new,
+    # empty table
+    DailyCaseActivity = apps.get_model('detective', 'DailyCaseActivity')
+    Case = apps.get_model('cases', 'Case')
+
+    first = Case.objects.aggregate(first=Min('created_at'))['first']
+    if first is None:
+        return
+    since, until = timezone.localdate(first), timezone.localdate()
+    end = timezone.make_aware(datetime.combine(until + timedelta(days=1), time.min))
+
+    handed_over = Coalesce('last_workflow__timestamp', 'created_at')
+    counts = {
+        'created': _day_counts(Case.objects.all(), 'created_at'),
+        'opened': _day_counts(
+            Case.objects.filter(status__in=['open', 'closed']).alias(moment=handed_over).filter(moment__lt=end),
+            handed_over,
+        ),
+        'closed': _day_counts(Case.objects.filter(status='closed', closed_at__lt=end), 'closed_at'),
+        'cancelled': _day_counts(
+            Case.objects.filter(status='cancelled').alias(moment=handed_over).filter(moment__lt=end), handed_over,
+        ),
+    }
+
+    rows = []
+    day = since
+    while day <= until:
+        for level in CRIME_LEVELS:
+            rows.append(DailyCaseActivity(
+                day=day, level=level, **{field: counts[field].get((day, level), 0) for field in counts}
+            ))
+        day += timedelta(days=1)
+    DailyCaseActivity.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0011_case_version'),
+        ('detective', '0001_stat_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCaseActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('level', models.IntegerField(choices=[(3, 'Level 3'), (2, 'Level 2'), (1, 'Level 1'), (0, 'Critical')])),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('opened', models.PositiveIntegerField(default=0)),
+                ('closed', models.PositiveIntegerField(default=0)),
+                ('cancelled', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day', 'level'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'level'), name='dailycaseactivity_day_level_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
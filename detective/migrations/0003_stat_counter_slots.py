@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-17 21:22
+
+from django.db import migrations, models
+
+# detective.stats.SLOTS as of this migration
+SLOTS = 8
+
+
+def add_slots(apps, schema_editor):
+    # every count stays whole in slot 0, its former row
+    StatCounter = apps.get_model('detective', 'StatCounter')
+    names = StatCounter.objects.values_list('name', flat=True)
+    StatCounter.objects.bulk_create(
+        [StatCounter(name=name, slot=slot, value=0) for name in names for slot in range(1, SLOTS)],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detective', '0002_daily_case_activity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='statcounter',
+            name='slot',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='statcounter',
+            name='name',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AddConstraint(
+            model_name='statcounter',
+            constraint=models.UniqueConstraint(fields=('name', 'slot'), name='statcounter_name_slot_unique'),
+        ),
+        migrations.RunPython(add_slots, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,44 @@
 from django.db import models
 
-# Create your models here.
+from cases.models import CrimeLevel
+
+
+class StatCounter(models.Model):
+    """
+    One slot of a named count behind the stats endpoints, kept up to date by detective.stats. The count is the
+    sum of its slots.
+    """
+    name = models.CharField(max_length=100)
+    slot = models.PositiveSmallIntegerField(default=0)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["name", "slot"], name="statcounter_name_slot_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.name}[{self.slot}] = {self.value}"
+
+
+class DailyCaseActivity(models.Model):
+    """
+    Cases created, opened, closed and cancelled on one day at one crime level, kept up to date by
+    detective.rollups.
+    """
+    day = models.DateField()
+    level = models.IntegerField(choices=CrimeLevel.choices)
+    created = models.PositiveIntegerField(default=0)
+    opened = models.PositiveIntegerField(default=0)
+    closed = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["day", "level"]
+        constraints = [
+            # also the index behind date range reads
+            models.UniqueConstraint(fields=["day", "level"], name="dailycaseactivity_day_level_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} level {self.level}"
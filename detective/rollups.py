@@ -0,0 +1,205 @@
+"""
+Cases created, opened, closed and cancelled per day and crime level, kept in DailyCaseActivity rows so activity
+charts read one row per day and level instead of aggregating the case table.
+
+Events are recorded as they happen: a creation on the day of the case's created_at, a status change on the day
+it is made, at the level the case has at that moment. Deleting a case leaves its past activity in place.
+backfill() recomputes a range of days from the case table, for history from before the rollups existed and for
+cases written around the signals (bulk loads, raw SQL). The recomputation is approximate where the recorded
+events are exact, and it replaces whatever a day holds, so by default it stays off the days already rolled up.
+"""
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Min, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from cases.models import CaseStatus, CrimeLevel
+from .models import DailyCaseActivity
+
+FIELDS = ("created", "opened", "closed", "cancelled")
+
+# status a case moves into -> the event counted for it
+EVENTS = {
+    CaseStatus.OPEN: "opened",
+    CaseStatus.CLOSED: "closed",
+    CaseStatus.CANCELLED: "cancelled",
+}
+
+
+def record(events):
+    """
+    Add a Counter of (day, level, field) events to the rollup rows, one UPDATE per day and level.
+    """
+    rows = {}
+    for (day, level, field), count in events.items():
+        if count:
+            rows.setdefault((day, level), {})[field] = count
+
+    for (day, level), counts in rows.items():
+        updates = {field: F(field) + count for field, count in counts.items()}
+        row = DailyCaseActivity.objects.filter(day=day, level=level)
+        if not row.update(**updates):
+            # first event of the day at this level; the row may also be created concurrently, so create it
+            # empty and count through the same UPDATE
+            DailyCaseActivity.objects.bulk_create([DailyCaseActivity(day=day, level=level)], ignore_conflicts=True)
+            row.update(**updates)
+
+
+def record_case_save(instance, created, **kwargs):
+    events = Counter()
+    if created:
+        day = timezone.localdate(instance.created_at)
+        events[(day, instance.level, "created")] += 1
+        if instance.status in EVENTS:
+            events[(day, instance.level, EVENTS[instance.status])] += 1
+    else:
+        old_status = getattr(instance, "_loaded_status", None)
+        if old_status is not None and old_status != instance.status and instance.status in EVENTS:
+            events[(timezone.localdate(), instance.level, EVENTS[instance.status])] += 1
+    record(events)
+
+
+def record_case_moves(moves, **kwargs):
+    today = timezone.localdate()
+    events = Counter()
+    for (old_status, new_status, level), count in moves.items():
+        if old_status != new_status and new_status in EVENTS:
+            events[(today, level, EVENTS[new_status])] += count
+    record(events)
+
+
+def series(since, until, level=None):
+    """
+    One entry per day of since..until, both included, summed over levels unless level is given. Reads only the
+    rollup rows of the range.
+    """
+    rows = DailyCaseActivity.objects.filter(day__gte=since, day__lte=until)
+    if level is not None:
+        rows = rows.filter(level=level)
+    totals = {
+        row["day"]: row
+        for row in rows.order_by().values("day").annotate(**{field: Sum(field) for field in FIELDS})
+    }
+    empty = dict.fromkeys(FIELDS, 0)
+    days = []
+    day = since
+    while day <= until:
+        days.append(totals.get(day) or {"day": day, **empty})
+        day += timedelta(days=1)
+    return days
+
+
+def _day_counts(queryset, moment):
+    """
+    {(day, level): count} of queryset, dated by the moment expression.
+    """
+    rows = (
+        queryset.annotate(day=TruncDate(moment)).order_by()
+        .values_list("day", "level").annotate(total=Count("pk"))
+    )
+    return {(day, level): total for day, level, total in rows}
+
+
+def _bounds(since, until):
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(since, time.min), tz),
+        timezone.make_aware(datetime.combine(until + timedelta(days=1), time.min), tz),
+    )
+
+
+def rollup_days(since, until, activity_model=None, case_model=None):
+    """
+    Recompute the rows of the days since..until, both included, from the case table, replacing what they held.
+    Idempotent, so a range can be rolled up again at any time.
+
+    The workflow does not timestamp the move to OPEN or CANCELLED; those are dated by the case's last workflow
+    hand-off, or its creation when it has none. Closing is dated by closed_at.
+    """
+    if activity_model is None:
+        from cases.models import Case as case_model
+        activity_model = DailyCaseActivity
+
+    start, end = _bounds(since, until)
+    # no event predates the creation of its case
+    cases = case_model.objects.filter(created_at__lt=end)
+    handed_over = Coalesce("last_workflow__timestamp", "created_at")
+    counts = {
+        "created": _day_counts(cases.filter(created_at__gte=start), "created_at"),
+        "opened": _day_counts(
+            cases.filter(status__in=[CaseStatus.OPEN, CaseStatus.CLOSED])
+            .alias(moment=handed_over).filter(moment__gte=start, moment__lt=end),
+            handed_over,
+        ),
+        "closed": _day_counts(
+            cases.filter(status=CaseStatus.CLOSED, closed_at__gte=start, closed_at__lt=end), "closed_at"
+        ),
+        "cancelled": _day_counts(
+            cases.filter(status=CaseStatus.CANCELLED)
+            .alias(moment=handed_over).filter(moment__gte=start, moment__lt=end),
+            handed_over,
+        ),
+    }
+
+    rows = []
+    day = since
+    while day <= until:
+        for level in CrimeLevel.values:
+            rows.append(activity_model(
+                day=day, level=level, **{field: counts[field].get((day, level), 0) for field in FIELDS}
+            ))
+        day += timedelta(days=1)
+    activity_model.objects.bulk_create(
+        rows, batch_size=1000,
+        update_conflicts=True, unique_fields=["day", "level"], update_fields=list(FIELDS),
+    )
+
+
+def pending_range(activity_model=None, case_model=None):
+    """
+    The days a backfill with no explicit range covers: from the first case up to the oldest rolled-up day,
+    excluded, or through today when nothing is rolled up yet. The rolled-up days are left alone: their events
+    were recorded as they happened, and today's are still being recorded. None when there is nothing to do.
+    """
+    if activity_model is None:
+        from cases.models import Case as case_model
+        activity_model = DailyCaseActivity
+
+    first = case_model.objects.aggregate(first=Min("created_at"))["first"]
+    if first is None:
+        return None
+    since = timezone.localdate(first)
+    oldest = activity_model.objects.aggregate(day=Min("day"))["day"]
+    until = timezone.localdate() if oldest is None else oldest - timedelta(days=1)
+    return (since, until) if since <= until else None
+
+
+def backfill(since=None, until=None, batch_days=31, activity_model=None, case_model=None, log=None):
+    """
+    Roll up since..until in batches of batch_days, newest first, each in its own transaction. Missing bounds
+    come from pending_range(), so an interrupted run carries on from where it stopped. Returns the number of
+    days rolled up.
+
+    A range including today races the events recorded meanwhile; pass one only while cases are not being
+    written.
+    """
+    if since is None or until is None:
+        pending = pending_range(activity_model, case_model)
+        if pending is None:
+            return 0
+        since = since or pending[0]
+        until = until or pending[1]
+
+    days = 0
+    while since <= until:
+        batch_since = max(until - timedelta(days=batch_days - 1), since)
+        with transaction.atomic():
+            rollup_days(batch_since, until, activity_model, case_model)
+        days += (until - batch_since).days + 1
+        if log:
+            log(f"Rolled up {batch_since} to {until}")
+        until = batch_since - timedelta(days=1)
+    return days
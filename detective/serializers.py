@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import serializers
+
+from cases.models import CrimeLevel
+
+
+class CaseStatsSerializer(serializers.Serializer):
+    total = serializers.IntegerField()
+    solved = serializers.IntegerField()
+    active = serializers.IntegerField()
+    by_status = serializers.DictField(child=serializers.IntegerField())
+    by_level = serializers.DictField(child=serializers.IntegerField())
+
+
+class UserStatsSerializer(serializers.Serializer):
+    total = serializers.IntegerField()
+    employees = serializers.IntegerField()
+    by_role = serializers.DictField(child=serializers.IntegerField())
+
+
+class StatsSummarySerializer(serializers.Serializer):
+    cases = CaseStatsSerializer()
+    users = UserStatsSerializer()
+
+
+class ActivityQuerySerializer(serializers.Serializer):
+    # longest range one request may read
+    max_days = 366
+
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+    level = serializers.ChoiceField(choices=CrimeLevel.choices, required=False)
+
+    def validate(self, attrs):
+        until = attrs.setdefault("until", timezone.localdate())
+        since = attrs.setdefault("since", until - timedelta(days=29))
+        if since > until:
+            raise serializers.ValidationError("since must not be after until.")
+        if (until - since).days >= self.max_days:
+            raise serializers.ValidationError(f"At most {self.max_days} days can be read at once.")
+        return attrs
+
+
+class DailyActivitySerializer(serializers.Serializer):
+    day = serializers.DateField()
+    created = serializers.IntegerField()
+    opened = serializers.IntegerField()
+    closed = serializers.IntegerField()
+    cancelled = serializers.IntegerField()
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    type = serializers.ChoiceField(choices=["case", "evidence"], required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class SearchHitSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    case = serializers.IntegerField()
+    title = serializers.CharField()
+    rank = serializers.FloatField()
+
+
+class SearchResultsSerializer(serializers.Serializer):
+    cases = SearchHitSerializer(many=True)
+    evidence = SearchHitSerializer(many=True)
@@ -0,0 +1,220 @@
+"""
+Counts of cases per status and level and of users per role, kept in StatCounter rows so the stats endpoints
+read a handful of rows instead of counting whole tables. Each count is spread over SLOTS rows: a bump adds to one
+of them at random and reads sum them, so workflow transactions bumping the same count rarely wait on each other's
+row locks.
+
+Case counters follow Case saves and deletes and the case_moved signal of workflow transitions; user counters
+follow user creation and deletion, User.roles changes and roles_bulk_changed. Data written around those paths
+(bulk loads, raw SQL) is brought back in line with rebuild_counters().
+"""
+import random
+from collections import Counter
+
+from django.db.models import Count, F, Sum, Value, When
+from django.db.models import Case as CaseWhen
+
+from .models import StatCounter
+
+CASES_TOTAL = "cases.total"
+USERS_TOTAL = "users.total"
+SLOTS = 8
+
+
+def case_status_key(status):
+    return f"cases.status.{status}"
+
+
+def case_level_key(level):
+    return f"cases.level.{level}"
+
+
+def role_key(role_name):
+    return f"users.role.{role_name}"
+
+
+def bump(changes):
+    """
+    Add a {counter name: delta} mapping to one slot of the counters in one UPDATE, creating counters seen for the
+    first time.
+    """
+    changes = {name: delta for name, delta in changes.items() if delta}
+    if not changes:
+        return
+    slot = random.randrange(SLOTS)
+    delta = CaseWhen(*[When(name=name, then=Value(value)) for name, value in changes.items()], default=Value(0))
+    updated = StatCounter.objects.filter(name__in=changes, slot=slot).update(value=F("value") + delta)
+    if updated < len(changes):
+        existing = set(StatCounter.objects.filter(name__in=changes, slot=slot).values_list("name", flat=True))
+        StatCounter.objects.bulk_create(
+            [
+                StatCounter(name=name, slot=other, value=value if other == slot else 0)
+                for name, value in changes.items() if name not in existing
+                for other in range(SLOTS)
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def read_counters():
+    return dict(StatCounter.objects.values("name").annotate(total=Sum("value")).values_list("name", "total"))
+
+
+def _counter_rows(counter_model, values):
+    # the whole count in slot 0 and every other slot at zero, so that bump() finds the row of any slot
+    return [
+        counter_model(name=name, slot=slot, value=value if slot == 0 else 0)
+        for name, value in values.items()
+        for slot in range(SLOTS)
+    ]
+
+
+def rebuild_counters(counter_model=None, case_model=None, user_model=None):
+    """
+    Recompute every counter from the case and user tables. Every status and level gets its rows, even at zero,
+    so that bump() finds the rows it updates.
+    """
+    from cases.models import CaseStatus, CrimeLevel
+
+    if counter_model is None:
+        from accounts.models import User as user_model
+        from cases.models import Case as case_model
+        counter_model = StatCounter
+
+    values = {CASES_TOTAL: case_model.objects.count(), USERS_TOTAL: user_model.objects.count()}
+    values.update((case_status_key(status), 0) for status in CaseStatus.values)
+    values.update((case_level_key(level), 0) for level in CrimeLevel.values)
+    for status, total in case_model.objects.order_by().values_list("status").annotate(total=Count("pk")):
+        values[case_status_key(status)] = total
+    for level, total in case_model.objects.order_by().values_list("level").annotate(total=Count("pk")):
+        values[case_level_key(level)] = total
+    values.update(_role_counts(user_model))
+
+    counter_model.objects.exclude(name__in=values).delete()
+    counter_model.objects.bulk_create(
+        _counter_rows(counter_model, values),
+        update_conflicts=True, unique_fields=["name", "slot"], update_fields=["value"],
+    )
+
+
+def _role_counts(user_model):
+    role_model = user_model._meta.get_field("roles").related_model
+    values = {role_key(role_name): 0 for role_name in role_model.objects.values_list("name", flat=True)}
+    memberships = user_model.roles.through.objects.order_by().values_list("role__name").annotate(total=Count("pk"))
+    values.update((role_key(role_name), total) for role_name, total in memberships)
+    return values
+
+
+def rebuild_role_counters(**kwargs):
+    from accounts.models import User
+
+    values = _role_counts(User)
+    StatCounter.objects.filter(name__startswith=role_key("")).exclude(name__in=values).delete()
+    StatCounter.objects.bulk_create(
+        _counter_rows(StatCounter, values),
+        update_conflicts=True, unique_fields=["name", "slot"], update_fields=["value"],
+    )
+
+
+def count_case_on_save(instance, created, **kwargs):
+    changes = Counter()
+    if created:
+        changes.update([CASES_TOTAL, case_status_key(instance.status), case_level_key(instance.level)])
+    else:
+        # a value not loaded from the row (deferred field) cannot have been changed by this save
+        old_status = getattr(instance, "_loaded_status", None)
+        if old_status is not None and old_status != instance.status:
+            changes[case_status_key(old_status)] -= 1
+            changes[case_status_key(instance.status)] += 1
+        old_level = getattr(instance, "_loaded_level", None)
+        if old_level is not None and old_level != instance.level:
+            changes[case_level_key(old_level)] -= 1
+            changes[case_level_key(instance.level)] += 1
+    bump(changes)
+
+
+def count_case_on_delete(instance, **kwargs):
+    bump({CASES_TOTAL: -1, case_status_key(instance.status): -1, case_level_key(instance.level): -1})
+
+
+def count_case_moves(moves, **kwargs):
+    changes = Counter()
+    for (old_status, new_status, _), count in moves.items():
+        changes[case_status_key(old_status)] -= count
+        changes[case_status_key(new_status)] += count
+    bump(changes)
+
+
+def count_user_on_save(instance, created, **kwargs):
+    if created:
+        bump({USERS_TOTAL: 1})
+
+
+def count_user_on_delete(instance, **kwargs):
+    # runs before the delete cascades to the user's role memberships
+    changes = Counter({USERS_TOTAL: -1})
+    for role_name in instance.roles.values_list("name", flat=True):
+        changes[role_key(role_name)] -= 1
+    bump(changes)
+
+
+def count_role_memberships(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """
+    m2m_changed receiver for User.roles, from either side.
+    """
+    from accounts.models import Role
+
+    if action == "post_add":
+        # pk_set holds only the memberships actually added
+        if reverse:
+            bump({role_key(instance.name): len(pk_set)})
+        else:
+            role_names = Role.objects.filter(pk__in=pk_set).values_list("name", flat=True)
+            bump({role_key(role_name): 1 for role_name in role_names})
+    elif action == "pre_remove":
+        # pk_set holds what the caller passed, held or not; count the memberships that are there to remove
+        if reverse:
+            held = sender.objects.filter(role_id=instance.pk, user_id__in=pk_set).values_list("role__name")
+        else:
+            held = sender.objects.filter(user_id=instance.pk, role_id__in=pk_set).values_list("role__name")
+        removed = Counter()
+        for role_name, in held:
+            removed[role_key(role_name)] -= 1
+        instance._removed_memberships = removed
+    elif action == "post_remove":
+        bump(instance.__dict__.pop("_removed_memberships", {}))
+    elif action == "pre_clear":
+        if reverse:
+            bump({role_key(instance.name): -instance.user_set.count()})
+        else:
+            bump({role_key(role_name): -1 for role_name in instance.roles.values_list("name", flat=True)})
+
+
+def summary():
+    """
+    Every stat served by the API, from one read of the counters table.
+    """
+    from cases.models import CaseStatus, CrimeLevel
+
+    counters = read_counters()
+    by_status = {status: counters.get(case_status_key(status), 0) for status in CaseStatus.values}
+    by_role = {
+        name[len(role_key("")):]: value for name, value in counters.items() if name.startswith(role_key(""))
+    }
+    users_total = counters.get(USERS_TOTAL, 0)
+    cases_total = counters.get(CASES_TOTAL, 0)
+    return {
+        "cases": {
+            "total": cases_total,
+            "solved": by_status[CaseStatus.CLOSED],
+            "active": cases_total - by_status[CaseStatus.CLOSED] - by_status[CaseStatus.CANCELLED],
+            "by_status": by_status,
+            "by_level": {str(level): counters.get(case_level_key(level), 0) for level in CrimeLevel.values},
+        },
+        "users": {
+            "total": users_total,
+            # everyone without the civilian base role, as num_employees always counted
+            "employees": users_total - by_role.get("base", 0),
+            "by_role": by_role,
+        },
+    }
@@ -0,0 +1,282 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.db.models import Max
+from django.test import TestCase
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User
+from accounts.signals import user_roles_changed
+from common.admin import EstimatedCountPaginator
+from cases import workflow
+from cases.models import Case, CaseStatus, CrimeLevel, WorkflowHistory
+from evidences.models import Evidence
+from rewards.models import Reward
+from suspects.models import Suspect, SuspectStatus
+from . import rollups, stats
+from .models import DailyCaseActivity, StatCounter
+from .stats import CASES_TOTAL, bump, read_counters, rebuild_counters, summary
+
+
+class QueryPlanTest(TestCase):
+    """
+    The hot queries are answered from the indexes declared for them.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="user", password="password", national_id="user")
+        cls.case = Case.objects.create(title="Case", description="-", created_by=cls.user)
+        WorkflowHistory.objects.create(case=cls.case, recipient=cls.user)
+        Suspect.objects.create(case=cls.case, national_id="0012345678", first_name="Roy", last_name="Earle")
+        Evidence.objects.create(case=cls.case, type="other", title="Evidence", description="-", recorded_by=cls.user)
+        Reward.objects.create(user=cls.user, unique_code="code", amount=1, claimed=True)
+
+    def assertUsesIndex(self, queryset, index_name):
+        if connection.vendor == "postgresql":
+            # tables this small are cheaper to scan, so make the planner show which index it would pick
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+
+    def test_cases_by_status(self):
+        self.assertUsesIndex(Case.objects.filter(status=CaseStatus.OPEN)[:10], "case_status_created_idx")
+
+    def test_cases_by_level(self):
+        self.assertUsesIndex(Case.objects.filter(level=CrimeLevel.CRITICAL).order_by(), "case_level_status_idx")
+
+    def test_latest_workflow_entry_of_case(self):
+        self.assertUsesIndex(WorkflowHistory.objects.filter(case=self.case).order_by("-id")[:1],
+                             "workflow_case_latest_idx")
+        self.assertUsesIndex(WorkflowHistory.objects.values("case").annotate(last_id=Max("id")),
+                             "workflow_case_latest_idx")
+
+    def test_workflow_entries_of_recipient(self):
+        self.assertUsesIndex(WorkflowHistory.objects.filter(recipient=self.user).values("case_id"),
+                             "workflow_recipient_case_idx")
+
+    def test_suspects_of_case_by_status(self):
+        self.assertUsesIndex(Suspect.objects.filter(case=self.case, status=SuspectStatus.GUILTY),
+                             "suspect_case_status_idx")
+
+    def test_suspects_by_national_id(self):
+        # the index db_index=True names after the table and column
+        self.assertUsesIndex(Suspect.objects.filter(national_id="0012345678"), "suspects_suspect_national_id_78a6fdb3")
+
+    def test_evidence_of_case(self):
+        self.assertUsesIndex(Evidence.objects.filter(case=self.case)[:10], "evidence_case_recorded_idx")
+
+    def test_evidence_by_plate(self):
+        self.assertUsesIndex(Evidence.objects.filter(plate="12B345-67"), "evidence_plate_idx")
+
+    def test_claimed_rewards_of_user(self):
+        self.assertUsesIndex(self.user.rewards.filter(claimed=True)[:10], "reward_claimed_history_idx")
+
+
+class EstimatedCountTest(TestCase):
+
+    def test_partial_indexes_do_not_shrink_the_estimate(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("reads sqlite_stat1")
+        user = User.objects.create_user(username="user", password="password", national_id="user")
+        case = Case.objects.create(title="Case", description="-", created_by=user)
+        Evidence.objects.bulk_create([
+            Evidence(case=case, type=evidence_type, title="Evidence", description="-", recorded_by=user,
+                     metadata={"plate": f"{index}"})
+            for index, evidence_type in enumerate(["vehicle"] * 2 + ["other"] * 8)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE evidences_evidence")
+        self.assertEqual(EstimatedCountPaginator.estimated_rows("default", "evidences_evidence"), 10)
+
+
+class StatCounterTest(TestCase):
+    """
+    The maintained counters agree with a recount after every kind of change.
+    """
+
+    def setUp(self):
+        self.complainant = User.objects.create_user(username="complainant", password="password",
+                                                    national_id="complainant")
+        self.cadet = User.objects.create_user(username="cadet", password="password", national_id="cadet")
+        self.complainant.roles.add(Role.objects.get(name="complainant"), Role.objects.get(name="base"))
+        self.cadet.roles.add(Role.objects.get(name="cadet"))
+
+    def assertCountersMatchRebuild(self):
+        maintained = {name: value for name, value in read_counters().items() if value}
+        rebuild_counters()
+        self.assertEqual(maintained, {name: value for name, value in read_counters().items() if value})
+
+    def test_case_lifecycle(self):
+        case = Case.objects.create(title="Case", description="-", created_by=self.complainant,
+                                   level=CrimeLevel.LEVEL_2)
+        case.send_to_cadet()
+        case = Case.objects.select_related("created_by").get(pk=case.pk)
+        self.assertEqual(workflow.advance(case, User.objects.get(pk=self.cadet.pk), "fail", "Missing info")[0], 200)
+        self.assertEqual(summary()["cases"]["by_status"][CaseStatus.CREATED], 1)
+        self.assertCountersMatchRebuild()
+
+        case = Case.objects.get(pk=case.pk)
+        case.level = CrimeLevel.CRITICAL
+        case.save()
+        self.assertEqual(summary()["cases"]["by_level"], {"3": 0, "2": 0, "1": 0, "0": 1})
+        self.assertCountersMatchRebuild()
+
+        case.delete()
+        self.assertEqual(summary()["cases"]["total"], 0)
+        self.assertCountersMatchRebuild()
+
+    def test_role_changes(self):
+        self.cadet.roles.add(Role.objects.get(name="base"))
+        # memberships that do not exist are not counted off, from either side
+        self.cadet.roles.remove(Role.objects.get(name="admin"))
+        Role.objects.get(name="cadet").user_set.remove(self.cadet, self.complainant)
+        self.assertCountersMatchRebuild()
+        Role.objects.get(name="cadet").user_set.clear()
+        self.complainant.roles.remove(Role.objects.get(name="complainant"))
+        User.roles.through.objects.filter(user=self.complainant).delete()
+        user_roles_changed([self.complainant.pk])
+        self.assertCountersMatchRebuild()
+
+        self.cadet.delete()
+        self.assertEqual(summary()["users"]["by_role"]["base"], 0)
+        self.assertCountersMatchRebuild()
+
+    def test_bumps_spread_over_slots(self):
+        for slot in (2, 5):
+            with mock.patch.object(stats.random, "randrange", return_value=slot):
+                bump({CASES_TOTAL: 1})
+        self.assertEqual(read_counters()[CASES_TOTAL], 2)
+        self.assertEqual(
+            dict(StatCounter.objects.filter(name=CASES_TOTAL).exclude(value=0).values_list("slot", "value")),
+            {2: 1, 5: 1},
+        )
+
+    def test_summary_endpoint(self):
+        Case.objects.create(title="Closed", description="-", created_by=self.complainant, status=CaseStatus.CLOSED)
+        Case.objects.create(title="Open", description="-", created_by=self.complainant, status=CaseStatus.OPEN)
+        client = APIClient()
+        user = User.objects.get(pk=self.complainant.pk)
+        self.assertTrue(user.perm_snapshot.has_perm("base"))
+        client.force_authenticate(user)
+
+        with self.assertNumQueries(1):
+            response = client.get(reverse("stats-summary"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["cases"]["solved"], response.data["cases"]["active"]), (1, 1))
+        self.assertEqual(response.data["users"]["employees"], 1)
+
+
+class DailyActivityTest(TestCase):
+    """
+    The rollups follow the workflow and agree with a recomputation of the same days.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="password", national_id="user")
+        self.user.roles.add(Role.objects.get(name="base"))
+        self.today = timezone.localdate()
+
+    def today_activity(self, level=None):
+        return rollups.series(self.today, self.today, level)[0]
+
+    def test_lifecycle_and_recompute(self):
+        case = Case.objects.create(title="Case", description="-", created_by=self.user, level=CrimeLevel.LEVEL_1)
+        case.open_case()
+        case.closed_at = timezone.now()
+        case.save()
+        case.move_to(CaseStatus.CLOSED)
+        Case.objects.create(title="Other", description="-", created_by=self.user, status=CaseStatus.CANCELLED)
+
+        maintained = self.today_activity()
+        self.assertEqual(maintained, {"day": self.today, "created": 2, "opened": 1, "closed": 1, "cancelled": 1})
+        self.assertEqual(self.today_activity(CrimeLevel.LEVEL_1)["cancelled"], 0)
+
+        # today is rolled up already, so a default backfill leaves it alone
+        self.assertEqual(rollups.backfill(), 0)
+        self.assertEqual(rollups.backfill(self.today, self.today), 1)
+        self.assertEqual(self.today_activity(), maintained)
+
+    def test_default_backfill_fills_older_days(self):
+        case = Case.objects.create(title="Case", description="-", created_by=self.user)
+        Case.objects.filter(pk=case.pk).update(created_at=timezone.now() - timedelta(days=3))
+        DailyCaseActivity.objects.filter(day=self.today).update(created=5)
+
+        self.assertEqual(rollups.backfill(batch_days=2), 3)
+        three_days_ago = self.today - timedelta(days=3)
+        self.assertEqual(rollups.series(three_days_ago, three_days_ago)[0]["created"], 1)
+        self.assertEqual(self.today_activity()["created"], 5)
+        self.assertEqual(rollups.backfill(), 0)
+
+    def test_endpoint(self):
+        Case.objects.create(title="Case", description="-", created_by=self.user)
+        client = APIClient()
+        user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(user.perm_snapshot.has_perm("base"))
+        client.force_authenticate(user)
+
+        with self.assertNumQueries(1):
+            response = client.get(reverse("stats-activity"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 30)
+        self.assertEqual((response.data[-1]["day"], response.data[-1]["created"]), (str(self.today), 1))
+
+        response = client.get(reverse("stats-activity"), {"since": "2020-01-01", "until": "2024-01-01"})
+        self.assertEqual(response.status_code, 400)
+
+
+class SearchTest(TestCase):
+    """
+    The search index follows writes, ranks title matches first and only returns what the caller may see.
+    """
+
+    def setUp(self):
+        self.forensic = User.objects.create_user(username="forensic", password="password", national_id="forensic")
+        self.forensic.roles.add(Role.objects.get(name="forensic"), Role.objects.get(name="base"))
+        self.other = User.objects.create_user(username="other", password="password", national_id="other")
+        self.other.roles.add(Role.objects.get(name="base"))
+
+    def get(self, user, **params):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=user.pk))
+        return client.get(reverse("search"), params)
+
+    def hits(self, user, **params):
+        response = self.get(user, **params)
+        self.assertEqual(response.status_code, 200)
+        return ([("case", hit["id"]) for hit in response.data["cases"]]
+                + [("evidence", hit["id"]) for hit in response.data["evidence"]])
+
+    def test_index_follows_writes(self):
+        case = Case.objects.create(title="Harbour arson", description="-", created_by=self.forensic)
+        self.assertEqual(self.hits(self.forensic, q="arson"), [("case", case.pk)])
+
+        case.title = "Harbour burglary"
+        case.save()
+        self.assertEqual(self.hits(self.forensic, q="arson"), [])
+        self.assertEqual(self.hits(self.forensic, q="harbour burglaries"), [("case", case.pk)])
+
+        case.delete()
+        self.assertEqual(self.hits(self.forensic, q="harbour"), [])
+
+    def test_ranking_and_visibility(self):
+        case = Case.objects.create(title="Stolen revolver", description="-", created_by=self.forensic)
+        mentioned = Case.objects.create(title="Bar fight", description="A revolver was seen", created_by=self.forensic)
+        evidence = Evidence.objects.create(case=case, type="other", title="Revolver", description="-",
+                                           recorded_by=self.forensic)
+        hidden = Case.objects.create(title="Revolver", description="-", created_by=self.other)
+
+        # a title match ranks above a description match; cases and evidence are ranked apart
+        self.assertEqual(self.hits(self.forensic, q="revolver"),
+                         [("case", case.pk), ("case", mentioned.pk), ("evidence", evidence.pk)])
+        self.assertEqual(self.hits(self.forensic, q="revolver", type="evidence"), [("evidence", evidence.pk)])
+        self.assertEqual(self.hits(self.forensic, q="revolver", limit=1),
+                         [("case", case.pk), ("evidence", evidence.pk)])
+
+        # without evidence_read only cases, and only visible ones
+        self.assertEqual(self.hits(self.other, q="revolver"), [("case", hidden.pk)])
+        self.assertEqual(self.get(self.other, q="").status_code, 400)
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .views import case_activity, stats_summary
+
+urlpatterns = [
+    path("summary", stats_summary, name="stats-summary"),
+    path("activity", case_activity, name="stats-activity"),
+]
@@ -1,3 +1,88 @@
-from django.shortcuts import render
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
 
-# Create your views here.
+from cases.models import Case, CrimeLevel, case_visibility
+from common.permissions import has_perm_helper
+from common.search import search as full_text_search
+from evidences.models import Evidence
+from . import rollups
+from .serializers import (
+    ActivityQuerySerializer, DailyActivitySerializer, SearchQuerySerializer, SearchResultsSerializer,
+    StatsSummarySerializer,
+)
+from .stats import summary
+
+
+@extend_schema(
+    summary="Get case and staff statistics",
+    description="Counts of cases per status and crime level and of users per role, read from maintained counters.",
+    tags=["stats"],
+    responses={200: StatsSummarySerializer},
+)
+@api_view(["GET"])
+@permission_classes([has_perm_helper("base")])
+def stats_summary(request):
+    return Response(summary())
+
+
+@extend_schema(
+    summary="Get daily case activity",
+    description="Cases created, opened, closed and cancelled per day, read from the daily rollups. Defaults to "
+                "the last 30 days; at most 366 days per request.",
+    tags=["stats"],
+    parameters=[
+        OpenApiParameter("since", OpenApiTypes.DATE, description="First day, inclusive"),
+        OpenApiParameter("until", OpenApiTypes.DATE, description="Last day, inclusive; defaults to today"),
+        OpenApiParameter("level", int, enum=CrimeLevel.values, description="Only cases of this crime level"),
+    ],
+    responses={200: DailyActivitySerializer(many=True)},
+)
+@api_view(["GET"])
+@permission_classes([has_perm_helper("base")])
+def case_activity(request):
+    ser = ActivityQuerySerializer(data=request.query_params)
+    ser.is_valid(raise_exception=True)
+    days = rollups.series(ser.validated_data["since"], ser.validated_data["until"], ser.validated_data.get("level"))
+    return Response(DailyActivitySerializer(days, many=True).data)
+
+
+@extend_schema(
+    summary="Search cases and evidence",
+    description="Full-text search over the title and description of the cases and evidence you may see. Cases "
+                "and evidence come in separate lists, each best match first: their ranks come from different "
+                "indexes and do not compare. Evidence is searched only with the evidence_read permission.",
+    tags=["search"],
+    parameters=[
+        OpenApiParameter("q", str, required=True, description="Words that must all appear"),
+        OpenApiParameter("type", str, enum=["case", "evidence"], description="Only search this type"),
+        OpenApiParameter("limit", int, description="Number of hits per list, at most 100; defaults to 20"),
+    ],
+    responses={200: SearchResultsSerializer},
+)
+@api_view(["GET"])
+@permission_classes([has_perm_helper("base")])
+def search(request):
+    ser = SearchQuerySerializer(data=request.query_params)
+    ser.is_valid(raise_exception=True)
+    text, kind, limit = ser.validated_data["q"], ser.validated_data.get("type"), ser.validated_data["limit"]
+
+    results = {"cases": [], "evidence": []}
+    if kind in (None, "case"):
+        cases = full_text_search(Case.objects.visible_to(request.user), text)
+        results["cases"] = [
+            {"id": pk, "case": pk, "title": title, "rank": rank}
+            for pk, title, rank in cases.values_list("pk", "title", "rank")[:limit]
+        ]
+    if kind in (None, "evidence") and request.user.perm_snapshot.has_perm("evidence_read"):
+        evidences = Evidence.objects.all()
+        visibility = case_visibility(request.user, case="case")
+        if visibility is not None:
+            evidences = evidences.filter(visibility)
+        evidences = full_text_search(evidences, text)
+        results["evidence"] = [
+            {"id": pk, "case": case_id, "title": title, "rank": rank}
+            for pk, case_id, title, rank in evidences.values_list("pk", "case_id", "title", "rank")[:limit]
+        ]
+    return Response(SearchResultsSerializer(results).data)
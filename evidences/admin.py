@@ -1,8 +1,24 @@
 from django.contrib import admin
 
+from common.admin import LargeTableAdmin
 from evidences.models import Evidence, EvidenceFile
 
-# Register your models here.
 
-admin.site.register(Evidence)
-admin.site.register(EvidenceFile)
\ No newline at end of file
+@admin.register(Evidence)
+class EvidenceAdmin(LargeTableAdmin):
+    list_display = ("id", "title", "type", "case_id", "recorder", "recorded_at")
+    list_select_related = ("recorded_by",)
+    list_filter = ("type",)
+    search_fields = ("title",)
+    raw_id_fields = ("case", "recorded_by")
+
+    @admin.display(description="Recorded by", ordering="recorded_by__username")
+    def recorder(self, obj):
+        return obj.recorded_by.username
+
+
+@admin.register(EvidenceFile)
+class EvidenceFileAdmin(LargeTableAdmin):
+    list_display = ("id", "evidence", "file", "uploaded_at")
+    list_select_related = ("evidence",)
+    raw_id_fields = ("evidence",)
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0006_default_ordering'),
+        ('evidences', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='evidence',
+            options={'ordering': ['-recorded_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='evidence',
+            index=models.Index(fields=['-recorded_at', '-id'], name='evidence_recorded_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0007_hot_path_indexes'),
+        ('evidences', '0002_default_ordering'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evidence',
+            index=models.Index(fields=['case', '-recorded_at', '-id'], name='evidence_case_recorded_idx'),
+        ),
+        # drop the single-column foreign key indexes only once the composite indexes leading with them exist
+        migrations.AlterField(
+            model_name='evidence',
+            name='case',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='evidences', to='cases.case'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:40
+
+from django.db import migrations
+
+# the index common.search reads, per database vendor; other vendors get none
+INSTALL = {
+    'postgresql': [
+        "ALTER TABLE evidences_evidence ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED",
+        "CREATE INDEX evidences_evidence_search_idx ON evidences_evidence USING gin (search_vector)",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE evidences_evidence_fts USING fts5(title, description, content='evidences_evidence', "
+        "content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS evidences_evidence_fts_insert AFTER INSERT ON evidences_evidence BEGIN "
+        "INSERT INTO evidences_evidence_fts(rowid, title, description) "
+        "VALUES (new.id, new.title, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS evidences_evidence_fts_delete AFTER DELETE ON evidences_evidence BEGIN "
+        "INSERT INTO evidences_evidence_fts(evidences_evidence_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS evidences_evidence_fts_update AFTER UPDATE OF title, description "
+        "ON evidences_evidence BEGIN "
+        "INSERT INTO evidences_evidence_fts(evidences_evidence_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO evidences_evidence_fts(rowid, title, description) "
+        "VALUES (new.id, new.title, new.description); END",
+        "INSERT INTO evidences_evidence_fts(evidences_evidence_fts) VALUES ('rebuild')",
+    ],
+}
+UNINSTALL = {
+    'postgresql': [
+        "ALTER TABLE evidences_evidence DROP COLUMN search_vector",
+    ],
+    'sqlite': [
+        "DROP TRIGGER IF EXISTS evidences_evidence_fts_insert",
+        "DROP TRIGGER IF EXISTS evidences_evidence_fts_delete",
+        "DROP TRIGGER IF EXISTS evidences_evidence_fts_update",
+        "DROP TABLE evidences_evidence_fts",
+    ],
+}
+
+
+def install_search(apps, schema_editor):
+    for statement in INSTALL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def uninstall_search(apps, schema_editor):
+    for statement in UNINSTALL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidences', '0003_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:55
+
+import django.db.models.fields.json
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+# Downtime: on PostgreSQL each AddField of a stored generated column below rewrites evidences_evidence, computing
+# the column for every row, under an ACCESS EXCLUSIVE lock. Nothing can read or write evidence until the
+# migration commits, and both rewrites and the three index builds that follow all run in its one transaction, so
+# the lock is held for all of them: minutes on a table of millions of rows. Run it in a maintenance window with
+# the API stopped. SQLite copies the table into a new one instead, with the same effect.
+# The rolling alternative would be plain nullable columns filled by save() and a batched backfill, with the
+# indexes built CONCURRENTLY, at the cost of keeping the columns in step with metadata by hand on every write
+# path, bulk ones included; the generated columns cannot drift, and the one-off window is the price for that.
+
+
+def add_metadata_gin(apps, schema_editor):
+    # containment lookups on metadata; only PostgreSQL has an index for them
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX evidence_metadata_gin ON evidences_evidence USING gin (metadata jsonb_path_ops)'
+        )
+
+
+def drop_metadata_gin(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX evidence_metadata_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0012_case_search'),
+        ('evidences', '0004_evidence_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidence',
+            name='document_number',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(then=django.db.models.functions.text.Upper(django.db.models.fields.json.KeyTextTransform('document_number', 'metadata')), type='id')), output_field=models.CharField(max_length=255, null=True)),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='plate',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(then=django.db.models.functions.text.Upper(django.db.models.fields.json.KeyTextTransform('plate', 'metadata')), type='vehicle')), output_field=models.CharField(max_length=255, null=True)),
+        ),
+        migrations.AddIndex(
+            model_name='evidence',
+            index=models.Index(condition=models.Q(('plate__isnull', False)), fields=['plate'], name='evidence_plate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evidence',
+            index=models.Index(condition=models.Q(('document_number__isnull', False)), fields=['document_number'], name='evidence_document_number_idx'),
+        ),
+        migrations.RunPython(add_metadata_gin, drop_metadata_gin),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-17 21:16
+
+import common.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidences', '0005_evidence_metadata_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EvidenceSearchIndex',
+            fields=[
+                ('evidence', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='evidences.evidence')),
+                ('document', common.search.SearchDocumentField(db_column='evidences_evidence_fts')),
+            ],
+            options={
+                'db_table': 'evidences_evidence_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.fields.json import KT
+from django.db.models.functions import Upper
 from cases.models import Case
 from accounts.models import User
+from common.search import SearchDocumentField
 
 class EvidenceType(models.TextChoices):
     TESTIMONY = "testimony", "Testimony"
@@ -10,18 +13,61 @@ class EvidenceType(models.TextChoices):
     ID = "id", "ID Document"
     OTHER = "other", "Other"
 
+
+# the metadata key of each type copied into an indexed column of the same name, upper-cased so lookups ignore case
+METADATA_COLUMNS = {
+    EvidenceType.VEHICLE: "plate",
+    EvidenceType.ID: "document_number",
+}
+
+
+def metadata_column(evidence_type):
+    key = METADATA_COLUMNS[evidence_type]
+    return models.GeneratedField(
+        expression=models.Case(models.When(type=evidence_type, then=Upper(KT(f"metadata__{key}")))),
+        output_field=models.CharField(max_length=255, null=True),
+        db_persist=True,
+    )
+
 class Evidence(models.Model):
-    case = models.ForeignKey(Case, on_delete=models.CASCADE, related_name="evidences")
+    case = models.ForeignKey(Case, on_delete=models.CASCADE, related_name="evidences", db_index=False)
     type = models.CharField(max_length=20, choices=EvidenceType.choices)
     title = models.CharField(max_length=255)
     description = models.TextField()
     metadata = models.JSONField(default=dict, blank=True)
     recorded_by = models.ForeignKey(User, on_delete=models.CASCADE)
     recorded_at = models.DateTimeField(auto_now_add=True)
+    plate = metadata_column(EvidenceType.VEHICLE)
+    document_number = metadata_column(EvidenceType.ID)
+
+    # indexed for common.search, most important first
+    search_fields = ("title", "description")
+
+    class Meta:
+        ordering = ["-recorded_at", "-id"]
+        indexes = [
+            models.Index(fields=["-recorded_at", "-id"], name="evidence_recorded_idx"),
+            models.Index(fields=["case", "-recorded_at", "-id"], name="evidence_case_recorded_idx"),
+            # most evidence has neither, so only the rows that do are indexed
+            models.Index(fields=["plate"], name="evidence_plate_idx", condition=models.Q(plate__isnull=False)),
+            models.Index(fields=["document_number"], name="evidence_document_number_idx",
+                         condition=models.Q(document_number__isnull=False)),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.type})"
 
+class EvidenceSearchIndex(models.Model):
+    # the SQLite full-text index of evidence, created by migration 0004 and joined by common.search
+    evidence = models.OneToOneField(
+        Evidence, on_delete=models.DO_NOTHING, primary_key=True, db_column="rowid", related_name="search_index"
+    )
+    document = SearchDocumentField(db_column="evidences_evidence_fts")
+
+    class Meta:
+        managed = False
+        db_table = "evidences_evidence_fts"
+
 class EvidenceFile(models.Model):
     evidence = models.ForeignKey(
         Evidence,
@@ -0,0 +1,61 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User
+from cases.models import Case
+from .models import Evidence, EvidenceType
+
+
+class EvidenceMetadataTest(TestCase):
+    """
+    Well-known metadata keys are copied into their columns and filter the evidence list.
+    """
+
+    def setUp(self):
+        self.forensic = User.objects.create_user(username="forensic", password="password", national_id="forensic")
+        self.forensic.roles.add(Role.objects.get(name="forensic"))
+        case = Case.objects.create(title="Case", description="-", created_by=self.forensic)
+        self.vehicle = Evidence.objects.create(
+            case=case, type=EvidenceType.VEHICLE, title="Car", description="-", recorded_by=self.forensic,
+            metadata={"plate": "12b345-67", "color": "black"},
+        )
+        self.document = Evidence.objects.create(
+            case=case, type=EvidenceType.ID, title="Passport", description="-", recorded_by=self.forensic,
+            metadata={"document_number": "D00000001", "plate": "12B345-67"},
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(pk=self.forensic.pk))
+
+    def listed(self, **params):
+        response = self.client.get("/evidences/", params)
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_columns_follow_metadata(self):
+        self.vehicle.refresh_from_db()
+        self.assertEqual((self.vehicle.plate, self.vehicle.document_number), ("12B345-67", None))
+        # only the key of the evidence's own type is copied
+        self.document.refresh_from_db()
+        self.assertEqual((self.document.plate, self.document.document_number), (None, "D00000001"))
+
+        self.vehicle.metadata["plate"] = "99K999-99"
+        self.vehicle.save()
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.plate, "99K999-99")
+
+    def test_filters(self):
+        self.assertEqual(self.listed(plate="12B345-67"), [self.vehicle.pk])
+        self.assertEqual(self.listed(document_number="d00000001"), [self.document.pk])
+        self.assertEqual(self.listed(metadata='{"color": "black"}'), [self.vehicle.pk])
+        self.assertEqual(self.listed(metadata='{"color": "white"}'), [])
+        self.assertEqual(self.client.get("/evidences/", {"metadata": "[1]"}).status_code, 400)
+
+    def test_metadata_keys_named_like_lookups(self):
+        self.vehicle.metadata.update({"contains": "x", "isnull": True, "in": [1, 2]})
+        self.vehicle.save()
+        self.assertEqual(self.listed(metadata='{"contains": "x"}'), [self.vehicle.pk])
+        self.assertEqual(self.listed(metadata='{"isnull": true}'), [self.vehicle.pk])
+        self.assertEqual(self.listed(metadata='{"isnull": false}'), [])
+        self.assertEqual(self.listed(metadata='{"in": [1, 2]}'), [self.vehicle.pk])
+        self.assertEqual(self.listed(metadata='{"in": [1]}'), [])
+        self.assertEqual(self.listed(metadata='{"color__in": ["black"]}'), [])
@@ -1,11 +1,18 @@
+import json
+
+from django.db import connection
+from django.db.models.fields.json import KeyTransform
 from rest_framework import generics, viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 
-from cases.models import Case
-from .models import Evidence
+from cases.models import case_visibility
+from .models import METADATA_COLUMNS, Evidence
 from .serializers import EvidenceSerializer
+from common.pagination import KeysetPagination
 from common.permissions import HasPerm
+from common.prefetch import SerializerRelatedLoadingMixin
 #
 # class EvidenceCreateAPI(generics.CreateAPIView):
 #     queryset = Evidence.objects.all()
@@ -25,9 +32,28 @@ from common.permissions import HasPerm
 #         return Evidence.objects.filter(case_id=self.kwargs["case_id"])
 #
 
-class EvidenceViewSet(viewsets.ModelViewSet):
+class EvidencePagination(KeysetPagination):
+    ordering = ("-recorded_at", "-id")
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="List evidence",
+        tags=["Evidence"],
+        parameters=[
+            OpenApiParameter("case", int, description="Only evidence of this case"),
+            OpenApiParameter("plate", str, description="Vehicle evidence with this plate, ignoring case"),
+            OpenApiParameter("document_number", str,
+                             description="ID evidence with this document number, ignoring case"),
+            OpenApiParameter("metadata", str,
+                             description='JSON object the metadata must contain, e.g. {"color": "black"}'),
+        ],
+    ),
+)
+class EvidenceViewSet(SerializerRelatedLoadingMixin, viewsets.ModelViewSet):
     queryset = Evidence.objects.all()
     serializer_class = EvidenceSerializer
+    pagination_class = EvidencePagination
 
     def get_permissions(self):
         if self.action == "create":
@@ -39,12 +65,37 @@ class EvidenceViewSet(viewsets.ModelViewSet):
         return [HasPerm("evidence_read")]
 
     def get_queryset(self):
-        queryset = Evidence.objects.filter(
-            case__in=Case.objects.visible_to(self.request.user)
-        )
+        queryset = Evidence.objects.all()
+        visibility = case_visibility(self.request.user, case="case")
+        if visibility is not None:
+            queryset = queryset.filter(visibility)
         case_id = self.request.query_params.get("case")
         if case_id:
             queryset = queryset.filter(case_id=case_id)
+
+        # the well-known keys are read from their indexed columns
+        for column in METADATA_COLUMNS.values():
+            value = self.request.query_params.get(column)
+            if value:
+                queryset = queryset.filter(**{column: value.upper()})
+
+        metadata = self.request.query_params.get("metadata")
+        if metadata:
+            try:
+                metadata = json.loads(metadata)
+            except ValueError:
+                metadata = None
+            if not isinstance(metadata, dict):
+                raise ValidationError({"metadata": "Expected a JSON object."})
+            if connection.features.supports_json_field_contains:
+                queryset = queryset.filter(metadata__contains=metadata)
+            else:
+                # no containment lookup (SQLite); compare the top-level keys one by one, through transforms
+                # rather than metadata__<key> so that no key is read as a lookup
+                keys = {f"metadata_key_{index}": key for index, key in enumerate(metadata)}
+                queryset = queryset.alias(
+                    **{name: KeyTransform(key, "metadata") for name, key in keys.items()}
+                ).filter(**{name: metadata[key] for name, key in keys.items()})
         return queryset
 
     def perform_create(self, serializer):
@@ -1,5 +1,17 @@
 from django.contrib import admin
 
+from common.admin import LargeTableAdmin
 from rewards.models import Reward
 
-admin.site.register(Reward)
\ No newline at end of file
+
+@admin.register(Reward)
+class RewardAdmin(LargeTableAdmin):
+    list_display = ("id", "unique_code", "owner", "amount", "claimed", "created_at")
+    list_select_related = ("user",)
+    list_filter = ("claimed",)
+    search_fields = ("unique_code",)
+    raw_id_fields = ("user",)
+
+    @admin.display(description="User", ordering="user__username")
+    def owner(self, obj):
+        return obj.user.username
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rewards', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='reward',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='reward',
+            index=models.Index(condition=models.Q(('claimed', True)), fields=['user', '-created_at', '-id'], name='reward_claimed_history_idx'),
+        ),
+    ]
@@ -8,5 +8,13 @@ class Reward(models.Model):
     claimed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            # backs the claimed-rewards history of a user
+            models.Index(fields=["user", "-created_at", "-id"], condition=models.Q(claimed=True),
+                         name="reward_claimed_history_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user} - {self.amount}"
\ No newline at end of file
@@ -3,9 +3,14 @@ from rest_framework.permissions import IsAuthenticated
 from drf_spectacular.utils import extend_schema
 from rest_framework.response import Response
 
+from common.pagination import KeysetPagination
 from .serializers import ClaimSerializer, RewardSerializer
 
 
+class RewardHistoryPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
 class ClaimAPI(generics.GenericAPIView):
     serializer_class = ClaimSerializer
     permission_classes = [IsAuthenticated]
@@ -24,6 +29,7 @@ class ClaimAPI(generics.GenericAPIView):
 class HistoryAPI(generics.ListAPIView):
     serializer_class = RewardSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = RewardHistoryPagination
 
     @extend_schema(summary="User claimed rewards", tags=["rewards"])
     def get_queryset(self):
@@ -1,7 +1,23 @@
 from django.contrib import admin
 
+from common.admin import LargeTableAdmin
 from suspects.models import Suspect, Investigation
 
-# Register your models here.
-admin.site.register(Suspect)
-admin.site.register(Investigation)
\ No newline at end of file
+
+@admin.register(Suspect)
+class SuspectAdmin(LargeTableAdmin):
+    list_display = ("id", "first_name", "last_name", "national_id", "status", "case_id")
+    list_filter = ("status",)
+    search_fields = ("national_id", "last_name")
+    raw_id_fields = ("case",)
+
+
+@admin.register(Investigation)
+class InvestigationAdmin(LargeTableAdmin):
+    list_display = ("id", "suspect", "investigator_name", "score", "created_at")
+    list_select_related = ("suspect", "investigator")
+    raw_id_fields = ("suspect", "investigator")
+
+    @admin.display(description="Investigator", ordering="investigator__username")
+    def investigator_name(self, obj):
+        return obj.investigator.username
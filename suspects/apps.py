@@ -1,5 +1,22 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 
 class SuspectsConfig(AppConfig):
     name = 'suspects'
+
+    def ready(self):
+        from accounts.models import User
+        from cases.models import Case
+        from suspects import people, ranking
+        from suspects.models import Suspect
+
+        # people first: the person ranking reads the person index
+        post_save.connect(people.index_user, sender=User)
+        post_save.connect(people.sync_suspect_case, sender=Suspect)
+        post_delete.connect(people.sync_deleted_suspect_case, sender=Suspect)
+        m2m_changed.connect(people.sync_complaints, sender=Case.complainants.through)
+
+        post_save.connect(ranking.refresh_case_suspects, sender=Case)
+        post_save.connect(ranking.refresh_suspect, sender=Suspect)
+        post_delete.connect(ranking.refresh_deleted_suspect, sender=Suspect)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from suspects.ranking import refresh, refresh_people
+
+
+class Command(BaseCommand):
+    help = "Recompute the most-wanted ranking of every suspect; run daily, as open cases keep running"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        refresh(batch_size=options["batch_size"])
+        refresh_people(batch_size=options["batch_size"])
+        self.stdout.write("Refreshed the most-wanted ranking")
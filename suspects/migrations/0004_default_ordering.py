@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:51
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suspects', '0003_alter_suspect_status'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='suspect',
+            options={'ordering': ['-id']},
+        ),
+    ]
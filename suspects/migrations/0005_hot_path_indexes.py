@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0007_hot_path_indexes'),
+        ('suspects', '0004_default_ordering'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='suspect',
+            name='national_id',
+            field=models.CharField(db_index=True, max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='suspect',
+            index=models.Index(fields=['case', 'status'], name='suspect_case_status_idx'),
+        ),
+        # drop the single-column foreign key indexes only once the composite indexes leading with them exist
+        migrations.AlterField(
+            model_name='suspect',
+            name='case',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='suspects', to='cases.case'),
+        ),
+    ]
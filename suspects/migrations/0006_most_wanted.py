@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from suspects.ranking import refresh
+
+
+def rank_suspects(apps, schema_editor):
+    refresh(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suspects', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MostWanted',
+            fields=[
+                ('suspect', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='most_wanted', serialize=False, to='suspects.suspect')),
+                ('duration_days', models.PositiveIntegerField()),
+                ('max_level', models.IntegerField(choices=[(3, 'Level 3'), (2, 'Level 2'), (1, 'Level 1'), (0, 'Critical')])),
+                ('reward_price', models.BigIntegerField()),
+            ],
+            options={
+                'ordering': ['-reward_price', '-suspect'],
+                'indexes': [models.Index(fields=['-reward_price', '-suspect'], name='most_wanted_rank_idx')],
+            },
+        ),
+        migrations.RunPython(rank_suspects, migrations.RunPython.noop),
+    ]
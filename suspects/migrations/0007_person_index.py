@@ -0,0 +1,60 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from suspects import people, ranking
+
+
+def index_people(apps, schema_editor):
+    people.rebuild(apps=apps)
+    ranking.refresh_people(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0011_case_version'),
+        ('suspects', '0006_most_wanted'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Person',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('national_id', models.CharField(max_length=10, unique=True)),
+                ('first_name', models.CharField(blank=True, max_length=255)),
+                ('last_name', models.CharField(blank=True, max_length=255)),
+                ('user', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='person', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MostWantedPerson',
+            fields=[
+                ('person', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='most_wanted', serialize=False, to='suspects.person')),
+                ('duration_days', models.PositiveIntegerField()),
+                ('max_level', models.IntegerField(choices=[(3, 'Level 3'), (2, 'Level 2'), (1, 'Level 1'), (0, 'Critical')])),
+                ('reward_price', models.BigIntegerField()),
+            ],
+            options={
+                'ordering': ['-reward_price', '-person'],
+                'indexes': [models.Index(fields=['-reward_price', '-person'], name='most_wanted_person_rank_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Involvement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('suspect', 'Suspect'), ('complainant', 'Complainant')], max_length=20)),
+                ('case', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='involvements', to='cases.case')),
+                ('person', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='involvements', to='suspects.person')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('person', 'case', 'role'), name='involvement_person_case_role_unique')],
+            },
+        ),
+        migrations.RunPython(index_people, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,5 @@
 from django.db import models
-from cases.models import Case
+from cases.models import Case, CrimeLevel
 from accounts.models import User
 
 class SuspectStatus(models.TextChoices):
@@ -13,15 +13,88 @@ class SuspectStatus(models.TextChoices):
 
 class Suspect(models.Model):
     image = models.ImageField(upload_to="suspects/", null=True)
-    case = models.ForeignKey(Case, on_delete=models.CASCADE, related_name="suspects")
-    national_id = models.CharField(max_length=10)
+    case = models.ForeignKey(Case, on_delete=models.CASCADE, related_name="suspects", db_index=False)
+    national_id = models.CharField(max_length=10, db_index=True)
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
     status = models.CharField(max_length=50, choices=SuspectStatus.choices, default=SuspectStatus.SUSPECT_CREATED)
 
+    class Meta:
+        ordering = ["-id"]
+        indexes = [
+            models.Index(fields=["case", "status"], name="suspect_case_status_idx"),
+        ]
+
     def __str__(self):
         return self.first_name + " " + self.last_name
 
+class Person(models.Model):
+    """
+    Someone known by national ID as a user, a complainant or a suspect, kept up to date by suspects.people.
+    """
+    national_id = models.CharField(max_length=10, unique=True)
+    first_name = models.CharField(max_length=255, blank=True)
+    last_name = models.CharField(max_length=255, blank=True)
+    user = models.OneToOneField(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="person")
+
+    def __str__(self):
+        return f"{self.first_name} {self.last_name} ({self.national_id})"
+
+class InvolvementRole(models.TextChoices):
+    SUSPECT = "suspect", "Suspect"
+    COMPLAINANT = "complainant", "Complainant"
+
+class Involvement(models.Model):
+    # person lookups are covered by the unique constraint below
+    person = models.ForeignKey(Person, on_delete=models.CASCADE, related_name="involvements", db_index=False)
+    case = models.ForeignKey(Case, on_delete=models.CASCADE, related_name="involvements")
+    role = models.CharField(max_length=20, choices=InvolvementRole.choices)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["person", "case", "role"], name="involvement_person_case_role_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.person_id} {self.role} in {self.case_id}"
+
+class MostWanted(models.Model):
+    """
+    Ranking entry of a suspect whose case has run for more than a month, kept up to date by suspects.ranking.
+    """
+    suspect = models.OneToOneField(Suspect, primary_key=True, on_delete=models.CASCADE, related_name="most_wanted")
+    duration_days = models.PositiveIntegerField()
+    max_level = models.IntegerField(choices=CrimeLevel.choices)
+    reward_price = models.BigIntegerField()
+
+    class Meta:
+        ordering = ["-reward_price", "-suspect"]
+        indexes = [
+            models.Index(fields=["-reward_price", "-suspect"], name="most_wanted_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.suspect_id}: {self.reward_price}"
+
+class MostWantedPerson(models.Model):
+    """
+    The most-wanted ranking by person: the longest-running case and the highest level over every ranked suspect
+    record of the person, kept up to date by suspects.ranking.
+    """
+    person = models.OneToOneField(Person, primary_key=True, on_delete=models.CASCADE, related_name="most_wanted")
+    duration_days = models.PositiveIntegerField()
+    max_level = models.IntegerField(choices=CrimeLevel.choices)
+    reward_price = models.BigIntegerField()
+
+    class Meta:
+        ordering = ["-reward_price", "-person"]
+        indexes = [
+            models.Index(fields=["-reward_price", "-person"], name="most_wanted_person_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.person_id}: {self.reward_price}"
+
 class Investigation(models.Model):
     suspect = models.ForeignKey(Suspect, on_delete=models.CASCADE, related_name="investigations")
     investigator = models.ForeignKey(User, on_delete=models.CASCADE)
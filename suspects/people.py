@@ -0,0 +1,135 @@
+"""
+The person index: a Person per national ID seen on a user, a complainant or a suspect, and an Involvement per
+case a person is a suspect or complainant in, so the cases of a person are one indexed lookup.
+
+People follow user saves; involvements follow suspect saves and deletes and Case.complainants changes.
+rebuild() recomputes everything, for data loaded around the signals. The functions take the app registry, so
+migrations can pass their historical one.
+"""
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Max
+
+from .models import InvolvementRole
+
+# user fields a Person copies
+USER_FIELDS = {"national_id", "first_name", "last_name"}
+
+
+def _index_users(users, apps):
+    Case = apps.get_model("cases", "Case")
+    Person = apps.get_model("suspects", "Person")
+    users = [user for user in users if user.national_id]
+    # a user whose national ID changed leaves their old person behind
+    left = Person.objects.filter(user__in=[user.pk for user in users]).exclude(
+        national_id__in=[user.national_id for user in users]
+    )
+    moved_user_ids = list(left.values_list("user_id", flat=True))
+    left.update(user=None)
+    Person.objects.bulk_create(
+        [
+            Person(national_id=user.national_id, first_name=user.first_name, last_name=user.last_name, user=user)
+            for user in users
+        ],
+        update_conflicts=True, unique_fields=["national_id"], update_fields=["first_name", "last_name", "user"],
+    )
+    if moved_user_ids:
+        # and takes their complaints along to the new one
+        case_ids = Case.complainants.through.objects.filter(user_id__in=moved_user_ids).values_list(
+            "case_id", flat=True
+        )
+        _sync_cases({"case_id__in": list(case_ids)}, apps)
+
+
+def _sync_cases(case_filter, apps):
+    """
+    Bring the involvements of the cases matching case_filter, a dict of case_id lookups, in line with their
+    suspects and complainants.
+    """
+    Case = apps.get_model("cases", "Case")
+    Involvement = apps.get_model("suspects", "Involvement")
+    Person = apps.get_model("suspects", "Person")
+    Suspect = apps.get_model("suspects", "Suspect")
+
+    suspects = Suspect.objects.filter(**case_filter).values_list("case_id", "national_id", "first_name", "last_name")
+    complaints = Case.complainants.through.objects.filter(**case_filter).values_list(
+        "case_id", "user__national_id", "user__first_name", "user__last_name"
+    )
+    people, involved = {}, set()
+    for role, rows in ((InvolvementRole.SUSPECT, suspects), (InvolvementRole.COMPLAINANT, complaints)):
+        for case_id, national_id, first_name, last_name in rows:
+            people.setdefault(national_id, Person(national_id=national_id, first_name=first_name,
+                                                  last_name=last_name))
+            involved.add((national_id, case_id, role))
+
+    # a person already indexed keeps their names, which come from their user when they have one
+    Person.objects.bulk_create(list(people.values()), ignore_conflicts=True)
+    person_ids = dict(Person.objects.filter(national_id__in=people).values_list("national_id", "pk"))
+    wanted = {(person_ids[national_id], case_id, role) for national_id, case_id, role in involved}
+
+    existing = {
+        (person_id, case_id, role): pk
+        for pk, person_id, case_id, role in Involvement.objects.filter(**case_filter).values_list(
+            "pk", "person_id", "case_id", "role"
+        )
+    }
+    stale = [pk for key, pk in existing.items() if key not in wanted]
+    if stale:
+        Involvement.objects.filter(pk__in=stale).delete()
+    Involvement.objects.bulk_create(
+        [
+            Involvement(person_id=person_id, case_id=case_id, role=role)
+            # sorted, so that equal data gets equal IDs whatever the set order of this process
+            for person_id, case_id, role in sorted(wanted.difference(existing))
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def sync_cases(case_ids, apps=global_apps):
+    _sync_cases({"case_id__in": case_ids}, apps)
+
+
+def rebuild(batch_size=5000, apps=global_apps):
+    """
+    Index every user, then every case in batches of batch_size case IDs, each in its own transaction.
+    """
+    Case = apps.get_model("cases", "Case")
+    User = apps.get_model("accounts", "User")
+
+    last = User.objects.aggregate(last=Max("pk"))["last"] or 0
+    for start in range(0, last + 1, batch_size):
+        with transaction.atomic():
+            _index_users(User.objects.filter(pk__gte=start, pk__lt=start + batch_size), apps)
+
+    last = Case.objects.aggregate(last=Max("pk"))["last"] or 0
+    for start in range(0, last + 1, batch_size):
+        with transaction.atomic():
+            _sync_cases({"case_id__gte": start, "case_id__lt": start + batch_size}, apps)
+
+
+def index_user(instance, created, update_fields=None, **kwargs):
+    # logins save last_login alone
+    if created or update_fields is None or USER_FIELDS & set(update_fields):
+        _index_users([instance], global_apps)
+
+
+def sync_suspect_case(instance, **kwargs):
+    sync_cases([instance.case_id])
+
+
+def sync_deleted_suspect_case(instance, **kwargs):
+    # the suspect may go with its case, whose delete is still collecting rows; look once it is done
+    transaction.on_commit(lambda: sync_cases([instance.case_id]))
+
+
+def sync_complaints(instance, action, reverse, pk_set, **kwargs):
+    """
+    m2m_changed receiver for Case.complainants, from either side.
+    """
+    if action in ("post_add", "post_remove"):
+        sync_cases(pk_set if reverse else [instance.pk])
+    elif action == "pre_clear" and reverse:
+        instance._cleared_complaints = list(instance.complaints.values_list("pk", flat=True))
+    elif action == "post_clear":
+        sync_cases(instance.__dict__.pop("_cleared_complaints", []) if reverse else [instance.pk])
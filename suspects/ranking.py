@@ -0,0 +1,185 @@
+"""
+The most-wanted ranking, precomputed into MostWanted rows.
+
+A suspect is ranked while its case has run for more than THRESHOLD, counted up to closed_at or up to now while
+the case is open. The reward is the number of days times the crime level times REWARD_PER_LEVEL_DAY.
+
+MostWantedPerson ranks people the same way, from the longest duration and the highest level among the ranked
+suspect records with their national ID.
+
+Rows follow saves of the suspect and of its case. Open cases keep running, so the whole ranking must also be
+refreshed periodically, e.g. daily with the refresh_most_wanted command. Every refresh replaces the version that
+the ranking's ETags are derived from. The refresh functions take the app registry, so migrations can pass their
+historical one.
+"""
+import hashlib
+import uuid
+from datetime import timedelta
+
+from django.apps import apps as global_apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+THRESHOLD = timedelta(days=30)
+REWARD_PER_LEVEL_DAY = 20_000_000
+VERSION_KEY = "suspects:most-wanted-version"
+
+
+def reward_price(duration, level):
+    return duration.days * level * REWARD_PER_LEVEL_DAY
+
+
+def _bump_version():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def etag(path):
+    """
+    ETag of a ranking page at path (query string included); it changes with every refresh.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return '"%s"' % hashlib.sha256(f"{version}:{path}".encode()).hexdigest()[:32]
+
+
+def _refresh(suspects, ranked, now, MostWanted):
+    """
+    Rank the suspects of the suspects queryset and drop the entries among ranked that no longer qualify.
+    Returns the national IDs of the suspects ranked before or after.
+    """
+    national_ids = set(ranked.values_list("suspect__national_id", flat=True))
+    rows = []
+    for suspect_id, national_id, created_at, closed_at, level in suspects.values_list(
+            "pk", "national_id", "case__created_at", "case__closed_at", "case__level"
+    ):
+        national_ids.add(national_id)
+        duration = (closed_at or now) - created_at
+        if duration > THRESHOLD:
+            rows.append(MostWanted(
+                suspect_id=suspect_id, duration_days=duration.days, max_level=level,
+                reward_price=reward_price(duration, level),
+            ))
+
+    ranked.exclude(suspect_id__in=[row.suspect_id for row in rows]).delete()
+    if rows:
+        MostWanted.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=["suspect"],
+            update_fields=["duration_days", "max_level", "reward_price"],
+        )
+    return national_ids
+
+
+def refresh(case_ids=None, suspect_ids=None, batch_size=5000, apps=global_apps):
+    """
+    Re-rank the suspects of case_ids or the suspects suspect_ids, or every suspect when neither is given, in
+    batches of batch_size, each in its own transaction. Returns the national IDs whose person ranking may have
+    changed, for refresh_people().
+    """
+    MostWanted = apps.get_model("suspects", "MostWanted")
+    Suspect = apps.get_model("suspects", "Suspect")
+    now = timezone.now()
+
+    if case_ids is not None or suspect_ids is not None:
+        if case_ids is not None:
+            suspects = Suspect.objects.filter(case_id__in=case_ids)
+            ranked = MostWanted.objects.filter(suspect__case_id__in=case_ids)
+        else:
+            suspects = Suspect.objects.filter(pk__in=suspect_ids)
+            ranked = MostWanted.objects.filter(suspect_id__in=suspect_ids)
+        with transaction.atomic():
+            national_ids = _refresh(suspects, ranked, now, MostWanted)
+    else:
+        national_ids = set()
+        last = Suspect.objects.aggregate(last=Max("pk"))["last"] or 0
+        for start in range(0, last + 1, batch_size):
+            end = start + batch_size
+            with transaction.atomic():
+                national_ids |= _refresh(
+                    Suspect.objects.filter(pk__gte=start, pk__lt=end),
+                    MostWanted.objects.filter(suspect_id__gte=start, suspect_id__lt=end),
+                    now, MostWanted,
+                )
+
+    invalidate()
+    return national_ids
+
+
+def _refresh_people(people, ranked_people, apps):
+    """
+    Rank the people of the people queryset from the ranked suspect records with their national IDs, dropping the
+    entries among ranked_people that no longer qualify.
+    """
+    MostWanted = apps.get_model("suspects", "MostWanted")
+    MostWantedPerson = apps.get_model("suspects", "MostWantedPerson")
+    person_ids = dict(people.values_list("national_id", "pk"))
+    rows = [
+        MostWantedPerson(
+            person_id=person_ids[national_id], duration_days=days, max_level=level,
+            reward_price=reward_price(timedelta(days=days), level),
+        )
+        for national_id, days, level in MostWanted.objects.filter(suspect__national_id__in=person_ids)
+        .order_by().values_list("suspect__national_id").annotate(Max("duration_days"), Max("max_level"))
+    ]
+
+    ranked_people.exclude(person_id__in=[row.person_id for row in rows]).delete()
+    if rows:
+        MostWantedPerson.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=["person"],
+            update_fields=["duration_days", "max_level", "reward_price"],
+        )
+
+
+def refresh_people(national_ids=None, batch_size=5000, apps=global_apps):
+    """
+    Re-rank the people with national_ids, or every person when not given, from the suspect ranking, which
+    must be refreshed first.
+    """
+    MostWantedPerson = apps.get_model("suspects", "MostWantedPerson")
+    Person = apps.get_model("suspects", "Person")
+    if national_ids is not None:
+        national_ids = sorted(national_ids)
+        with transaction.atomic():
+            for start in range(0, len(national_ids), batch_size):
+                batch = national_ids[start:start + batch_size]
+                _refresh_people(
+                    Person.objects.filter(national_id__in=batch),
+                    MostWantedPerson.objects.filter(person__national_id__in=batch), apps,
+                )
+    else:
+        last = Person.objects.aggregate(last=Max("pk"))["last"] or 0
+        for start in range(0, last + 1, batch_size):
+            end = start + batch_size
+            with transaction.atomic():
+                _refresh_people(
+                    Person.objects.filter(pk__gte=start, pk__lt=end),
+                    MostWantedPerson.objects.filter(person_id__gte=start, person_id__lt=end), apps,
+                )
+
+    invalidate()
+
+
+def invalidate(**kwargs):
+    """
+    Change the ETags of the ranking, now and again once the surrounding transaction commits.
+    """
+    _bump_version()
+    transaction.on_commit(_bump_version)
+
+
+def refresh_case_suspects(instance, created, **kwargs):
+    # a new case has no suspects yet
+    if not created:
+        refresh_people(refresh(case_ids=[instance.pk]))
+
+
+def refresh_suspect(instance, **kwargs):
+    refresh_people(refresh(suspect_ids=[instance.pk]))
+
+
+def refresh_deleted_suspect(instance, **kwargs):
+    # the suspect's own entry goes with it by cascade, which may not have run yet
+    transaction.on_commit(lambda: refresh_people([instance.national_id]))
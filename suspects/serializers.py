@@ -1,7 +1,7 @@
 from rest_framework import serializers
 
 from cases.models import Case
-from .models import Suspect, Investigation
+from .models import Involvement, Person, Suspect, Investigation
 
 class SuspectSerializer(serializers.ModelSerializer):
     case = serializers.PrimaryKeyRelatedField(queryset=Case.objects.all())
@@ -20,4 +20,20 @@ class InvestigationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         user = self.context["request"].user
-        return Investigation.objects.create(investigator=user, **validated_data)
\ No newline at end of file
+        return Investigation.objects.create(investigator=user, **validated_data)
+
+class InvolvementSerializer(serializers.ModelSerializer):
+    title = serializers.CharField(source="case.title")
+    status = serializers.CharField(source="case.status")
+    level = serializers.IntegerField(source="case.level")
+
+    class Meta:
+        model = Involvement
+        fields = ["case", "title", "status", "level", "role"]
+
+class PersonSerializer(serializers.ModelSerializer):
+    involvements = InvolvementSerializer(source="visible_involvements", many=True)
+
+    class Meta:
+        model = Person
+        fields = ["id", "national_id", "first_name", "last_name", "user", "involvements"]
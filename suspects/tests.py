@@ -0,0 +1,70 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User
+from cases.models import Case
+from .models import Involvement, InvolvementRole, Person, Suspect
+from . import people
+
+
+class PersonIndexTest(TestCase):
+
+    def setUp(self):
+        self.detective = User.objects.create_user(username="detective", password="password", national_id="detective")
+        self.detective.roles.add(Role.objects.get(name="detective"), Role.objects.get(name="base"))
+        self.civilian = User.objects.create_user(username="civilian", password="password", national_id="0012345678",
+                                                 first_name="Roy", last_name="Earle")
+        self.civilian.roles.add(Role.objects.get(name="base"))
+
+        self.first = Case.objects.create(title="First", description="-", created_by=self.detective)
+        self.second = Case.objects.create(title="Second", description="-", created_by=self.detective)
+        Suspect.objects.create(case=self.first, national_id="0012345678", first_name="R.", last_name="Earle")
+        self.second.complainants.add(self.civilian)
+
+    def involvements(self):
+        return set(Involvement.objects.values_list("person__national_id", "case__title", "role"))
+
+    def test_index_follows_suspects_and_complainants(self):
+        person = Person.objects.get(national_id="0012345678")
+        self.assertEqual((person.user, person.first_name), (self.civilian, "Roy"))
+        self.assertEqual(self.involvements(), {
+            ("0012345678", "First", InvolvementRole.SUSPECT),
+            ("0012345678", "Second", InvolvementRole.COMPLAINANT),
+        })
+
+        self.civilian.complaints.clear()
+        suspect = Suspect.objects.get()
+        suspect.national_id = "0099999999"
+        suspect.save()
+        self.assertEqual(self.involvements(), {("0099999999", "First", InvolvementRole.SUSPECT)})
+
+        Involvement.objects.all().delete()
+        people.rebuild()
+        self.assertEqual(self.involvements(), {("0099999999", "First", InvolvementRole.SUSPECT)})
+
+    def test_complaints_follow_a_changed_national_id(self):
+        self.civilian.national_id = "0011111111"
+        self.civilian.save()
+        self.assertEqual(self.involvements(), {
+            ("0012345678", "First", InvolvementRole.SUSPECT),
+            ("0011111111", "Second", InvolvementRole.COMPLAINANT),
+        })
+        self.assertIsNone(Person.objects.get(national_id="0012345678").user)
+
+    def test_lookup_shows_visible_cases_in_one_query(self):
+        client = APIClient()
+        detective = User.objects.get(pk=self.detective.pk)
+        self.assertTrue(detective.perm_snapshot.has_perm("base"))
+        client.force_authenticate(detective)
+
+        with self.assertNumQueries(1):
+            response = client.get("/suspects/people/0012345678/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row["title"], row["role"]) for row in response.data["involvements"]],
+                         [("Second", "complainant"), ("First", "suspect")])
+
+        Case.objects.create(title="Own", description="-", created_by=self.civilian).complainants.add(self.civilian)
+        client.force_authenticate(User.objects.get(pk=self.civilian.pk))
+        response = client.get("/suspects/people/0012345678/")
+        self.assertEqual([row["title"] for row in response.data["involvements"]], ["Own", "Second"])
+        self.assertEqual(client.get("/suspects/people/0000000000/").status_code, 404)
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SuspectViewSet
+from .views import SuspectViewSet, person_cases
 
 router = DefaultRouter()
 router.register("", SuspectViewSet)
 
 urlpatterns = [
+    # ahead of the router, whose detail route would take "people" for a suspect ID
+    path("people/<str:national_id>/", person_cases, name="person-cases"),
     path("", include(router.urls)),
 ]
\ No newline at end of file
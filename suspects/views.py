@@ -1,10 +1,13 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, extend_schema_view
-from .models import Suspect, Investigation, SuspectStatus
-from .serializers import SuspectSerializer, InvestigationSerializer
+from cases.models import case_visibility
+from .models import Involvement, Suspect, Investigation, SuspectStatus
+from .serializers import PersonSerializer, SuspectSerializer, InvestigationSerializer
+from common.pagination import KeysetPagination
 from common.permissions import HasPerm, has_perm_helper
+from common.prefetch import SerializerRelatedLoadingMixin
 
 
 @extend_schema_view(
@@ -15,9 +18,10 @@ from common.permissions import HasPerm, has_perm_helper
     update=extend_schema(exclude=True),
     destroy=extend_schema(exclude=True)
 )
-class SuspectViewSet(viewsets.ModelViewSet):
+class SuspectViewSet(SerializerRelatedLoadingMixin, viewsets.ModelViewSet):
     queryset = Suspect.objects.all()
     serializer_class = SuspectSerializer
+    pagination_class = KeysetPagination
 
     def get_permissions(self):
         if self.action == "create":
@@ -47,4 +51,32 @@ class SuspectViewSet(viewsets.ModelViewSet):
         ser = InvestigationSerializer(data={**request.data, "suspect": suspect.id})
         ser.is_valid(raise_exception=True)
         ser.save(investigator=request.user)
-        return Response(ser.data, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        return Response(ser.data, status=status.HTTP_201_CREATED)
+
+
+@extend_schema(
+    summary="Look up a person's cases",
+    description="Every case the person with this national ID is a suspect or complainant in, among the cases "
+                "you may see. Answered from the person index in one query.",
+    responses={200: PersonSerializer},
+    tags=["suspects"],
+)
+@api_view(["GET"])
+@permission_classes([has_perm_helper("base")])
+def person_cases(request, national_id):
+    involvements = (
+        Involvement.objects.filter(person__national_id=national_id)
+        .select_related("person", "case")
+        .order_by("-case_id", "role")
+    )
+    visibility = case_visibility(request.user, case="case")
+    if visibility is not None:
+        involvements = involvements.filter(visibility)
+    involvements = list(involvements)
+    # someone with no visible involvement is not disclosed
+    if not involvements:
+        return Response({"error": "Person not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    person = involvements[0].person
+    person.visible_involvements = involvements
+    return Response(PersonSerializer(person).data)